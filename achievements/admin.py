@@ -1,20 +1,91 @@
-from django.contrib import admin
-from .models import Student, Event, Participation
+from django.contrib import admin, messages
+from .admin_filters import (
+    AutocompleteFilter, EstimatedCountPaginator, FullTextSearchMixin, GroupInputFilter, autocomplete_media,
+)
+from .models import Student, Event, Participation, HoursSummary, ImportJob, RoleRule, SheetFingerprint
 
 @admin.register(Student)
-class StudentAdmin(admin.ModelAdmin):
+class StudentAdmin(FullTextSearchMixin, admin.ModelAdmin):
+    search_kind = 'student'
     list_display = ('full_name', 'group')
     search_fields = ('full_name', 'group')
-    list_filter = ('group',)
+    list_filter = (('group', GroupInputFilter),)
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+    # Порядок нужен и автодополнению (autocomplete_fields участий): без него выборка
+    # для постраничной выдачи не упорядочена. По ФИО — есть индекс student_full_name_idx
+    ordering = ('full_name', 'pk')
 
 @admin.register(Event)
-class EventAdmin(admin.ModelAdmin):
+class EventAdmin(FullTextSearchMixin, admin.ModelAdmin):
+    search_kind = 'event'
     list_display = ('name', 'level', 'start_date', 'end_date', 'is_first_time')
     list_filter = ('level', 'start_date', 'is_first_time')
     search_fields = ('name',)
+    ordering = ('-start_date', '-pk')
 
 @admin.register(Participation)
-class ParticipationAdmin(admin.ModelAdmin):
+class ParticipationAdmin(FullTextSearchMixin, admin.ModelAdmin):
+    search_kind = 'participation'
     list_display = ('student', 'event', 'role', 'hours')
-    list_filter = ('event', 'student')
-    search_fields = ('student__full_name', 'event__name', 'role')
\ No newline at end of file
+    list_filter = (('event', AutocompleteFilter), ('student', AutocompleteFilter))
+    list_select_related = ('student', 'event')
+    autocomplete_fields = ('student', 'event')
+    search_fields = ('student__full_name', 'event__name', 'role')
+    # Без второго COUNT(*) по всей таблице при поиске и фильтрах
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+
+    @property
+    def media(self):
+        return super().media + autocomplete_media(self, Participation, 'student')
+
+
+@admin.register(HoursSummary)
+class HoursSummaryAdmin(admin.ModelAdmin):
+    """Только просмотр: сводку ведут загрузка и сигналы"""
+    list_display = ('student', 'level', 'academic_year', 'term', 'hours', 'count')
+    list_filter = ('academic_year', 'term', 'level')
+    list_select_related = ('student',)
+    search_fields = ('student__full_name',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(RoleRule)
+class RoleRuleAdmin(admin.ModelAdmin):
+    list_display = ('order', 'pattern', 'replacement', 'is_regex')
+    list_display_links = ('pattern',)
+    list_editable = ('order',)
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        # Правила применяются при записи участия — уже сохранённые роли пересчитывает команда
+        self.message_user(
+            request,
+            'Правило действует для новых и изменённых участий. Чтобы применить его к уже '
+            'загруженным, выполните manage.py normalize_roles.',
+            messages.WARNING,
+        )
+
+@admin.register(SheetFingerprint)
+class SheetFingerprintAdmin(admin.ModelAdmin):
+    list_display = ('sheet_name', 'event', 'updated_at')
+    search_fields = ('sheet_name', 'event__name')
+    readonly_fields = ('content_hash', 'updated_at')
+
+
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'file_name', 'status', 'created_by', 'created_at', 'sheets_done', 'sheets_total')
+    list_filter = ('status',)
+    exclude = ('data',)
+    readonly_fields = (
+        'file_name', 'status', 'created_by', 'created_at', 'started_at', 'finished_at', 'heartbeat_at', 'attempts',
+        'force', 'dry_run', 'sheets_total', 'sheets_done', 'success_sheets', 'unchanged_sheets', 'events_created',
+        'participations_created', 'participations_updated', 'sheet_results', 'error_sheets', 'error', 'report',
+    )
@@ -0,0 +1,149 @@
+"""
+Фильтры, поиск и пагинатор для списков админки на больших таблицах.
+
+Стандартные фильтры по внешнему ключу выводят в боковую панель все связанные
+объекты, поиск по search_fields — это LIKE '%…%' по таблицам в JOIN, а пагинатор
+считает COUNT(*) по всей таблице на каждом открытии списка.
+"""
+from django.contrib import admin
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.urls import reverse
+from django.utils.functional import cached_property
+
+from . import search
+
+GROUP_SUGGESTIONS_LIMIT = 500
+
+
+def _single_value(values):
+    # В used_parameters значения — списки (несколько значений одного параметра)
+    if isinstance(values, (list, tuple)):
+        return values[-1] if values else None
+    return values
+
+
+class AutocompleteFilter(admin.FieldListFilter):
+    """
+    Фильтр по внешнему ключу с поиском (select2 админки, как у autocomplete_fields)
+    вместо списка всех связанных объектов. Админке связанной модели нужны
+    search_fields, а админке списка — autocomplete_media() в media.
+    """
+    template = 'admin/achievements/autocomplete_filter.html'
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        self.lookup_kwarg = f'{field_path}__{field.target_field.name}__exact'
+        super().__init__(field, request, params, model, model_admin, field_path)
+        self.remote_model = field.remote_field.model
+        self.autocomplete_url = reverse(f'{model_admin.admin_site.name}:autocomplete')
+        self.source = (model._meta.app_label, model._meta.model_name, field.name)
+
+    def expected_parameters(self):
+        return [self.lookup_kwarg]
+
+    def has_output(self):
+        return True
+
+    def choices(self, changelist):
+        value = _single_value(self.used_parameters.get(self.lookup_kwarg))
+        selected = None
+        if value is not None and str(value).isdigit():
+            selected = self.remote_model._default_manager.filter(pk=value).first()
+        app_label, model_name, field_name = self.source
+        yield {
+            'selected': selected is not None,
+            'value': selected.pk if selected is not None else '',
+            'display': str(selected) if selected is not None else '',
+            'reset_url': changelist.get_query_string(remove=[self.lookup_kwarg]),
+            'url_template': changelist.get_query_string({self.lookup_kwarg: '__value__'}),
+            'autocomplete_url': self.autocomplete_url,
+            'app_label': app_label,
+            'model_name': model_name,
+            'field_name': field_name,
+        }
+
+
+class GroupInputFilter(admin.FieldListFilter):
+    """
+    Фильтр по текстовому полю через поле ввода с подсказками (datalist) вместо
+    списка ссылок. Подсказки — DISTINCT по индексу поля, не больше
+    GROUP_SUGGESTIONS_LIMIT.
+    """
+    template = 'admin/achievements/input_filter.html'
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        self.lookup_kwarg = f'{field_path}__exact'
+        super().__init__(field, request, params, model, model_admin, field_path)
+        self.field_path = field_path
+        self.model = model
+        # Остальные параметры списка сохраняются скрытыми полями формы фильтра
+        self.other_params = [
+            (key, value)
+            for key, values in request.GET.lists()
+            for value in values
+            if key not in (self.lookup_kwarg, 'p', 'e')
+        ]
+
+    def expected_parameters(self):
+        return [self.lookup_kwarg]
+
+    def has_output(self):
+        return True
+
+    def choices(self, changelist):
+        suggestions = (
+            self.model._default_manager.exclude(**{self.field_path: ''})
+            .order_by(self.field_path).values_list(self.field_path, flat=True).distinct()
+        )
+        yield {
+            'selected': self.lookup_kwarg in self.used_parameters,
+            'value': _single_value(self.used_parameters.get(self.lookup_kwarg)) or '',
+            'param': self.lookup_kwarg,
+            'other_params': self.other_params,
+            'reset_url': changelist.get_query_string(remove=[self.lookup_kwarg]),
+            'suggestions': suggestions[:GROUP_SUGGESTIONS_LIMIT],
+        }
+
+
+class FullTextSearchMixin:
+    """
+    Поиск в списке (и в автодополнении связанных полей) по полнотекстовому индексу
+    search вместо icontains по search_fields. search_fields нужны админке только
+    для показа строки поиска и для autocomplete_fields других моделей.
+    """
+    search_kind = None
+
+    def get_search_results(self, request, queryset, search_term):
+        return search.filter_queryset(self.search_kind, queryset, search_term), False
+
+
+def autocomplete_media(model_admin, model, field_name):
+    """Скрипты и стили select2 админки для AutocompleteFilter в списке объектов."""
+    return AutocompleteSelect(model._meta.get_field(field_name), model_admin.admin_site).media
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Пагинатор, который для большой таблицы без фильтров берёт число строк из
+    статистики PostgreSQL (pg_class.reltuples) вместо COUNT(*). С фильтрами, на
+    небольших таблицах и на SQLite считает точно.
+    """
+    ESTIMATE_THRESHOLD = 100_000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if isinstance(queryset, QuerySet) and not queryset.query.where:
+            connection = connections[queryset.db]
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                        [queryset.model._meta.db_table],
+                    )
+                    row = cursor.fetchone()
+                if row and row[0] >= self.ESTIMATE_THRESHOLD:
+                    return row[0]
+        return super().count
@@ -0,0 +1,137 @@
+"""
+JSON API только для чтения: студенты, мероприятия, участия.
+
+Страницы — по ключу, а не OFFSET: курсор несёт id последней строки страницы, и
+следующая выбирается условием id > курсора по первичному ключу — одинаково быстро
+на любой глубине и без пропусков при вставке новых строк.
+
+Условные запросы: ETag и Last-Modified строятся из общей версии данных
+(DataVersion), поэтому повторный опрос без изменений получает 304 Not Modified
+за один запрос к базе — без выборки и сериализации страницы.
+"""
+import base64
+import binascii
+import hmac
+from functools import wraps
+
+from django.conf import settings
+from django.http import JsonResponse
+
+from .forms import EventApiFilterForm, ParticipationApiFilterForm, StudentApiFilterForm
+from .models import DataVersion, Event, Participation, Student
+
+# Увеличить при изменении формата ответов, чтобы не получить 304 на старый ответ
+API_VERSION = 1
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+RESOURCES = {
+    'students': (Student, StudentApiFilterForm, ('id', 'full_name', 'group')),
+    'events': (Event, EventApiFilterForm, ('id', 'name', 'level', 'start_date', 'end_date', 'is_first_time')),
+    'participations': (
+        Participation, ParticipationApiFilterForm,
+        ('id', 'student_id', 'event_id', 'role', 'role_normalized', 'hours'),
+    ),
+}
+
+
+class BadRequest(Exception):
+    pass
+
+
+def error_response(message, status=400):
+    return JsonResponse({'error': message}, status=status, json_dumps_params={'ensure_ascii': False})
+
+
+def _token(request):
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    return token.strip() if scheme.lower() == 'bearer' else ''
+
+
+def token_or_staff_required(setting):
+    """
+    Доступ по токену из списка в настройке setting (заголовок «Authorization:
+    Bearer <токен>») или для вошедшего сотрудника.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            token = _token(request)
+            if token:
+                if not any(hmac.compare_digest(token, known) for known in getattr(settings, setting, [])):
+                    return error_response('Неверный токен', status=401)
+            elif not (request.user.is_active and request.user.is_staff):
+                response = error_response('Нужна авторизация', status=401)
+                response['WWW-Authenticate'] = 'Bearer'
+                return response
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+api_auth = token_or_staff_required('ACHIEVEMENTS_API_TOKENS')
+
+
+def _data_version(request):
+    # etag и last_modified вызываются для одного запроса по очереди — версия читается один раз
+    if not hasattr(request, '_data_version'):
+        request._data_version = DataVersion.current()
+    return request._data_version
+
+
+def etag(request, *args, **kwargs):
+    return f'{API_VERSION}.{_data_version(request)[0]}'
+
+
+def last_modified(request, *args, **kwargs):
+    return _data_version(request)[1]
+
+
+def encode_cursor(pk):
+    return base64.urlsafe_b64encode(str(pk).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        value = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+    except (binascii.Error, UnicodeDecodeError):
+        raise BadRequest('Неверный курсор')
+    if not value.isdigit():
+        raise BadRequest('Неверный курсор')
+    return int(value)
+
+
+def page_limit(value):
+    if not value:
+        return DEFAULT_LIMIT
+    if not value.isdigit() or not 1 <= int(value) <= MAX_LIMIT:
+        raise BadRequest(f'limit: число от 1 до {MAX_LIMIT}')
+    return int(value)
+
+
+def list_page(request, resource):
+    """
+    Страница списка: {'results': [...], 'next': ссылка на следующую страницу или None}.
+    Ошибки параметров — BadRequest.
+    """
+    model, form_class, fields = RESOURCES[resource]
+    form = form_class(request.GET)
+    if not form.is_valid():
+        errors = '; '.join(f'{field}: {" ".join(messages)}' for field, messages in form.errors.items())
+        raise BadRequest(errors)
+    limit = page_limit(request.GET.get('limit', ''))
+
+    queryset = model.objects.filter(**form.lookups())
+    if request.GET.get('cursor'):
+        queryset = queryset.filter(pk__gt=decode_cursor(request.GET['cursor']))
+    # Лишняя строка показывает, есть ли следующая страница, без COUNT(*)
+    rows = list(queryset.order_by('pk').values(*fields)[:limit + 1])
+
+    next_url = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        params = request.GET.copy()
+        params['cursor'] = encode_cursor(rows[-1]['id'])
+        next_url = request.build_absolute_uri(f'{request.path}?{params.urlencode()}')
+    return {'results': rows, 'next': next_url}
@@ -3,3 +3,10 @@ from django.apps import AppConfig
 
 class AchievementsConfig(AppConfig):
     name = 'achievements'
+
+    def ready(self):
+        # Сигналы, поднимающие версию данных отчётов
+        from . import signals  # noqa: F401
+
+        # Шрифты для PDF здесь не регистрируются: reportlab загружается при первом
+        # отчёте или заранее, в warmup.warm_up() (gunicorn --preload)
@@ -0,0 +1,33 @@
+"""
+Поиск студентов по началу ФИО для автодополнения.
+
+Ищем по нормализованному ФИО (Student.name_key) диапазоном
+name_key >= «префикс» AND name_key < «префикс со следующей последней буквой» —
+такое условие идёт по индексу student_name_key_idx и в SQLite, и в PostgreSQL
+(LIKE 'префикс%' в SQLite регистронезависим и индекс не использует, а в PostgreSQL
+требует отдельного класса операторов). Дополнительное условие startswith отсекает
+строки, которые правила сортировки базы могли поместить в этот диапазон.
+"""
+from .models import Student
+from .parsing import normalize_name
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 50
+
+
+def prefix_range(prefix):
+    """Границы диапазона строк, начинающихся с prefix: [prefix, верхняя граница)."""
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def search_students(query, limit=DEFAULT_LIMIT):
+    """Студенты, чьё ФИО начинается с query (без учёта регистра, «ё» = «е»), по алфавиту."""
+    prefix = normalize_name(query)
+    if not prefix:
+        return Student.objects.none()
+    lower, upper = prefix_range(prefix)
+    return (
+        Student.objects.filter(name_key__gte=lower, name_key__lt=upper, name_key__startswith=prefix)
+        .order_by('name_key', 'pk')
+        .only('id', 'full_name', 'group')[:min(limit, MAX_LIMIT)]
+    )
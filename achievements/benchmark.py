@@ -0,0 +1,429 @@
+"""
+Нагрузочная проверка загрузки Excel: генератор синтетических файлов в формате
+реальных листов и замер фаз загрузки (чтение, разбор, запись в базу).
+Используется командой manage.py benchmark_import.
+
+Замер старта веб-сервера (run_startup_benchmark): время до первого ответа
+gunicorn и память мастера и воркеров. Используется командой benchmark_startup.
+
+Нагрузочная проверка отчётов (run_report_load_test): одновременные запросы
+PDF-отчётов к gunicorn с синхронными (WSGI) и асинхронными (ASGI) воркерами.
+Используется командой benchmark_reports.
+"""
+import itertools
+import os
+import random
+import resource
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import connection
+
+from .importer import StudentIndex, save_record, import_workbook
+from .metrics import QueryCounter
+from .models import RoleRule
+from .parsing import parse_workbook
+from .readers import iter_sheets
+
+LEVELS = ['Курсовой', 'Факультетский', 'Университетский', 'Всероссийский', 'День химика']
+ROLES = ['участник', 'волонтёр', 'главныйорганизатор', 'организатор(отв.за регистрацию)', 'ведущий']
+LAST_NAMES = ['Иванов', 'Петров', 'Сидоров', 'Смирнов', 'Кузнецов', 'Попов', 'Соловьёв', 'Фёдоров']
+FIRST_NAMES = ['Иван', 'Пётр', 'Алексей', 'Сергей', 'Артём', 'Семён', 'Дмитрий', 'Михаил']
+
+
+def generate_workbook(path, sheets=10, rows=100, duplicate_ratio=0.5, seed=0):
+    """
+    Создаёт .xlsx: на каждом листе блок мероприятия (заголовки и значения), пустая
+    строка, затем таблица «ФИО | Группа | Роль | Часы».
+
+    duplicate_ratio — доля строк со студентами, уже встречавшимися в файле (часть из
+    них записана иначе: другой регистр, «е» вместо «ё», лишние пробелы).
+    Возвращает число строк участников.
+    """
+    import openpyxl
+
+    rng = random.Random(seed)
+    workbook = openpyxl.Workbook(write_only=True)
+    seen_names = []
+    total_rows = 0
+    start = date(2024, 9, 1)
+
+    for sheet_idx in range(sheets):
+        worksheet = workbook.create_sheet(f'Лист{sheet_idx + 1}')
+        day = start + timedelta(days=sheet_idx)
+        worksheet.append(['Название мероприятия', 'Уровень', 'Даты проведения', 'Организовано впервые'])
+        worksheet.append([
+            f'Мероприятие {sheet_idx + 1}',
+            rng.choice(LEVELS),
+            f'{day:%d.%m.%Y} - {day + timedelta(days=1):%d.%m.%Y}',
+            rng.choice(['да', 'нет']),
+        ])
+        worksheet.append([])
+        worksheet.append(['ФИО', 'Группа', 'Роль', 'Часы'])
+
+        sheet_names = set()
+        for _ in range(rows):
+            if seen_names and rng.random() < duplicate_ratio:
+                name = _variant(rng.choice(seen_names), rng)
+            else:
+                name = f'{rng.choice(LAST_NAMES)} {rng.choice(FIRST_NAMES)} {len(seen_names) + 1}'
+                seen_names.append(name)
+            if name in sheet_names:
+                continue
+            sheet_names.add(name)
+            hours = rng.choice([rng.randint(1, 12), f'{rng.randint(1, 12)}+', f'{rng.randint(1, 12)} ч.'])
+            worksheet.append([name, f'{rng.randint(1, 6)} курс', rng.choice(ROLES), hours])
+            total_rows += 1
+
+    workbook.save(path)
+    return total_rows
+
+
+def _variant(name, rng):
+    """То же ФИО в другом написании — так оно встречается в реальных файлах."""
+    choice = rng.randint(0, 3)
+    if choice == 1:
+        return name.lower()
+    if choice == 2:
+        return name.replace('ё', 'е')
+    if choice == 3:
+        return name.replace(' ', '  ', 1)
+    return name
+
+
+@contextmanager
+def temporary_database(name=None):
+    """
+    Временная база на время замера, как у тестов: рабочие данные не затрагиваются.
+    name — путь к файлу SQLite (нужен, когда базу открывает запущенный gunicorn),
+    по умолчанию — имя тестовой базы из настроек.
+    """
+    test_settings = connection.settings_dict['TEST']
+    old_name, old_test_name = connection.settings_dict['NAME'], test_settings.get('NAME')
+    if name is not None:
+        test_settings['NAME'] = name
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=False)
+        test_settings['NAME'] = old_test_name
+
+
+def run_benchmark(path, workers=1, reader='openpyxl'):
+    """
+    Загружает файл в текущую базу по фазам и возвращает метрики. Базу должен
+    подготовить вызывающий (команда создаёт временную тестовую базу).
+    """
+    metrics = {}
+
+    # 1. Только чтение листов
+    started = time.perf_counter()
+    rows_read = 0
+    for _, rows in iter_sheets(path, reader):
+        for _ in rows:
+            rows_read += 1
+    metrics['read_seconds'] = time.perf_counter() - started
+    metrics['rows_read'] = rows_read
+
+    # 2. Чтение + разбор (в пуле процессов при workers > 1)
+    started = time.perf_counter()
+    records = list(parse_workbook(path, reader, workers))
+    metrics['read_parse_seconds'] = time.perf_counter() - started
+    metrics['parse_seconds'] = max(metrics['read_parse_seconds'] - metrics['read_seconds'], 0.0)
+    if workers > 1:
+        # Тот же разбор без пула — параллельный должен быть быстрее
+        started = time.perf_counter()
+        list(parse_workbook(path, reader, 1))
+        metrics['read_parse_serial_seconds'] = time.perf_counter() - started
+        metrics['parallel_speedup'] = metrics['read_parse_serial_seconds'] / metrics['read_parse_seconds']
+    metrics['cpus'] = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count()
+    metrics['sheets'] = len(records)
+    metrics['sheet_errors'] = sum(1 for _, _, error in records if error is not None)
+    metrics['participants'] = sum(len(record['participants']) for _, record, error in records if error is None)
+
+    # 3. Запись в базу
+    counter = QueryCounter()
+    students = StudentIndex()
+    started = time.perf_counter()
+    with connection.execute_wrapper(counter):
+        roles = RoleRule.normalizer()
+        for sheet_name, record, error in records:
+            if error is None:
+                save_record(sheet_name, record, students=students, roles=roles)
+    metrics['write_seconds'] = time.perf_counter() - started
+    metrics['queries'] = counter.count
+    metrics['db_seconds'] = counter.seconds
+
+    # 4. Повторная загрузка того же файла целиком (неизменные листы пропускаются)
+    counter = QueryCounter()
+    started = time.perf_counter()
+    with connection.execute_wrapper(counter):
+        import_workbook(path, workers=workers, reader=reader)
+    metrics['reupload_seconds'] = time.perf_counter() - started
+    metrics['reupload_queries'] = counter.count
+
+    total = metrics['read_seconds'] + metrics['parse_seconds'] + metrics['write_seconds']
+    metrics['total_seconds'] = total
+    metrics['rows_per_second'] = metrics['participants'] / total if total else 0.0
+    # ru_maxrss в Linux — в килобайтах
+    metrics['peak_rss_mb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    metrics['peak_rss_children_mb'] = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    return metrics
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _children(pid):
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as f:
+            return [int(child) for child in f.read().split()]
+    except OSError:
+        return []
+
+
+def process_memory(pid):
+    """
+    Память процесса в МБ из /proc/<pid>/smaps_rollup: rss — вся резидентная,
+    pss — с общими страницами, поделёнными между процессами, private — только
+    собственные страницы процесса. None, если /proc недоступен (не Linux).
+    """
+    fields = {'Rss': 'rss_mb', 'Pss': 'pss_mb', 'Private_Clean': 'private_mb', 'Private_Dirty': 'private_mb'}
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            lines = f.readlines()
+    except OSError:
+        return None
+    memory = {'rss_mb': 0.0, 'pss_mb': 0.0, 'private_mb': 0.0}
+    for line in lines:
+        key, _, value = line.partition(':')
+        if key in fields:
+            memory[fields[key]] += int(value.split()[0]) / 1024
+    return memory
+
+
+class _Server:
+    """Запущенный gunicorn: процесс мастера, адрес и время до первого ответа."""
+
+    def __init__(self, process, url, first_response):
+        self.process = process
+        self.url = url
+        self.first_response = first_response
+
+
+@contextmanager
+def gunicorn(app='config.wsgi', args=(), env=None, path='/admin/login/', timeout=60):
+    """
+    Запускает gunicorn с приложением app на свободном порту, ждёт первого ответа на
+    path и по выходе из блока останавливает сервер (SIGTERM, затем SIGKILL).
+    """
+    port = _free_port()
+    command = [sys.executable, '-m', 'gunicorn', app, '--bind', f'127.0.0.1:{port}', *args]
+    url = f'http://127.0.0.1:{port}'
+
+    with tempfile.TemporaryFile() as log:
+        started = time.perf_counter()
+        process = subprocess.Popen(
+            command, cwd=settings.BASE_DIR, env=env, stdout=log, stderr=subprocess.STDOUT,
+        )
+        try:
+            while True:
+                if process.poll() is not None or time.perf_counter() - started > timeout:
+                    log.seek(0)
+                    raise RuntimeError(f'gunicorn не ответил на {url}{path}:\n{log.read().decode(errors="replace")}')
+                try:
+                    with urllib.request.urlopen(url + path, timeout=1) as response:
+                        response.read()
+                except urllib.error.HTTPError:
+                    pass  # Ответ с ошибкой — тоже ответ: сервер и Django уже работают
+                except OSError:
+                    time.sleep(0.02)
+                    continue
+                break
+            yield _Server(process, url, time.perf_counter() - started)
+        finally:
+            process.send_signal(signal.SIGTERM)
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+
+
+def run_startup_benchmark(workers=2, preload=False, path='/admin/login/', timeout=60):
+    """
+    Запускает gunicorn (config.wsgi) и замеряет время от запуска до первого ответа
+    на path и до готовности всех воркеров, затем память мастера и каждого воркера.
+    """
+    args = ['--workers', str(workers)]
+    if preload:
+        args.append('--preload')
+
+    started = time.perf_counter()
+    with gunicorn(args=args, path=path, timeout=timeout) as server:
+        # Воркеры создаются по одному: первый ответ может прийти раньше, чем
+        # запущены остальные
+        while len(_children(server.process.pid)) < workers and time.perf_counter() - started < timeout:
+            time.sleep(0.02)
+        all_workers = time.perf_counter() - started
+        # Без preload воркер загружает приложение сам, уже после создания процесса:
+        # память замеряется, когда RSS воркеров перестаёт меняться
+        worker_memory, previous = [], None
+        while time.perf_counter() - started < timeout:
+            worker_memory = [process_memory(pid) for pid in _children(server.process.pid)]
+            rss = [memory and memory['rss_mb'] for memory in worker_memory]
+            if rss == previous:
+                break
+            previous = rss
+            time.sleep(0.25)
+
+        return {
+            'workers': workers,
+            'preload': preload,
+            'first_response_seconds': server.first_response,
+            'all_workers_seconds': all_workers,
+            'master': process_memory(server.process.pid),
+            'worker_memory': [memory for memory in worker_memory if memory is not None],
+            # Процессы пула offload, созданные воркерами (с --preload — сразу после fork)
+            'pool_memory': [
+                memory for memory in (
+                    process_memory(pid) for worker in _children(server.process.pid) for pid in _children(worker)
+                )
+                if memory is not None
+            ],
+        }
+
+
+def prepare_report_load_data(rows=300):
+    """
+    Студент с rows участиями и сотрудник в текущей базе. Возвращает (id студента,
+    заголовок Cookie с сессией сотрудника и CSRF-токеном, CSRF-токен).
+    """
+    from django.contrib.auth.models import User
+    from django.test import Client
+    from django.utils.crypto import get_random_string
+
+    from .models import Event, Participation, Student
+
+    student = Student.objects.create(full_name='Нагрузочный Тест Отчётович', group='1 курс')
+    events = Event.objects.bulk_create([
+        Event(
+            name=f'Мероприятие {idx} с достаточно длинным названием для переноса строки',
+            level=level, start_date=date(2025, 1, 1) + timedelta(days=idx % 365),
+            end_date=date(2025, 1, 1) + timedelta(days=idx % 365),
+        )
+        for idx, level in zip(range(rows), itertools.cycle(['course', 'faculty', 'university', 'regional']))
+    ])
+    Participation.objects.bulk_create([
+        Participation(student=student, event=event, role='организатор', role_normalized='Организатор', hours=1 + idx % 5)
+        for idx, event in enumerate(events)
+    ])
+    staff = User.objects.create_user(f'load-{get_random_string(8)}', is_staff=True)
+    client = Client()
+    client.force_login(staff)
+    # Токен из 32 символов принимается и как значение cookie, и как поле формы
+    csrf_token = get_random_string(32)
+    session = client.cookies[settings.SESSION_COOKIE_NAME].value
+    cookie = f'{settings.SESSION_COOKIE_NAME}={session}; {settings.CSRF_COOKIE_NAME}={csrf_token}'
+    return student.pk, cookie, csrf_token
+
+
+def _timed_request(request, timeout):
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as exc:
+        status = exc.code
+    return status, time.perf_counter() - started
+
+
+def run_report_load_test(mode, database_url, student_id, cookie, csrf_token, concurrency=8, workers=1,
+                         offload_workers=2, queue=None, timeout=120):
+    """
+    Запускает gunicorn в режиме mode ('wsgi' — синхронные воркеры, 'asgi' —
+    асинхронные) на базе database_url и одновременно запрашивает concurrency PDF-
+    отчётов. Пока они строятся, каждые 0,1 с отправляется лёгкий запрос (подсказки
+    студентов) — его время показывает, ждут ли остальные запросы вёрстки.
+    queue — мест в очереди пула offload (по умолчанию concurrency: без ответов 503).
+    """
+    args = ['--workers', str(workers), '--preload', '--timeout', str(timeout)]
+    if mode == 'asgi':
+        app, args = 'config.asgi', ['-k', 'asgi', *args]
+    else:
+        app = 'config.wsgi'
+    env = {
+        **os.environ,
+        'DATABASE_URL': database_url,
+        'ACHIEVEMENTS_OFFLOAD_WORKERS': str(offload_workers),
+        'ACHIEVEMENTS_OFFLOAD_QUEUE': str(concurrency if queue is None else queue),
+        'ACHIEVEMENTS_REPORT_CACHE_MAX_BYTES': '0',
+        'ACHIEVEMENTS_METRICS_DIR': '',
+        'ACHIEVEMENTS_SLOW_REQUEST_SECONDS': '0',
+        # Как строка web_asgi в Procfile
+        'ACHIEVEMENTS_ASGI': 'True' if mode == 'asgi' else 'False',
+    }
+    form = urllib.parse.urlencode({
+        'student': student_id, 'date_from': '2025-01-01', 'date_to': '2025-12-31',
+        'csrfmiddlewaretoken': csrf_token,
+    }).encode()
+
+    with gunicorn(app, args, env=env, timeout=timeout) as server:
+        def report():
+            request = urllib.request.Request(server.url + '/report/', data=form, headers={'Cookie': cookie})
+            return _timed_request(request, timeout)
+
+        def light():
+            request = urllib.request.Request(server.url + '/students/search/?q=%D0%9D', headers={'Cookie': cookie})
+            return _timed_request(request, timeout)
+
+        # Первый отчёт отдельно: он же прогревает процессы воркеров и пула
+        single_status, single_seconds = report()
+        if single_status != 200:
+            raise RuntimeError(f'Отчёт вернул HTTP {single_status}')
+        _, light_idle = light()
+
+        with ThreadPoolExecutor(max_workers=concurrency + 1) as executor:
+            started = time.perf_counter()
+            reports = [executor.submit(report) for _ in range(concurrency)]
+            light_results = []
+            while not all(future.done() for future in reports):
+                time.sleep(0.1)
+                light_results.append(light())
+            total = time.perf_counter() - started
+            results = [future.result() for future in reports]
+
+    latencies = sorted(seconds for status, seconds in results if status == 200)
+    light_latencies = sorted(seconds for _, seconds in light_results)
+    return {
+        'mode': mode,
+        'workers': workers,
+        'offload_workers': offload_workers,
+        'queue': concurrency if queue is None else queue,
+        'concurrency': concurrency,
+        'single_report_seconds': single_seconds,
+        'total_seconds': total,
+        'report_ok': len(latencies),
+        'report_busy': sum(status == 503 for status, _ in results),
+        'report_p50_seconds': latencies[len(latencies) // 2] if latencies else None,
+        'report_max_seconds': latencies[-1] if latencies else None,
+        'light_idle_seconds': light_idle,
+        'light_p50_seconds': light_latencies[len(light_latencies) // 2] if light_latencies else None,
+        'light_max_seconds': light_latencies[-1] if light_latencies else None,
+    }
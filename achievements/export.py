@@ -0,0 +1,114 @@
+"""
+Выгрузка участий в CSV и XLSX.
+
+Строки читаются из базы порциями (QuerySet.iterator), в памяти их не копится.
+CSV отдаётся потоком по мере чтения: заголовок уходит клиенту ещё до выполнения
+запроса (под ASGI — acsv_stream, строки читаются через async ORM). XLSX пишется
+openpyxl в режиме write-only во временный файл (формат — zip, его нельзя отдавать
+до конца записи) и затем отдаётся из файла.
+"""
+import csv
+import tempfile
+
+from .models import Event, Participation
+
+CHUNK_SIZE = 2000
+
+COLUMNS = ['ФИО', 'Группа', 'Мероприятие', 'Уровень', 'Дата начала', 'Дата окончания', 'Роль', 'Часы']
+
+FIELDS = (
+    'student__full_name', 'student__group', 'event__name', 'event__level',
+    'event__start_date', 'event__end_date', 'role_normalized', 'hours',
+)
+
+LEVEL_DISPLAY = dict(Event.LEVEL_CHOICES)
+
+
+def export_queryset(date_from=None, date_to=None, level=None, group=None, event=None):
+    """Участия по фильтрам (пустой фильтр не применяется) в порядке дат мероприятий."""
+    participations = Participation.objects.all()
+    if date_from:
+        participations = participations.filter(event__start_date__gte=date_from)
+    if date_to:
+        participations = participations.filter(event__start_date__lte=date_to)
+    if level:
+        participations = participations.filter(event__level=level)
+    if group:
+        participations = participations.filter(student__group=group)
+    if event:
+        participations = participations.filter(event=event)
+    return participations.order_by('event__start_date', 'event_id', 'student__full_name')
+
+
+def export_rows(participations):
+    """Строки выгрузки, читаемые из базы порциями по CHUNK_SIZE."""
+    for values in participations.values_list(*FIELDS).iterator(chunk_size=CHUNK_SIZE):
+        yield _row(values)
+
+
+def _row(values):
+    full_name, group, name, level, start_date, end_date, role, hours = values
+    return [full_name, group, name, LEVEL_DISPLAY.get(level, level), start_date, end_date, role, hours]
+
+
+class _Echo:
+    """Файлоподобный объект для csv.writer: возвращает строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_line(writer, row):
+    row[4] = row[4].strftime('%d.%m.%Y')
+    row[5] = row[5].strftime('%d.%m.%Y')
+    return writer.writerow(row)
+
+
+def csv_stream(participations):
+    """
+    Генератор строк CSV. Разделитель «;» и BOM — так файл без настройки открывает
+    русский Excel. Даты — ДД.ММ.ГГГГ.
+    """
+    writer = csv.writer(_Echo(), delimiter=';')
+    yield '\ufeff' + writer.writerow(COLUMNS)
+    lines = []
+    for row in export_rows(participations):
+        lines.append(_csv_line(writer, row))
+        # Отдаём порциями, а не по строке — меньше накладных расходов на запись в сокет
+        if len(lines) >= 500:
+            yield ''.join(lines)
+            lines = []
+    if lines:
+        yield ''.join(lines)
+
+
+async def acsv_stream(participations):
+    """csv_stream для ASGI: асинхронный генератор, строки читаются через aiterator()."""
+    writer = csv.writer(_Echo(), delimiter=';')
+    yield '\ufeff' + writer.writerow(COLUMNS)
+    lines = []
+    # values(), а не values_list(): итератор values_list выполняет запрос сразу при
+    # создании, и aiterator() обратился бы к базе из цикла событий
+    async for values in participations.values(*FIELDS).aiterator(chunk_size=CHUNK_SIZE):
+        lines.append(_csv_line(writer, _row([values[field] for field in FIELDS])))
+        if len(lines) >= 500:
+            yield ''.join(lines)
+            lines = []
+    if lines:
+        yield ''.join(lines)
+
+
+def xlsx_file(participations):
+    """XLSX во временном файле, готовом к чтению с начала."""
+    import openpyxl
+
+    workbook = openpyxl.Workbook(write_only=True)
+    worksheet = workbook.create_sheet('Участия')
+    worksheet.append(COLUMNS)
+    for row in export_rows(participations):
+        worksheet.append(row)
+
+    out = tempfile.TemporaryFile()
+    workbook.save(out)
+    out.seek(0)
+    return out
@@ -1,11 +1,134 @@
 from django import forms
+from django.urls import reverse
+
+from .models import Student, Event
+from .parsing import normalize_name
+
 
 class UploadFileForm(forms.Form):
     file = forms.FileField(label='Выберите файл Excel (.xlsx)')
+    force = forms.BooleanField(label='Загрузить заново и неизменённые листы', required=False)
+    dry_run = forms.BooleanField(label='Только проверить файл (без записи в базу)', required=False)
+
+
+def group_choices(empty_label):
+    """Варианты фильтра по группе: пустой вариант и все группы студентов."""
+    groups = Student.objects.exclude(group='').order_by('group').values_list('group', flat=True).distinct()
+    return [('', empty_label)] + [(group, group) for group in groups]
+
+
+class StudentAutocompleteWidget(forms.Widget):
+    """
+    Поле ввода ФИО с подсказками от student_search вместо <select> со всеми
+    студентами. На сервер уходит id выбранного студента, поэтому ModelChoiceField
+    проверяет значение по первичному ключу, как и раньше.
+    """
+    template_name = 'achievements/widgets/student_autocomplete.html'
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        label = ''
+        if value not in (None, ''):
+            student = Student.objects.filter(pk=value).first() if str(value).isdigit() else None
+            label = str(student) if student else ''
+        context['widget'].update(search_url=reverse('student_search'), label=label)
+        return context
 
-from .models import Student
 
 class ReportForm(forms.Form):
-    student = forms.ModelChoiceField(queryset=Student.objects.all(), label='Студент')
+    student = forms.ModelChoiceField(
+        queryset=Student.objects.all(), label='Студент', widget=StudentAutocompleteWidget,
+    )
+    date_from = forms.DateField(label='Дата с', widget=forms.DateInput(attrs={'type': 'date'}))
+    date_to = forms.DateField(label='Дата по', widget=forms.DateInput(attrs={'type': 'date'}))
+
+
+class BatchReportForm(forms.Form):
+    FORMAT_CHOICES = [
+        ('zip', 'ZIP-архив (PDF на каждого студента)'),
+        ('pdf', 'Один PDF с закладками'),
+    ]
+
+    group = forms.ChoiceField(label='Группа (курс)', required=False)
     date_from = forms.DateField(label='Дата с', widget=forms.DateInput(attrs={'type': 'date'}))
-    date_to = forms.DateField(label='Дата по', widget=forms.DateInput(attrs={'type': 'date'}))
\ No newline at end of file
+    date_to = forms.DateField(label='Дата по', widget=forms.DateInput(attrs={'type': 'date'}))
+    output_format = forms.ChoiceField(label='Формат', choices=FORMAT_CHOICES, initial='zip')
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['group'].choices = group_choices('Все студенты')
+
+
+class ExportForm(forms.Form):
+    date_from = forms.DateField(label='Дата с', required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+    date_to = forms.DateField(label='Дата по', required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+    level = forms.ChoiceField(label='Уровень', required=False, choices=[('', 'Все уровни')] + Event.LEVEL_CHOICES)
+    group = forms.ChoiceField(label='Группа (курс)', required=False)
+    # Номер, а не список: мероприятий в базе может быть очень много
+    event = forms.ModelChoiceField(
+        queryset=Event.objects.all(), required=False, label='Мероприятие (ID)', widget=forms.NumberInput,
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['group'].choices = group_choices('Все группы')
+
+
+class StudentApiFilterForm(forms.Form):
+    """Фильтры списка студентов API (пустой фильтр не применяется)"""
+    group = forms.CharField(required=False)
+    full_name = forms.CharField(required=False)
+
+    def lookups(self):
+        data = self.cleaned_data
+        lookups = {}
+        if data['group']:
+            lookups['group'] = data['group']
+        if data['full_name']:
+            # Как при загрузке: регистр, ё/е и лишние пробелы не различаются
+            lookups['name_key'] = normalize_name(data['full_name'])
+        return lookups
+
+
+class EventApiFilterForm(forms.Form):
+    """Фильтры списка мероприятий API; даты — по дате начала"""
+    name = forms.CharField(required=False)
+    level = forms.ChoiceField(required=False, choices=[('', '')] + Event.LEVEL_CHOICES)
+    date_from = forms.DateField(required=False)
+    date_to = forms.DateField(required=False)
+    is_first_time = forms.NullBooleanField(required=False)
+
+    def lookups(self):
+        data = self.cleaned_data
+        lookups = {
+            'name': data['name'],
+            'level': data['level'],
+            'start_date__gte': data['date_from'],
+            'start_date__lte': data['date_to'],
+        }
+        lookups = {key: value for key, value in lookups.items() if value}
+        if data['is_first_time'] is not None:
+            lookups['is_first_time'] = data['is_first_time']
+        return lookups
+
+
+class ParticipationApiFilterForm(forms.Form):
+    """Фильтры списка участий API; уровень и даты — мероприятия, группа — студента"""
+    student = forms.IntegerField(required=False, min_value=1)
+    event = forms.IntegerField(required=False, min_value=1)
+    level = forms.ChoiceField(required=False, choices=[('', '')] + Event.LEVEL_CHOICES)
+    group = forms.CharField(required=False)
+    date_from = forms.DateField(required=False)
+    date_to = forms.DateField(required=False)
+
+    def lookups(self):
+        data = self.cleaned_data
+        lookups = {
+            'student_id': data['student'],
+            'event_id': data['event'],
+            'event__level': data['level'],
+            'student__group': data['group'],
+            'event__start_date__gte': data['date_from'],
+            'event__start_date__lte': data['date_to'],
+        }
+        return {key: value for key, value in lookups.items() if value}
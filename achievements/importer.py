@@ -0,0 +1,294 @@
+from django.conf import settings
+from django.db import transaction
+
+from .models import Student, Event, Participation, RoleRule, SheetFingerprint
+from .parsing import parse_workbook, record_fingerprint, normalize_name
+from . import metrics, search
+from .signals import bump_data_version
+from .summary import add_delta, apply_deltas, bucket_of
+
+
+class ImportResult:
+    """Итоги загрузки одного файла (по всем листам)"""
+
+    def __init__(self):
+        self.total_sheets = 0
+        self.success_sheets = 0
+        self.unchanged_sheets = 0
+        self.events_created = 0
+        self.participations_created = 0
+        self.participations_updated = 0
+        self.sheet_results = []
+        self.error_sheets = []
+        self.read_error = None
+        # Отчёты проверки листов (только для пробной загрузки)
+        self.reports = []
+
+
+def import_workbook(file, on_sheet=None, workers=None, reader=None, force=False):
+    """
+    Загружает все листы файла. Ошибка на листе не прерывает загрузку остальных.
+    Листы, содержимое которых не изменилось с прошлой загрузки, пропускаются
+    (force=True загружает их заново).
+
+    Листы разбираются (при workers > 1 — параллельно в пуле процессов), а в базу
+    записываются по одному в этом процессе, в порядке листов файла.
+    on_sheet(result) вызывается после каждого листа — через него фоновая задача
+    сохраняет прогресс.
+    """
+    if workers is None:
+        workers = getattr(settings, 'ACHIEVEMENTS_IMPORT_WORKERS', 1)
+    reader = reader or getattr(settings, 'ACHIEVEMENTS_EXCEL_READER', 'openpyxl')
+
+    result = ImportResult()
+    students = StudentIndex()
+    roles = RoleRule.normalizer()
+    try:
+        for sheet_name, record, error in parse_workbook(file, reader, workers, on_timing=record_timing):
+            result.total_sheets += 1
+            if error is None:
+                try:
+                    with metrics.span('import_write'):
+                        stats = save_record(sheet_name, record, force=force, students=students, roles=roles)
+                except Exception as e:
+                    error = str(e)
+                    students.reset()
+            if error is not None:
+                result.error_sheets.append(f'{sheet_name}: {error}')
+            elif stats is None:
+                result.success_sheets += 1
+                result.unchanged_sheets += 1
+                result.sheet_results.append(f'Лист "{sheet_name}": {record["event"]["name"]} — без изменений')
+            else:
+                result.success_sheets += 1
+                result.events_created += int(stats['event_created'])
+                result.participations_created += stats['created']
+                result.participations_updated += stats['updated']
+                result.sheet_results.append(
+                    f'Лист "{sheet_name}": {stats["event"]} — добавлено {stats["created"]}, обновлено {stats["updated"]}'
+                )
+            if on_sheet:
+                on_sheet(result)
+    except Exception as e:
+        # Уже сохранённые листы остаются в базе
+        result.read_error = f'Ошибка чтения файла: {e}'
+    return result
+
+
+def record_timing(phase, seconds):
+    """Этапы чтения и разбора (parsing.parse_workbook) → метрики import_read и import_parse."""
+    metrics.observe('achievements_span_duration_seconds', seconds, span=f'import_{phase}')
+
+
+def validate_workbook(file, on_sheet=None, workers=None, reader=None):
+    """
+    Пробная загрузка: полный разбор всех листов без обращения к базе.
+    Отчёт по каждому листу (см. parsing.validate_sheet) — в result.reports.
+    """
+    if workers is None:
+        workers = getattr(settings, 'ACHIEVEMENTS_IMPORT_WORKERS', 1)
+    reader = reader or getattr(settings, 'ACHIEVEMENTS_EXCEL_READER', 'openpyxl')
+
+    result = ImportResult()
+    try:
+        for sheet_name, report, error in parse_workbook(file, reader, workers, validate=True, on_timing=record_timing):
+            result.total_sheets += 1
+            if error is not None:
+                report = {'event': None, 'errors': [error], 'participants': 0, 'issues': []}
+            report = dict(report, sheet=sheet_name)
+            result.reports.append(report)
+            if report['errors']:
+                result.error_sheets.append(f'{sheet_name}: {report["errors"][0]}')
+            else:
+                result.success_sheets += 1
+                result.sheet_results.append(
+                    f'Лист "{sheet_name}": {report["event"]["name"]} — участников {report["participants"]}, '
+                    f'замечаний {len(report["issues"])}'
+                )
+            if on_sheet:
+                on_sheet(result)
+    except Exception as e:
+        result.read_error = f'Ошибка чтения файла: {e}'
+    return result
+
+
+def save_record(sheet_name, record, force=False, students=None, roles=None):
+    """
+    Сохраняет запись разбора листа (см. parsing.parse_sheet) вместе с отпечатком
+    её содержимого. Если лист с тем же именем и тем же содержимым уже загружался,
+    ничего не пишет и возвращает None.
+    """
+    content_hash = record_fingerprint(record)
+    if not force and SheetFingerprint.objects.filter(sheet_name=sheet_name, content_hash=content_hash).exists():
+        return None
+
+    with transaction.atomic():
+        event, created, created_count, updated_count = save_sheet(record['event'], record['participants'], students, roles)
+        SheetFingerprint.objects.update_or_create(
+            sheet_name=sheet_name,
+            event=event,
+            defaults={'content_hash': content_hash},
+        )
+    return {
+        'event': event.name,
+        'event_created': created,
+        'created': created_count,
+        'updated': updated_count,
+    }
+
+
+def save_sheet(event_fields, participants, students=None, roles=None):
+    """
+    Пакетно сохраняет мероприятие одного листа и его участников.
+
+    event_fields — словарь с ключами name, level, start_date, end_date, is_first_time.
+    participants — список кортежей (full_name, group, role, hours) в порядке строк листа.
+    students — StudentIndex, общий для всех листов файла.
+    roles — нормализатор ролей (RoleRule.normalizer()), общий для всех листов файла.
+
+    Возвращает (event, event_created, created_count, updated_count). Счётчики
+    совпадают с построчным update_or_create: повтор студента на том же листе
+    считается обновлением.
+    """
+    with transaction.atomic():
+        event, event_created = Event.objects.update_or_create(
+            name=event_fields['name'],
+            start_date=event_fields['start_date'],
+            end_date=event_fields['end_date'],
+            defaults={
+                'level': event_fields['level'],
+                'is_first_time': event_fields['is_first_time'],
+            }
+        )
+
+        if not participants:
+            return event, event_created, 0, 0
+
+        # Последняя строка студента определяет группу, роль и часы. Студенты
+        # сравниваются по нормализованному ФИО («иванов  иван» = «Иванов Иван»)
+        keys = [normalize_name(full_name) for full_name, _, _, _ in participants]
+        first_names = {}
+        latest = {}
+        for key, (full_name, group, role, hours) in zip(keys, participants):
+            # Нового студента записываем так, как он впервые встретился в файле
+            first_names.setdefault(key, full_name)
+            latest[key] = (group, role, hours)
+
+        if students is None:
+            students = StudentIndex()
+        if roles is None:
+            roles = RoleRule.normalizer()
+        by_key = students.resolve({key: (first_names[key], values[0]) for key, values in latest.items()})
+
+        # Какие участия уже были в базе до загрузки листа: студент → часы
+        existing = dict(
+            Participation.objects.filter(
+                event=event,
+                student_id__in=[s.pk for s in by_key.values()],
+            ).values_list('student_id', 'hours')
+        )
+
+        created_count = 0
+        updated_count = 0
+        seen = set(existing)
+        for key in keys:
+            student_id = by_key[key].pk
+            if student_id in seen:
+                updated_count += 1
+            else:
+                created_count += 1
+                seen.add(student_id)
+
+        Participation.objects.bulk_create(
+            [
+                Participation(
+                    student=by_key[key], event=event, role=role, role_normalized=roles(role), hours=hours,
+                )
+                for key, (_, role, hours) in latest.items()
+            ],
+            update_conflicts=True,
+            unique_fields=['student', 'event'],
+            update_fields=['role', 'role_normalized', 'hours'],
+        )
+        # bulk_create не отправляет сигналы — версию отчётов, сводку часов и индекс поиска обновляем сами
+        bump_data_version(by_key[key].pk for key in latest)
+        search.index(
+            'participation',
+            Participation.objects.filter(event=event, student_id__in=[by_key[key].pk for key in latest]),
+        )
+        bucket = bucket_of(event.level, event.start_date)
+        deltas = {}
+        for key, (_, _, hours) in latest.items():
+            student_id = by_key[key].pk
+            if student_id in existing:
+                add_delta(deltas, student_id, bucket, hours - existing[student_id], 0)
+            else:
+                add_delta(deltas, student_id, bucket, hours, 1)
+        apply_deltas(deltas)
+
+    return event, event_created, created_count, updated_count
+
+
+class StudentIndex:
+    """
+    Студенты в памяти по нормализованному ФИО (Student.name_key). На каждом листе из
+    базы одним запросом по индексу name_key дочитываются только ещё не встречавшиеся
+    в файле ключи, а не вся таблица студентов; созданные при загрузке студенты
+    добавляются в индекс сразу, так что повторный поиск — обращение к словарю.
+    """
+
+    def __init__(self):
+        self._students = {}
+        # Ключи, уже искавшиеся в базе (в том числе не найденные — их создал resolve)
+        self._loaded = set()
+
+    def reset(self):
+        """Сбрасывает индекс: после отката транзакции листа он мог устареть."""
+        self._students = {}
+        self._loaded = set()
+
+    def _load(self, keys):
+        keys = [key for key in keys if key not in self._loaded]
+        if not keys:
+            return
+        students = Student.objects.filter(name_key__in=keys).only('id', 'full_name', 'group', 'name_key')
+        for student in students.order_by('pk'):
+            # При дублях в базе берём самую раннюю запись
+            self._students.setdefault(student.name_key, student)
+        self._loaded.update(keys)
+
+    def resolve(self, rows_by_key):
+        """
+        rows_by_key — {ключ: (ФИО как в файле, группа)}. Создаёт недостающих студентов
+        одним запросом, обновляет изменившиеся группы. Возвращает {ключ: Student}.
+        """
+        self._load(rows_by_key)
+
+        found = {}
+        changed = []
+        missing = []
+        for key, (full_name, group) in rows_by_key.items():
+            student = self._students.get(key)
+            if student is None:
+                missing.append(Student(full_name=full_name, group=group, name_key=key))
+                continue
+            if student.group != group:
+                student.group = group
+                changed.append(student)
+            found[key] = student
+
+        if changed:
+            Student.objects.bulk_update(changed, ['group'])
+            search.index_pks('student', [student.pk for student in changed])
+
+        if missing:
+            created = Student.objects.bulk_create(missing)
+            if any(student.pk is None for student in created):
+                # База не вернула первичные ключи — дочитываем созданных по индексу
+                created = Student.objects.filter(name_key__in=[s.name_key for s in missing]).order_by('pk')
+            for student in created:
+                self._students.setdefault(student.name_key, student)
+                found.setdefault(student.name_key, student)
+            search.index_pks('student', [student.pk for student in created])
+
+        return found
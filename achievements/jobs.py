@@ -0,0 +1,234 @@
+"""
+Очередь фоновых загрузок Excel.
+
+Веб-запрос только сохраняет файл в ImportJob, а разбор и запись в базу выполняет
+воркер (manage.py process_imports). Прогресс пишется в задачу после каждого листа
+и отдаётся JSON-эндпоинтом статуса. Задачи, брошенные упавшим воркером, возвращает
+в очередь recover_stale_jobs().
+"""
+import io
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .importer import import_workbook, validate_workbook
+from .models import ImportJob
+from .readers import sheet_names
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_FIELDS = [
+    'sheets_done', 'success_sheets', 'unchanged_sheets', 'events_created',
+    'participations_created', 'participations_updated',
+    'sheet_results', 'error_sheets',
+]
+
+STALE_ERROR = 'Воркер не завершил загрузку за {attempts} попыток'
+
+
+class JobLost(Exception):
+    """Задачу вернули в очередь или взял другой воркер — этот воркер её бросает."""
+
+
+def create_job(uploaded_file, user=None, force=False, dry_run=False):
+    """Ставит загруженный файл в очередь и сразу возвращает задачу."""
+    return ImportJob.objects.create(
+        file_name=uploaded_file.name,
+        force=force,
+        dry_run=dry_run,
+        data=uploaded_file.read(),
+        created_by=user if user is not None and user.is_authenticated else None,
+    )
+
+
+def claim_next_job():
+    """
+    Забирает самую старую задачу из очереди. Захват — условный UPDATE по статусу,
+    поэтому несколько воркеров не возьмут одну задачу. None, если очередь пуста.
+    """
+    pending = ImportJob.objects.filter(status=ImportJob.STATUS_PENDING).order_by('created_at')
+    for pk in pending.values_list('pk', flat=True)[:10]:
+        now = timezone.now()
+        claimed = ImportJob.objects.filter(pk=pk, status=ImportJob.STATUS_PENDING).update(
+            status=ImportJob.STATUS_RUNNING,
+            started_at=now,
+            heartbeat_at=now,
+            attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return ImportJob.objects.get(pk=pk)
+    return None
+
+
+def recover_stale_jobs(timeout=None, max_attempts=None):
+    """
+    Возвращает в очередь задачи, застрявшие в работе: взявший их воркер не
+    отмечался дольше timeout секунд (упал, был убит или перезапущен посреди файла).
+    Задача, не завершённая за max_attempts попыток, вместо этого помечается ошибкой,
+    чтобы файл, роняющий воркер, не брался снова и снова.
+    Возвращает (число возвращённых в очередь, число помеченных ошибкой).
+    """
+    if timeout is None:
+        timeout = settings.ACHIEVEMENTS_IMPORT_STALE_SECONDS
+    if max_attempts is None:
+        max_attempts = settings.ACHIEVEMENTS_IMPORT_MAX_ATTEMPTS
+    now = timezone.now()
+    deadline = now - timedelta(seconds=timeout)
+    stale = ImportJob.objects.filter(status=ImportJob.STATUS_RUNNING).filter(
+        Q(heartbeat_at__lt=deadline) | Q(heartbeat_at__isnull=True, started_at__lt=deadline)
+    )
+    # Условный UPDATE по статусу и отметке: задачу, которую воркер успел отметить
+    # или завершить, не трогаем
+    failed = stale.filter(attempts__gte=max_attempts).update(
+        status=ImportJob.STATUS_FAILED,
+        error=STALE_ERROR.format(attempts=max_attempts),
+        finished_at=now,
+        data=b'',
+    )
+    requeued = stale.filter(attempts__lt=max_attempts).update(
+        status=ImportJob.STATUS_PENDING,
+        started_at=None,
+        heartbeat_at=None,
+        sheets_done=0, success_sheets=0, unchanged_sheets=0, events_created=0,
+        participations_created=0, participations_updated=0, sheet_results=[], error_sheets=[],
+    )
+    return requeued, failed
+
+
+def update_job(job, **fields):
+    """
+    Пишет поля задачи, только если она всё ещё за этим воркером: в работе и с той же
+    попыткой (recover_stale_jobs мог вернуть её в очередь, а другой воркер — взять).
+    False, если задача уже не его.
+    """
+    return bool(
+        ImportJob.objects.filter(pk=job.pk, status=ImportJob.STATUS_RUNNING, attempts=job.attempts)
+        .update(**fields)
+    )
+
+
+class Heartbeat:
+    """
+    Поток, который отмечает задачу каждые interval секунд (по умолчанию — треть
+    ACHIEVEMENTS_IMPORT_STALE_SECONDS), пока воркер её обрабатывает: при разборе в
+    пуле процессов прогресс приходит только после целой части листов.
+    """
+
+    def __init__(self, job, interval=None):
+        self.job = job
+        self.interval = interval if interval is not None else settings.ACHIEVEMENTS_IMPORT_STALE_SECONDS / 3
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f'import-heartbeat-{job.pk}', daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        try:
+            while not self._stop.wait(self.interval):
+                try:
+                    update_job(self.job, heartbeat_at=timezone.now())
+                except Exception:
+                    # Пропущенная отметка не страшна: следующая будет через interval
+                    logger.exception('Не удалось отметить загрузку #%s', self.job.pk)
+        finally:
+            connection.close()
+
+
+def run_job(job, workers=None):
+    """
+    Обрабатывает файл задачи, сохраняя прогресс после каждого листа.
+    workers — число процессов для разбора листов (по умолчанию из настроек).
+    JobLost — если задачу, пока она обрабатывалась, отдали другому воркеру
+    (её поля тогда не перезаписываются).
+    """
+    file = io.BytesIO(bytes(job.data))
+    try:
+        job.sheets_total = len(sheet_names(file))
+    except Exception:
+        # Ошибку чтения сообщит сам импорт
+        pass
+    if not update_job(job, sheets_total=job.sheets_total, heartbeat_at=timezone.now()):
+        raise JobLost()
+
+    lost = False
+
+    def on_sheet(result):
+        nonlocal lost
+        _copy_progress(job, result)
+        progress = {field: getattr(job, field) for field in PROGRESS_FIELDS}
+        if not update_job(job, heartbeat_at=timezone.now(), **progress):
+            # Прерывает загрузку: оставшиеся листы загрузит тот, кто взял задачу
+            lost = True
+            raise JobLost()
+
+    with Heartbeat(job):
+        if job.dry_run:
+            result = validate_workbook(file, on_sheet=on_sheet, workers=workers)
+            job.report = result.reports
+        else:
+            result = import_workbook(file, on_sheet=on_sheet, workers=workers, force=job.force)
+    if lost:
+        raise JobLost()
+
+    _copy_progress(job, result)
+    job.sheets_total = max(job.sheets_total, result.total_sheets)
+    job.error = result.read_error or ''
+    job.status = ImportJob.STATUS_FAILED if result.read_error else ImportJob.STATUS_DONE
+    job.finished_at = timezone.now()
+    job.data = b''
+    finished = update_job(
+        job, **{field: getattr(job, field) for field in PROGRESS_FIELDS},
+        sheets_total=job.sheets_total, error=job.error, status=job.status, finished_at=job.finished_at,
+        data=job.data, report=job.report,
+    )
+    if not finished:
+        raise JobLost()
+    return result
+
+
+def _copy_progress(job, result):
+    job.sheets_done = result.total_sheets
+    job.success_sheets = result.success_sheets
+    job.unchanged_sheets = result.unchanged_sheets
+    job.events_created = result.events_created
+    job.participations_created = result.participations_created
+    job.participations_updated = result.participations_updated
+    job.sheet_results = result.sheet_results
+    job.error_sheets = result.error_sheets
+
+
+def job_status(job):
+    """Состояние задачи для JSON-эндпоинта."""
+    return {
+        'id': job.pk,
+        'file_name': job.file_name,
+        'status': job.status,
+        'status_display': job.get_status_display(),
+        'dry_run': job.dry_run,
+        'created_at': job.created_at.isoformat(),
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+        'attempts': job.attempts,
+        'sheets_total': job.sheets_total,
+        'sheets_done': job.sheets_done,
+        'success_sheets': job.success_sheets,
+        'unchanged_sheets': job.unchanged_sheets,
+        'events_created': job.events_created,
+        'participations_created': job.participations_created,
+        'participations_updated': job.participations_updated,
+        'sheet_results': job.sheet_results,
+        'error_sheets': job.error_sheets,
+        'error': job.error,
+        'report': job.report,
+    }
@@ -0,0 +1,41 @@
+import shutil
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from achievements.reporting.batch import FORMAT_PDF, FORMAT_ZIP, render_batch
+from achievements.reporting.data import batch_report_data
+
+
+class Command(BaseCommand):
+    help = 'Формирует PDF-отчёты по группе (или по всем студентам) за период: ZIP или один PDF с закладками'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='date_from', required=True, type=date.fromisoformat,
+                            help='Начало периода, ГГГГ-ММ-ДД')
+        parser.add_argument('--to', dest='date_to', required=True, type=date.fromisoformat,
+                            help='Конец периода, ГГГГ-ММ-ДД')
+        parser.add_argument('--group', help='Группа (курс); по умолчанию все студенты')
+        parser.add_argument('--format', dest='output_format', choices=[FORMAT_ZIP, FORMAT_PDF], default=FORMAT_ZIP)
+        parser.add_argument(
+            '--workers', type=int, default=None,
+            help='Процессов для отчётов в ZIP (по умолчанию ACHIEVEMENTS_REPORT_WORKERS)',
+        )
+        parser.add_argument('--output', '-o', required=True, help='Файл результата')
+
+    def handle(self, *args, **options):
+        date_from, date_to = options['date_from'], options['date_to']
+        if date_from > date_to:
+            raise CommandError('Начало периода позже конца')
+
+        group = options['group']
+        reports = batch_report_data(date_from, date_to, group)
+        if not reports:
+            raise CommandError('За выбранный период участий не найдено')
+
+        title = f"Отчёты: {group or 'все студенты'}, {date_from:%d.%m.%Y} - {date_to:%d.%m.%Y}"
+        data = render_batch(reports, date_from, date_to, options['output_format'], options['workers'], title=title)
+        with open(options['output'], 'wb') as out:
+            shutil.copyfileobj(data, out)
+
+        self.stdout.write(self.style.SUCCESS(f'Отчётов: {len(reports)}, файл: {options["output"]}'))
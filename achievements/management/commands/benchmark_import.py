@@ -0,0 +1,68 @@
+import json
+import os
+import tempfile
+
+from django.core.management.base import BaseCommand
+
+from achievements.benchmark import generate_workbook, run_benchmark, temporary_database
+
+
+class Command(BaseCommand):
+    help = (
+        'Замер загрузки Excel на синтетическом файле во временной базе: строк в секунду, '
+        'число SQL-запросов, время фаз (чтение, разбор, запись) и пиковая память'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sheets', type=int, default=20, help='Листов в файле')
+        parser.add_argument('--rows', type=int, default=200, help='Строк участников на листе')
+        parser.add_argument('--duplicates', type=float, default=0.5,
+                            help='Доля строк с уже встречавшимися студентами (0..1)')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--workers', type=int, default=1, help='Процессов для разбора листов')
+        parser.add_argument('--reader', choices=['openpyxl', 'pandas'], default='openpyxl')
+        parser.add_argument('--file', help='Взять готовый файл вместо синтетического')
+        parser.add_argument('--json', action='store_true', help='Вывести метрики в JSON')
+
+    def handle(self, *args, **options):
+        path = options['file']
+        generated = None
+        if not path:
+            fd, generated = tempfile.mkstemp(suffix='.xlsx')
+            os.close(fd)
+            path = generated
+            rows = generate_workbook(
+                path, sheets=options['sheets'], rows=options['rows'],
+                duplicate_ratio=options['duplicates'], seed=options['seed'],
+            )
+            self.stderr.write(f'Сгенерирован файл: {options["sheets"]} листов, {rows} строк участников')
+
+        try:
+            with temporary_database():
+                metrics = run_benchmark(path, workers=options['workers'], reader=options['reader'])
+        finally:
+            if generated:
+                os.unlink(generated)
+
+        metrics.update(workers=options['workers'], reader=options['reader'])
+        if options['json']:
+            self.stdout.write(json.dumps(metrics, indent=2))
+            return
+
+        self.stdout.write(
+            f'Листов: {metrics["sheets"]} (с ошибками: {metrics["sheet_errors"]}), '
+            f'участников: {metrics["participants"]}, строк прочитано: {metrics["rows_read"]}\n'
+            f'Чтение:   {metrics["read_seconds"]:.3f} с\n'
+            f'Разбор:   {metrics["parse_seconds"]:.3f} с (процессов: {metrics["workers"]})\n'
+            + (
+                f'Чтение и разбор: {metrics["read_parse_seconds"]:.3f} с параллельно, '
+                f'{metrics["read_parse_serial_seconds"]:.3f} с без пула — ускорение '
+                f'{metrics["parallel_speedup"]:.2f}× (процессоров: {metrics["cpus"]})\n'
+                if 'parallel_speedup' in metrics else ''
+            ) +
+            f'Запись:   {metrics["write_seconds"]:.3f} с, SQL-запросов: {metrics["queries"]}, '
+            f'в базе: {metrics["db_seconds"]:.3f} с\n'
+            f'Итого:    {metrics["total_seconds"]:.3f} с, {metrics["rows_per_second"]:.0f} строк/с\n'
+            f'Повторная загрузка: {metrics["reupload_seconds"]:.3f} с, SQL-запросов: {metrics["reupload_queries"]}\n'
+            f'Пиковая память: {metrics["peak_rss_mb"]:.0f} МБ (дочерние процессы: {metrics["peak_rss_children_mb"]:.0f} МБ)'
+        )
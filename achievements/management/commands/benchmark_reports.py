@@ -0,0 +1,66 @@
+import json
+import os
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from achievements.benchmark import prepare_report_load_data, run_report_load_test, temporary_database
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочная проверка PDF-отчётов во временной базе SQLite: одновременные запросы '
+        'к gunicorn с синхронными (WSGI) и асинхронными (ASGI) воркерами — общее время, '
+        'время отчёта и время лёгких запросов, пока отчёты строятся'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', choices=['wsgi', 'asgi', 'both'], default='both')
+        parser.add_argument('--concurrency', type=int, default=8, help='Одновременных запросов отчёта')
+        parser.add_argument('--rows', type=int, default=300, help='Участий в отчёте')
+        parser.add_argument('--workers', type=int, default=1, help='Воркеров gunicorn')
+        parser.add_argument('--offload-workers', type=int, default=2,
+                            help='Процессов вёрстки PDF в каждом воркере (ACHIEVEMENTS_OFFLOAD_WORKERS)')
+        parser.add_argument('--queue', type=int, default=None,
+                            help='Мест в очереди пула (ACHIEVEMENTS_OFFLOAD_QUEUE), по умолчанию — --concurrency')
+        parser.add_argument('--json', action='store_true', help='Вывести метрики в JSON')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Команда создаёт временную базу SQLite и запускается только с SQLite')
+
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'load.sqlite3')
+        # Временная база в файле: её открывает и запущенный gunicorn
+        try:
+            with temporary_database(path):
+                student_id, cookie, csrf_token = prepare_report_load_data(options['rows'])
+                connection.close()
+                modes = ['wsgi', 'asgi'] if options['mode'] == 'both' else [options['mode']]
+                results = [
+                    run_report_load_test(
+                        mode, f'sqlite:///{path}', student_id, cookie, csrf_token,
+                        concurrency=options['concurrency'], workers=options['workers'],
+                        offload_workers=options['offload_workers'], queue=options['queue'],
+                    )
+                    for mode in modes
+                ]
+        finally:
+            os.rmdir(directory)
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        for result in results:
+            self.stdout.write(
+                f'{result["mode"].upper()}: воркеров {result["workers"]}, процессов вёрстки {result["offload_workers"]}, '
+                f'одновременных отчётов {result["concurrency"]}\n'
+                f'Один отчёт:        {result["single_report_seconds"]:.3f} с\n'
+                f'Все отчёты:        {result["total_seconds"]:.3f} с '
+                f'(успешно {result["report_ok"]}, 503: {result["report_busy"]})\n'
+                f'Время отчёта:      медиана {result["report_p50_seconds"]:.3f} с, максимум {result["report_max_seconds"]:.3f} с\n'
+                f'Лёгкий запрос:     без нагрузки {result["light_idle_seconds"]:.3f} с, под нагрузкой медиана '
+                f'{result["light_p50_seconds"]:.3f} с, максимум {result["light_max_seconds"]:.3f} с\n'
+            )
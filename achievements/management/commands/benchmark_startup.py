@@ -0,0 +1,50 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from achievements.benchmark import run_startup_benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        'Замер старта gunicorn: время до первого ответа и до запуска всех воркеров, '
+        'память мастера и каждого воркера (RSS, PSS, собственная) — без --preload и с ним'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2, help='Воркеров gunicorn')
+        parser.add_argument('--mode', choices=['lazy', 'preload', 'both'], default='both',
+                            help='lazy — без --preload, preload — с --preload и warm_up()')
+        parser.add_argument('--path', default='/admin/login/', help='Адрес первого запроса')
+        parser.add_argument('--timeout', type=float, default=60, help='Ожидание ответа, сек')
+        parser.add_argument('--json', action='store_true', help='Вывести метрики в JSON')
+
+    def handle(self, *args, **options):
+        modes = [False, True] if options['mode'] == 'both' else [options['mode'] == 'preload']
+        results = [
+            run_startup_benchmark(
+                workers=options['workers'], preload=preload, path=options['path'], timeout=options['timeout'],
+            )
+            for preload in modes
+        ]
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        for result in results:
+            self.stdout.write(
+                f'{"--preload" if result["preload"] else "без --preload"}, воркеров: {result["workers"]}\n'
+                f'Первый ответ:   {result["first_response_seconds"]:.3f} с\n'
+                f'Все воркеры:    {result["all_workers_seconds"]:.3f} с'
+            )
+            if result['master'] is None:
+                self.stdout.write('Память: недоступна (нужен /proc/<pid>/smaps_rollup)\n')
+                continue
+            self.stdout.write(f'Мастер:         {self._memory(result["master"])}')
+            for idx, memory in enumerate(result['worker_memory'], 1):
+                self.stdout.write(f'Воркер {idx}:       {self._memory(memory)}')
+            total_pss = result['master']['pss_mb'] + sum(memory['pss_mb'] for memory in result['worker_memory'])
+            self.stdout.write(f'Всего (PSS):    {total_pss:.1f} МБ\n')
+
+    def _memory(self, memory):
+        return f'RSS {memory["rss_mb"]:.1f} МБ, PSS {memory["pss_mb"]:.1f} МБ, собственная {memory["private_mb"]:.1f} МБ'
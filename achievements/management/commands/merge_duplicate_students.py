@@ -0,0 +1,93 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from achievements import search
+from achievements.models import Student, Participation
+from achievements.parsing import normalize_name
+from achievements.signals import bump_data_version
+from achievements.summary import rebuild as rebuild_summary
+
+
+class Command(BaseCommand):
+    help = (
+        'Сливает студентов с одинаковым нормализованным ФИО в самую раннюю запись '
+        'и переносит на неё их участия'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Только показать, что будет слито')
+
+    def handle(self, *args, **options):
+        # Ключи считаются заново: они могли устареть, если ФИО меняли в обход save()
+        stale = []
+        groups = {}
+        for student in Student.objects.only('id', 'full_name', 'group', 'name_key').order_by('pk'):
+            key = normalize_name(student.full_name)
+            if student.name_key != key:
+                student.name_key = key
+                stale.append(student)
+            groups.setdefault(key, []).append(student)
+        groups = {key: students for key, students in groups.items() if len(students) > 1}
+
+        with transaction.atomic():
+            if stale and not options['dry_run']:
+                Student.objects.bulk_update(stale, ['name_key'], batch_size=1000)
+
+            if not groups:
+                self.stdout.write('Дубликатов не найдено')
+                return
+
+            keep_by_id = {}
+            updated_groups = []
+            for students in groups.values():
+                keep = students[0]
+                for duplicate in students[1:]:
+                    keep_by_id[duplicate.pk] = keep
+                    self.stdout.write(f'«{duplicate.full_name}» (#{duplicate.pk}) → «{keep.full_name}» (#{keep.pk})')
+                # Пустую группу основной записи заполняем последней известной
+                if not keep.group:
+                    keep.group = next((s.group for s in reversed(students) if s.group), '')
+                    if keep.group:
+                        updated_groups.append(keep)
+
+            # Занятые пары (студент, мероприятие) у основных записей
+            taken = set(
+                Participation.objects.filter(student__in={keep.pk for keep in keep_by_id.values()})
+                .values_list('student_id', 'event_id')
+            )
+            move_ids = []
+            drop_ids = []
+            duplicate_parts = (
+                Participation.objects.filter(student_id__in=list(keep_by_id))
+                .order_by('pk').values_list('pk', 'student_id', 'event_id')
+            )
+            for pk, student_id, event_id in duplicate_parts:
+                target = (keep_by_id[student_id].pk, event_id)
+                if target in taken:
+                    # У основной записи уже есть участие в этом мероприятии
+                    drop_ids.append(pk)
+                else:
+                    taken.add(target)
+                    move_ids.append((pk, target[0]))
+
+            self.stdout.write(
+                f'Студентов к слиянию: {len(keep_by_id)}, участий к переносу: {len(move_ids)}, '
+                f'совпадающих участий к удалению: {len(drop_ids)}'
+            )
+            if options['dry_run']:
+                return
+
+            Participation.objects.filter(pk__in=drop_ids).delete()
+            parts = [Participation(pk=pk, student_id=student_id) for pk, student_id in move_ids]
+            Participation.objects.bulk_update(parts, ['student'], batch_size=1000)
+            # bulk_update не отправляет сигналы: отчёты, сводка часов основных записей
+            # и документы поиска перенесённых участий изменились
+            bump_data_version({keep.pk for keep in keep_by_id.values()})
+            search.index_pks('participation', [pk for pk, _ in move_ids])
+            if updated_groups:
+                Student.objects.bulk_update(updated_groups, ['group'])
+                search.index_pks('student', [keep.pk for keep in updated_groups])
+            Student.objects.filter(pk__in=list(keep_by_id)).delete()
+            rebuild_summary({keep.pk for keep in keep_by_id.values()})
+
+        self.stdout.write(self.style.SUCCESS('Слияние завершено'))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from achievements import search
+from achievements.models import Participation, RoleRule
+from achievements.signals import bump_data_version
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает текст ролей для отчётов (Participation.role_normalized) по текущим правилам RoleRule'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Только посчитать изменения')
+
+    def handle(self, *args, **options):
+        normalize = RoleRule.normalizer()
+        changed = []
+        parts = Participation.objects.only('id', 'student_id', 'role', 'role_normalized').order_by('pk')
+        for part in parts.iterator(chunk_size=2000):
+            role_normalized = normalize(part.role)
+            if part.role_normalized != role_normalized:
+                part.role_normalized = role_normalized
+                changed.append(part)
+
+        self.stdout.write(f'Участий с изменившейся ролью: {len(changed)}')
+        if options['dry_run'] or not changed:
+            return
+
+        with transaction.atomic():
+            Participation.objects.bulk_update(changed, ['role_normalized'], batch_size=1000)
+            # bulk_update не отправляет сигналы: отчёты этих студентов и документы поиска изменились
+            bump_data_version({part.student_id for part in changed})
+            search.index_pks('participation', [part.pk for part in changed])
+        self.stdout.write(self.style.SUCCESS('Роли пересчитаны'))
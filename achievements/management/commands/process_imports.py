@@ -0,0 +1,53 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from achievements import metrics
+from achievements.jobs import JobLost, claim_next_job, recover_stale_jobs, run_job, update_job
+
+
+class Command(BaseCommand):
+    help = 'Обрабатывает очередь фоновых загрузок Excel (ImportJob)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Обработать очередь и выйти')
+        parser.add_argument(
+            '--workers', type=int, default=None,
+            help='Число процессов для разбора листов (по умолчанию ACHIEVEMENTS_IMPORT_WORKERS)',
+        )
+        parser.add_argument('--interval', type=float, default=2.0, help='Пауза между опросами очереди, сек')
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            requeued, failed = recover_stale_jobs()
+            if requeued or failed:
+                self.stderr.write(
+                    f'Брошенных загрузок возвращено в очередь: {requeued}, помечено ошибкой: {failed}'
+                )
+            job = claim_next_job()
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+                continue
+
+            self.stdout.write(f'Загрузка #{job.pk}: {job.file_name}')
+            try:
+                result = run_job(job, workers=options['workers'])
+            except JobLost:
+                self.stderr.write(f'Загрузка #{job.pk} возвращена в очередь, пока выполнялась; прервана')
+                continue
+            except Exception as e:
+                update_job(job, status=job.STATUS_FAILED, error=str(e), finished_at=timezone.now())
+                self.stderr.write(f'Загрузка #{job.pk} завершилась ошибкой: {e}')
+                continue
+            finally:
+                # Метрики загрузки сразу видны в /metrics, не дожидаясь следующей
+                metrics.maybe_flush(force=True)
+            self.stdout.write(
+                f'Загрузка #{job.pk}: листов {result.success_sheets} из {result.total_sheets}, '
+                f'ошибок {len(result.error_sheets)}'
+            )
@@ -0,0 +1,16 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from achievements.summary import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Полностью пересчитывает сводку часов (HoursSummary) по таблице участий'
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        rows = rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Сводка пересчитана: {rows} строк за {time.perf_counter() - started:.2f} с'
+        ))
@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from achievements.search import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает полнотекстовый индекс студентов, мероприятий и участий'
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        counts = rebuild()
+        if not counts:
+            self.stdout.write(self.style.WARNING('База не поддерживает полнотекстовый индекс: поиск идёт через icontains'))
+            return
+        documents = ', '.join(f'{kind}: {count}' for kind, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(
+            f'Индекс перестроен ({documents}) за {time.perf_counter() - started:.2f} с'
+        ))
@@ -0,0 +1,223 @@
+"""
+Метрики производительности в формате Prometheus (эндпоинт /metrics).
+
+Все метрики — гистограммы: запросы к представлениям (время ответа, число SQL-
+запросов, время в базе, размер ответа — см. middleware.MetricsMiddleware) и этапы
+загрузки Excel и построения PDF (span()).
+
+Значения копятся в памяти процесса. Если задан ACHIEVEMENTS_METRICS_DIR, каждый
+процесс (воркеры gunicorn, process_imports) не чаще раза в FLUSH_INTERVAL секунд
+сохраняет туда свой снимок, а /metrics складывает снимки всех процессов — так
+видны и загрузки, которые выполняет отдельный процесс. Снимки, не обновлявшиеся
+STALE_SECONDS, удаляются (счётчики гистограмм при этом уменьшаются — Prometheus
+считает это сбросом, как при перезапуске процесса).
+
+Процессы пула offload снимков не пишут: значения каждой задачи забирает drain()
+и передаёт вместе с результатом в процесс веб-сервера (merge()).
+"""
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from django.conf import settings
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+QUERIES_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000)
+BYTES_BUCKETS = (1_000, 10_000, 100_000, 1_000_000, 10_000_000, 100_000_000)
+
+# Имя → (описание, границы корзин)
+METRICS = {
+    'achievements_request_duration_seconds': ('Время ответа представления', SECONDS_BUCKETS),
+    'achievements_request_db_queries': ('SQL-запросов за запрос', QUERIES_BUCKETS),
+    'achievements_request_db_seconds': ('Время SQL-запросов за запрос', SECONDS_BUCKETS),
+    'achievements_response_size_bytes': ('Размер ответа', BYTES_BUCKETS),
+    'achievements_span_duration_seconds': ('Время этапов загрузки Excel и построения PDF', SECONDS_BUCKETS),
+}
+
+FLUSH_INTERVAL = 5
+STALE_SECONDS = 24 * 60 * 60
+
+_lock = threading.Lock()
+# (имя, метки) → [счётчики корзин..., сумма, число наблюдений]
+_values = {}
+_last_flush = 0.0
+_keep_local = False
+
+
+def _reset():
+    global _last_flush
+    _values.clear()
+    _last_flush = 0.0
+
+
+# Дочерний процесс (пул пакетных отчётов, воркер gunicorn после preload) не должен
+# повторно выгрузить значения родителя под своим pid
+os.register_at_fork(after_in_child=_reset)
+
+
+def observe(name, value, **labels):
+    """Добавляет наблюдение value в гистограмму name с метками labels."""
+    buckets = METRICS[name][1]
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        entry = _values.get(key)
+        if entry is None:
+            entry = _values[key] = [0] * (len(buckets) + 2)
+        idx = bisect_left(buckets, value)
+        if idx < len(buckets):
+            entry[idx] += 1
+        entry[-2] += value
+        entry[-1] += 1
+    maybe_flush()
+
+
+@contextmanager
+def span(name):
+    """Замер этапа: with span('import_write'): ... → achievements_span_duration_seconds{span=...}."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe('achievements_span_duration_seconds', time.perf_counter() - started, span=name)
+
+
+class QueryCounter:
+    """Считает SQL-запросы и время в базе (без хранения текста запросов)."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+def keep_local():
+    """Не сохранять снимки текущего процесса: его значения забирает drain()."""
+    global _keep_local
+    _keep_local = True
+
+
+def _directory():
+    # В процессе пула, запущенном без Django (spawn/forkserver), снимок не пишется
+    if _keep_local or not settings.configured:
+        return ''
+    return str(getattr(settings, 'ACHIEVEMENTS_METRICS_DIR', '') or '')
+
+
+def _snapshot_path(directory):
+    return os.path.join(directory, f'{socket.gethostname()}-{os.getpid()}.json')
+
+
+def _snapshot():
+    with _lock:
+        return [[name, list(labels), list(entry)] for (name, labels), entry in _values.items()]
+
+
+def drain():
+    """Значения процесса в виде снимка; сами значения очищаются (см. merge())."""
+    with _lock:
+        snapshot = [[name, list(labels), list(entry)] for (name, labels), entry in _values.items()]
+        _values.clear()
+    return snapshot
+
+
+def merge(snapshot):
+    """Добавляет к значениям процесса снимок drain() из другого процесса."""
+    with _lock:
+        for name, labels, entry in snapshot:
+            total = _values.setdefault((name, tuple(tuple(pair) for pair in labels)), [0] * len(entry))
+            for idx, value in enumerate(entry):
+                total[idx] += value
+    maybe_flush()
+
+
+def maybe_flush(force=False):
+    """Сохраняет снимок процесса в ACHIEVEMENTS_METRICS_DIR (не чаще FLUSH_INTERVAL)."""
+    global _last_flush
+    directory = _directory()
+    now = time.monotonic()
+    if not directory or (not force and now - _last_flush < FLUSH_INTERVAL):
+        return
+    _last_flush = now
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as out:
+            json.dump(_snapshot(), out)
+        os.replace(tmp_path, _snapshot_path(directory))
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def collect():
+    """Значения всех процессов (или только текущего без ACHIEVEMENTS_METRICS_DIR)."""
+    directory = _directory()
+    if not directory:
+        snapshots = [_snapshot()]
+    else:
+        maybe_flush(force=True)
+        snapshots = []
+        stale_before = time.time() - STALE_SECONDS
+        with os.scandir(directory) as it:
+            for entry in it:
+                if not entry.name.endswith('.json'):
+                    continue
+                try:
+                    if entry.stat().st_mtime < stale_before:
+                        os.unlink(entry.path)
+                        continue
+                    with open(entry.path) as f:
+                        snapshots.append(json.load(f))
+                except (FileNotFoundError, ValueError):
+                    # Файл удалён или перезаписан другим процессом во время чтения
+                    continue
+
+    merged = {}
+    for snapshot in snapshots:
+        for name, labels, entry in snapshot:
+            if name not in METRICS:
+                continue
+            key = (name, tuple(tuple(pair) for pair in labels))
+            total = merged.setdefault(key, [0] * len(entry))
+            for idx, value in enumerate(entry):
+                total[idx] += value
+    return merged
+
+
+def _labels(pairs):
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return ','.join(f'{key}="{escape(value)}"' for key, value in pairs)
+
+
+def render_prometheus():
+    """Текст для /metrics в формате Prometheus text exposition 0.0.4."""
+    merged = collect()
+    lines = []
+    for name, (help_text, buckets) in METRICS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} histogram')
+        for (metric, labels), entry in sorted(merged.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(buckets, entry):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{_labels(labels + (("le", bound),))}}} {cumulative}')
+            lines.append(f'{name}_bucket{{{_labels(labels + (("le", "+Inf"),))}}} {entry[-1]}')
+            label_text = f'{{{_labels(labels)}}}' if labels else ''
+            lines.append(f'{name}_sum{label_text} {entry[-2]}')
+            lines.append(f'{name}_count{label_text} {entry[-1]}')
+    return '\n'.join(lines) + '\n'
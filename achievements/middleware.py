@@ -0,0 +1,141 @@
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# Запрос, SQL которого сейчас считаются. Под ASGI запросы к базе выполняются в
+# потоках sync_to_async с собственными подключениями; переменная контекста
+# переходит туда вместе с запросом, поэтому счётчик ставится на подключения один
+# раз (install_query_counter), а запрос выбирается по контексту
+_current_record = ContextVar('achievements_request_record', default=None)
+
+
+def count_query(execute, sql, params, many, context):
+    record = _current_record.get()
+    if record is None:
+        return execute(sql, params, many, context)
+    return record.queries(execute, sql, params, many, context)
+
+
+def install_query_counter(connection, **kwargs):
+    if count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_query)
+
+
+# Подключения, которые откроются в других потоках (sync_to_async под ASGI)
+connection_created.connect(install_query_counter)
+
+
+class MetricsMiddleware:
+    """
+    Для каждого запроса записывает в metrics время ответа, число SQL-запросов, время
+    в базе и размер ответа с меткой представления (имя URL: upload, report,
+    admin:…). Медленные запросы (дольше ACHIEVEMENTS_SLOW_REQUEST_SECONDS) — в лог.
+
+    Потоковые ответы (выгрузка CSV) замеряются до отдачи последней порции: их
+    запросы к базе выполняются уже после выхода из представления. Работает и в
+    синхронной цепочке middleware (WSGI), и в асинхронной (ASGI) — без перехода
+    между потоком и циклом событий.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        record = RequestRecord(request)
+        with record.counting():
+            response = self.get_response(request)
+        return record.measure(response)
+
+    async def __acall__(self, request):
+        record = RequestRecord(request)
+        with record.counting():
+            response = await self.get_response(request)
+        return record.measure(response)
+
+
+class RequestRecord:
+    """Замер одного запроса: счётчик SQL на всех подключениях и размер ответа."""
+
+    def __init__(self, request):
+        self.request = request
+        self.started = time.perf_counter()
+        self.queries = metrics.QueryCounter()
+        self.size = 0
+
+    @contextmanager
+    def counting(self):
+        # Подключения текущего потока могли быть открыты раньше, чем загружен модуль;
+        # само подключение к базе при этом не открывается
+        for connection in connections.all():
+            install_query_counter(connection)
+        token = _current_record.set(self)
+        try:
+            yield
+        finally:
+            _current_record.reset(token)
+
+    def measure(self, response):
+        """Завершает замер по ответу; потоковый ответ — после отдачи последней порции."""
+        if response.streaming and not response.has_header('Content-Length'):
+            if response.is_async:
+                response.streaming_content = self.astream(response.streaming_content)
+            else:
+                response.streaming_content = self.stream(response.streaming_content)
+        else:
+            self.size = int(response.get('Content-Length') or 0) if response.streaming else len(response.content)
+            self.finish()
+        return response
+
+    def stream(self, content):
+        try:
+            with self.counting():
+                for chunk in content:
+                    self.size += len(chunk)
+                    yield chunk
+        finally:
+            self.finish()
+
+    async def astream(self, content):
+        try:
+            with self.counting():
+                async for chunk in content:
+                    self.size += len(chunk)
+                    yield chunk
+        finally:
+            self.finish()
+
+    def view_name(self):
+        match = self.request.resolver_match
+        return match.view_name if match is not None else 'unresolved'
+
+    def finish(self):
+        seconds = time.perf_counter() - self.started
+        view = self.view_name()
+        metrics.observe('achievements_request_duration_seconds', seconds, view=view, method=self.request.method)
+        metrics.observe('achievements_request_db_queries', self.queries.count, view=view)
+        metrics.observe('achievements_request_db_seconds', self.queries.seconds, view=view)
+        metrics.observe('achievements_response_size_bytes', self.size, view=view)
+
+        threshold = getattr(settings, 'ACHIEVEMENTS_SLOW_REQUEST_SECONDS', 0)
+        if threshold and seconds > threshold:
+            logger.warning(
+                'Медленный запрос %s %s (%s): %.2f с, SQL-запросов %d (%.2f с), ответ %d байт',
+                self.request.method, self.request.get_full_path(), view,
+                seconds, self.queries.count, self.queries.seconds, self.size,
+            )
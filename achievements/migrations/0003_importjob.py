@@ -0,0 +1,43 @@
+# Generated by Django 6.0.2 on 2026-10-18 13:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('achievements', '0002_alter_event_level'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_name', models.CharField(max_length=255, verbose_name='Файл')),
+                ('data', models.BinaryField(blank=True, default=b'', verbose_name='Содержимое файла')),
+                ('status', models.CharField(choices=[('pending', 'В очереди'), ('running', 'Выполняется'), ('done', 'Завершена'), ('failed', 'Ошибка')], default='pending', max_length=20, verbose_name='Статус')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Создана')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Начата')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Завершена')),
+                ('sheets_total', models.PositiveIntegerField(default=0, verbose_name='Листов всего')),
+                ('sheets_done', models.PositiveIntegerField(default=0, verbose_name='Листов обработано')),
+                ('success_sheets', models.PositiveIntegerField(default=0, verbose_name='Листов без ошибок')),
+                ('events_created', models.PositiveIntegerField(default=0, verbose_name='Создано мероприятий')),
+                ('participations_created', models.PositiveIntegerField(default=0, verbose_name='Добавлено участий')),
+                ('participations_updated', models.PositiveIntegerField(default=0, verbose_name='Обновлено участий')),
+                ('sheet_results', models.JSONField(blank=True, default=list, verbose_name='Результаты по листам')),
+                ('error_sheets', models.JSONField(blank=True, default=list, verbose_name='Ошибки на листах')),
+                ('error', models.TextField(blank=True, default='', verbose_name='Ошибка')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Загрузил')),
+            ],
+            options={
+                'verbose_name': 'Загрузка',
+                'verbose_name_plural': 'Загрузки',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 6.0.2 on 2026-10-18 13:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('achievements', '0003_importjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='force',
+            field=models.BooleanField(default=False, verbose_name='Загружать неизменные листы'),
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='unchanged_sheets',
+            field=models.PositiveIntegerField(default=0, verbose_name='Листов без изменений'),
+        ),
+        migrations.CreateModel(
+            name='SheetFingerprint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sheet_name', models.CharField(max_length=255, verbose_name='Лист')),
+                ('content_hash', models.CharField(max_length=64, verbose_name='Хеш содержимого')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Обновлён')),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='achievements.event', verbose_name='Мероприятие')),
+            ],
+            options={
+                'verbose_name': 'Отпечаток листа',
+                'verbose_name_plural': 'Отпечатки листов',
+                'indexes': [models.Index(fields=['sheet_name', 'content_hash'], name='achievement_sheet_n_e539b6_idx')],
+                'unique_together': {('sheet_name', 'event')},
+            },
+        ),
+    ]
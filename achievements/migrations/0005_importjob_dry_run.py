@@ -0,0 +1,23 @@
+# Generated by Django 6.0.2 on 2026-10-18 13:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('achievements', '0004_sheetfingerprint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='dry_run',
+            field=models.BooleanField(default=False, verbose_name='Пробная загрузка (без записи в базу)'),
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='report',
+            field=models.JSONField(blank=True, default=list, verbose_name='Отчёт проверки'),
+        ),
+    ]
@@ -0,0 +1,96 @@
+# Generated by Django 6.0.2 on 2026-10-18 13:10
+
+import logging
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+logger = logging.getLogger(__name__)
+
+
+def merge_duplicate_events(apps, schema_editor):
+    """
+    Перед уникальным ограничением на (name, start_date, end_date) сливает дубли
+    мероприятий в самое раннее. Участия переносятся; если у студента уже есть
+    участие в оставляемом мероприятии, участия сливаются в одно (роли
+    объединяются, часы — наибольшие) и слияние пишется в журнал.
+    """
+    Event = apps.get_model('achievements', 'Event')
+    Participation = apps.get_model('achievements', 'Participation')
+    SheetFingerprint = apps.get_model('achievements', 'SheetFingerprint')
+
+    duplicates = (
+        Event.objects.values('name', 'start_date', 'end_date')
+        .annotate(count=Count('id'), keep_id=Min('id'))
+        .filter(count__gt=1)
+    )
+    for dup in duplicates:
+        others = Event.objects.filter(
+            name=dup['name'], start_date=dup['start_date'], end_date=dup['end_date'],
+        ).exclude(pk=dup['keep_id'])
+        kept = {part.student_id: part for part in Participation.objects.filter(event_id=dup['keep_id'])}
+        for part in Participation.objects.filter(event__in=others).order_by('pk'):
+            target = kept.get(part.student_id)
+            if target is None:
+                part.event_id = dup['keep_id']
+                part.save(update_fields=['event'])
+                kept[part.student_id] = part
+                continue
+            roles = [target.role] if target.role else []
+            if part.role and part.role not in roles:
+                roles.append(part.role)
+            role = ', '.join(roles)[:200]
+            hours = max(target.hours, part.hours)
+            logger.warning(
+                'Участие #%s студента #%s в дубле мероприятия #%s слито с участием #%s '
+                '(роль «%s» → «%s», часы %s → %s)',
+                part.pk, part.student_id, part.event_id, target.pk, target.role, role, target.hours, hours,
+            )
+            if (role, hours) != (target.role, target.hours):
+                target.role, target.hours = role, hours
+                target.save(update_fields=['role', 'hours'])
+            part.delete()
+        SheetFingerprint.objects.filter(event__in=others).delete()
+        others.delete()
+
+    # В PostgreSQL проверки внешних ключей отложены до конца транзакции, а таблицу
+    # с отложенными проверками нельзя изменять (AddConstraint ниже упал бы с
+    # «pending trigger events») — выполняем их сейчас
+    schema_editor.connection.check_constraints()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('achievements', '0005_importjob_dry_run'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='participation',
+            unique_together=set(),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['start_date'], name='event_start_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='importjob',
+            index=models.Index(fields=['status', 'created_at'], name='importjob_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['full_name'], name='student_full_name_idx'),
+        ),
+        migrations.RunPython(merge_duplicate_events, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='event',
+            constraint=models.UniqueConstraint(fields=('name', 'start_date', 'end_date'), name='event_name_dates_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='participation',
+            constraint=models.UniqueConstraint(fields=('student', 'event'), name='participation_student_event_uniq'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 6.0.2 on 2026-10-18 13:11
+
+import re
+
+from django.db import migrations, models
+
+
+def fill_name_keys(apps, schema_editor):
+    """Заполняет name_key существующих студентов (копия parsing.normalize_name)."""
+    Student = apps.get_model('achievements', 'Student')
+    students = list(Student.objects.only('id', 'full_name'))
+    for student in students:
+        student.name_key = re.sub(r'\s+', ' ', student.full_name.casefold().replace('ё', 'е')).strip()
+    Student.objects.bulk_update(students, ['name_key'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('achievements', '0006_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='student',
+            name='name_key',
+            field=models.CharField(default='', editable=False, max_length=200, verbose_name='Ключ ФИО'),
+        ),
+        migrations.RunPython(fill_name_keys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['name_key'], name='student_name_key_idx'),
+        ),
+    ]
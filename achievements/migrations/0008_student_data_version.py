@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-18 15:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('achievements', '0007_student_name_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='student',
+            name='data_version',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Версия данных'),
+        ),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 6.0.2 on 2026-10-18 15:40
+
+import re
+
+from django.db import migrations, models
+
+# Правила, которые раньше были зашиты в отчёт (порядок важен)
+INITIAL_RULES = [
+    ('главныйорганизатор', 'главный организатор', False),
+    ('главныйорган', 'главный организатор', False),
+    ('организатор(отв.', 'организатор (отв.', False),
+    ('отв.за', 'отв. за', False),
+    ('отдельныйблок', 'отдельный блок', False),
+    ('тех.части', 'тех. части', False),
+    ('и.т.п.', 'и т.п.', False),
+    # Пробел после точки, если его нет
+    (r'(?i)\.([а-яa-z])', r'. \1', True),
+]
+
+
+def create_rules(apps, schema_editor):
+    RoleRule = apps.get_model('achievements', 'RoleRule')
+    RoleRule.objects.bulk_create([
+        RoleRule(order=(idx + 1) * 10, pattern=pattern, replacement=replacement, is_regex=is_regex)
+        for idx, (pattern, replacement, is_regex) in enumerate(INITIAL_RULES)
+    ])
+
+
+def fill_role_normalized(apps, schema_editor):
+    """Заполняет role_normalized существующих участий (копия roles.RoleNormalizer)."""
+    RoleRule = apps.get_model('achievements', 'RoleRule')
+    Participation = apps.get_model('achievements', 'Participation')
+    rules = [
+        (re.compile(pattern) if is_regex else pattern, replacement)
+        for pattern, replacement, is_regex in
+        RoleRule.objects.order_by('order', 'pk').values_list('pattern', 'replacement', 'is_regex')
+    ]
+
+    def normalize(role):
+        role = role.strip()
+        for pattern, replacement in rules:
+            role = role.replace(pattern, replacement) if isinstance(pattern, str) else pattern.sub(replacement, role)
+        return ' '.join(role.split())
+
+    parts = list(Participation.objects.only('id', 'role'))
+    for part in parts:
+        part.role_normalized = normalize(part.role)
+    Participation.objects.bulk_update(parts, ['role_normalized'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('achievements', '0008_student_data_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoleRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('order', models.PositiveIntegerField(default=0, verbose_name='Порядок')),
+                ('pattern', models.CharField(max_length=200, verbose_name='Что заменить')),
+                ('replacement', models.CharField(blank=True, default='', max_length=200, verbose_name='На что')),
+                ('is_regex', models.BooleanField(default=False, help_text='Иначе шаблон ищется как обычный текст. Группы в замене: \\1, \\2…', verbose_name='Регулярное выражение')),
+            ],
+            options={
+                'verbose_name': 'Правило для ролей',
+                'verbose_name_plural': 'Правила для ролей',
+                'ordering': ['order', 'pk'],
+            },
+        ),
+        migrations.AddField(
+            model_name='participation',
+            name='role_normalized',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='Роль для отчёта'),
+        ),
+        migrations.RunPython(create_rules, migrations.RunPython.noop),
+        migrations.RunPython(fill_role_normalized, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 6.0.2 on 2026-10-18 16:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Case, Count, IntegerField, Q, Sum, Value, When
+from django.db.models.functions import ExtractYear
+
+
+def fill_summary(apps, schema_editor):
+    """Заполняет сводку по существующим участиям (копия summary.summary_rows)."""
+    Participation = apps.get_model('achievements', 'Participation')
+    HoursSummary = apps.get_model('achievements', 'HoursSummary')
+    year = ExtractYear('event__start_date')
+    autumn = Q(event__start_date__month__gte=9)
+    rows = (
+        Participation.objects.order_by()
+        .annotate(
+            academic_year=Case(When(autumn, then=year), default=year - 1, output_field=IntegerField()),
+            term=Case(
+                When(autumn | Q(event__start_date__month=1), then=Value(1)),
+                default=Value(2),
+                output_field=IntegerField(),
+            ),
+        )
+        .values_list('student_id', 'event__level', 'academic_year', 'term')
+        .annotate(hours=Sum('hours'), count=Count('id'))
+    )
+    HoursSummary.objects.bulk_create(
+        [
+            HoursSummary(student_id=student_id, level=level, academic_year=academic_year, term=term,
+                         hours=hours, count=count)
+            for student_id, level, academic_year, term, hours, count in rows
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('achievements', '0009_role_rules'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HoursSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('level', models.CharField(choices=[('course', 'Курсовой'), ('faculty', 'Факультетский'), ('interfaculty', 'Межфакультетский'), ('university', 'Университетский'), ('interuniversity', 'Межуниверситетский'), ('regional', 'Региональный'), ('interregional', 'Межрегиональный'), ('all_russian', 'Всероссийский'), ('international', 'Международный'), ('chemistry_day', 'День химика'), ('cabbage', 'Капустник'), ('dedication', 'Посвящение в химики')], max_length=30, verbose_name='Уровень')),
+                ('academic_year', models.PositiveSmallIntegerField(verbose_name='Учебный год (начало)')),
+                ('term', models.PositiveSmallIntegerField(choices=[(1, 'Осенний'), (2, 'Весенний')], verbose_name='Семестр')),
+                ('hours', models.PositiveIntegerField(default=0, verbose_name='Часы')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Участий')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='achievements.student', verbose_name='Студент')),
+            ],
+            options={
+                'verbose_name': 'Сводка часов',
+                'verbose_name_plural': 'Сводка часов',
+                'indexes': [models.Index(fields=['academic_year', 'term'], name='hourssummary_semester_idx')],
+                'constraints': [models.UniqueConstraint(fields=('student', 'level', 'academic_year', 'term'), name='hourssummary_bucket_uniq')],
+            },
+        ),
+        migrations.RunPython(fill_summary, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.2 on 2026-10-18 17:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('achievements', '0010_hours_summary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['group'], name='student_group_idx'),
+        ),
+    ]
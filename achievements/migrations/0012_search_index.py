@@ -0,0 +1,73 @@
+# Generated by Django 6.0.2 on 2026-10-18 17:40
+
+import re
+
+from django.db import migrations
+
+# Копия search.DOCUMENT_FIELDS и таблиц search.backends на момент миграции
+DOCUMENT_FIELDS = {
+    'student': ('Student', ('full_name', 'group')),
+    'event': ('Event', ('name',)),
+    'participation': ('Participation', ('student__full_name', 'event__name', 'role', 'role_normalized')),
+}
+
+BATCH_SIZE = 500
+
+
+def normalize(text):
+    """Копия parsing.normalize_name."""
+    return re.sub(r'\s+', ' ', text.casefold().replace('ё', 'е')).strip()
+
+
+def create_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor not in ('sqlite', 'postgresql'):
+        # Поиск на других базах работает через icontains
+        return
+
+    with connection.cursor() as cursor:
+        for kind, (model_name, fields) in DOCUMENT_FIELDS.items():
+            table = f'achievements_search_{kind}'
+            if connection.vendor == 'sqlite':
+                cursor.execute(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} "
+                    f"USING fts5(body, tokenize = 'unicode61 remove_diacritics 2')"
+                )
+                insert = f'INSERT INTO {table} (rowid, body) VALUES (%s, %s)'
+            else:
+                cursor.execute(
+                    f'CREATE TABLE IF NOT EXISTS {table} (id bigint PRIMARY KEY, document tsvector NOT NULL)'
+                )
+                cursor.execute(f'CREATE INDEX IF NOT EXISTS {table}_document_idx ON {table} USING gin (document)')
+                insert = (
+                    f"INSERT INTO {table} (id, document) VALUES (%s, to_tsvector('russian', %s)) "
+                    f"ON CONFLICT (id) DO UPDATE SET document = EXCLUDED.document"
+                )
+
+            model = apps.get_model('achievements', model_name)
+            rows = model.objects.using(connection.alias).order_by().values_list('pk', *fields)
+            documents = [
+                (pk, normalize(' '.join(dict.fromkeys(value for value in values if value))))
+                for pk, *values in rows.iterator(chunk_size=2000)
+            ]
+            for start in range(0, len(documents), BATCH_SIZE):
+                cursor.executemany(insert, documents[start:start + BATCH_SIZE])
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor not in ('sqlite', 'postgresql'):
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for kind in DOCUMENT_FIELDS:
+            cursor.execute(f'DROP TABLE IF EXISTS achievements_search_{kind}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('achievements', '0011_student_group_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 6.0.2 on 2026-10-18 18:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def create_version(apps, schema_editor):
+    DataVersion = apps.get_model('achievements', 'DataVersion')
+    DataVersion.objects.create(pk=1, version=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('achievements', '0012_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField(default=0, verbose_name='Версия')),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Изменены')),
+            ],
+            options={
+                'verbose_name': 'Версия данных',
+                'verbose_name_plural': 'Версия данных',
+            },
+        ),
+        migrations.RunPython(create_version, migrations.RunPython.noop),
+    ]
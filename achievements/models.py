@@ -1,17 +1,48 @@
+import re
+import time
+
+from django.conf import settings
 from django.db import models
+from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator
+from django.utils import timezone
+
+from .parsing import normalize_name
+from .roles import RoleNormalizer
 
 class Student(models.Model):
     """Студент / волонтёр"""
     full_name = models.CharField(max_length=200, verbose_name="ФИО")
     group = models.CharField(max_length=50, verbose_name="Группа (курс)", blank=True, default="")
+    # Нормализованное ФИО (см. parsing.normalize_name) — по нему загрузка находит студентов
+    name_key = models.CharField(max_length=200, verbose_name="Ключ ФИО", editable=False, default="")
+    # Растёт при любом изменении данных отчёта студента (см. signals) — часть ключа кэша отчётов
+    data_version = models.PositiveIntegerField(verbose_name="Версия данных", editable=False, default=0)
 
     def __str__(self):
         return f"{self.full_name} ({self.group})" if self.group else self.full_name
 
+    def save(self, *args, **kwargs):
+        self.name_key = normalize_name(self.full_name)
+        update_fields = kwargs.get('update_fields')
+        bump_version = not self._state.adding and (update_fields is None or 'full_name' in update_fields)
+        if bump_version:
+            # Версия увеличивается в базе: копия в памяти могла устареть
+            self.data_version = models.F('data_version') + 1
+        if update_fields is not None and 'full_name' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'name_key', 'data_version'}
+        super().save(*args, **kwargs)
+        if bump_version:
+            self.refresh_from_db(fields=['data_version'])
+
     class Meta:
         verbose_name = "Студент"
         verbose_name_plural = "Студенты"
+        indexes = [
+            models.Index(fields=['full_name'], name='student_full_name_idx'),
+            models.Index(fields=['name_key'], name='student_name_key_idx'),
+            models.Index(fields=['group'], name='student_group_idx'),
+        ]
 
 
 class Event(models.Model):
@@ -43,6 +74,11 @@ class Event(models.Model):
     class Meta:
         verbose_name = "Мероприятие"
         verbose_name_plural = "Мероприятия"
+        constraints = [
+            # Естественный ключ мероприятия — по нему его находит загрузка Excel
+            models.UniqueConstraint(fields=['name', 'start_date', 'end_date'], name='event_name_dates_uniq'),
+        ]
+        indexes = [models.Index(fields=['start_date'], name='event_start_date_idx')]
 
 
 class Participation(models.Model):
@@ -50,12 +86,211 @@ class Participation(models.Model):
     student = models.ForeignKey(Student, on_delete=models.CASCADE, verbose_name="Студент")
     event = models.ForeignKey(Event, on_delete=models.CASCADE, verbose_name="Мероприятие")
     role = models.CharField(max_length=200, verbose_name="Роль", blank=True, default="")
+    # Роль после правил RoleRule — в таком виде она выводится в отчётах
+    role_normalized = models.TextField(verbose_name="Роль для отчёта", editable=False, blank=True, default="")
     hours = models.PositiveIntegerField(verbose_name="Часы", validators=[MinValueValidator(1)])
 
     def __str__(self):
         return f"{self.student} - {self.event} ({self.hours} ч.)"
 
+    def save(self, *args, **kwargs):
+        self.role_normalized = RoleRule.cached_normalizer()(self.role)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'role' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'role_normalized'}
+        super().save(*args, **kwargs)
+
     class Meta:
         verbose_name = "Участие"
         verbose_name_plural = "Участия"
-        unique_together = ('student', 'event')
\ No newline at end of file
+        constraints = [
+            # Индекс (student, event) обслуживает и выборку участий студента для отчёта
+            models.UniqueConstraint(fields=['student', 'event'], name='participation_student_event_uniq'),
+        ]
+
+
+class HoursSummary(models.Model):
+    """
+    Часы студента по уровню мероприятий за семестр — сводка для аналитики.
+    Поддерживается загрузкой и сигналами (см. summary.py), полностью
+    пересчитывается командой rebuild_hours_summary.
+    """
+    TERM_AUTUMN = 1
+    TERM_SPRING = 2
+    TERM_CHOICES = [
+        (TERM_AUTUMN, 'Осенний'),
+        (TERM_SPRING, 'Весенний'),
+    ]
+
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, verbose_name="Студент")
+    level = models.CharField(max_length=30, choices=Event.LEVEL_CHOICES, verbose_name="Уровень")
+    academic_year = models.PositiveSmallIntegerField(verbose_name="Учебный год (начало)")
+    term = models.PositiveSmallIntegerField(choices=TERM_CHOICES, verbose_name="Семестр")
+    hours = models.PositiveIntegerField(default=0, verbose_name="Часы")
+    count = models.PositiveIntegerField(default=0, verbose_name="Участий")
+
+    def __str__(self):
+        return f"{self.student}: {self.get_level_display()}, {self.academic_year}/{self.academic_year + 1} {self.get_term_display()} — {self.hours} ч."
+
+    class Meta:
+        verbose_name = "Сводка часов"
+        verbose_name_plural = "Сводка часов"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['student', 'level', 'academic_year', 'term'], name='hourssummary_bucket_uniq',
+            ),
+        ]
+        indexes = [models.Index(fields=['academic_year', 'term'], name='hourssummary_semester_idx')]
+
+
+class DataVersion(models.Model):
+    """
+    Версия данных студентов, мероприятий и участий целиком — из неё API (api.py)
+    строит ETag и Last-Modified. Одна строка; растёт вместе с версиями отчётов
+    студентов (signals.bump_data_version).
+    """
+    version = models.PositiveBigIntegerField(default=0, verbose_name="Версия")
+    updated_at = models.DateTimeField(default=timezone.now, verbose_name="Изменены")
+
+    @classmethod
+    def current(cls):
+        """(версия, время изменения) одним запросом."""
+        return cls.objects.filter(pk=1).values_list('version', 'updated_at').first() or (0, None)
+
+    @classmethod
+    def bump(cls):
+        # Увеличивается в базе, без чтения: строку одновременно меняют другие процессы
+        if not cls.objects.filter(pk=1).update(version=models.F('version') + 1, updated_at=timezone.now()):
+            cls.objects.get_or_create(pk=1, defaults={'version': 1})
+
+    class Meta:
+        verbose_name = "Версия данных"
+        verbose_name_plural = "Версия данных"
+
+
+# Сколько секунд процесс использует загруженные правила ролей (см. RoleRule.cached_normalizer)
+ROLE_RULES_TTL = 60
+
+# (время загрузки, RoleNormalizer)
+_role_normalizer = None
+
+
+class RoleRule(models.Model):
+    """Правило исправления текста роли (применяются по порядку при записи участия)"""
+    order = models.PositiveIntegerField(default=0, verbose_name="Порядок")
+    pattern = models.CharField(max_length=200, verbose_name="Что заменить")
+    replacement = models.CharField(max_length=200, verbose_name="На что", blank=True, default="")
+    is_regex = models.BooleanField(
+        default=False, verbose_name="Регулярное выражение",
+        help_text="Иначе шаблон ищется как обычный текст. Группы в замене: \\1, \\2…",
+    )
+
+    def __str__(self):
+        return f"{self.pattern} → {self.replacement}"
+
+    def clean(self):
+        if self.is_regex:
+            try:
+                re.compile(self.pattern)
+            except re.error as exc:
+                raise ValidationError({'pattern': f'Ошибка в регулярном выражении: {exc}'})
+
+    @classmethod
+    def normalizer(cls):
+        """Нормализатор по текущим правилам (один запрос)."""
+        return RoleNormalizer(cls.objects.order_by('order', 'pk').values_list('pattern', 'replacement', 'is_regex'))
+
+    @classmethod
+    def cached_normalizer(cls):
+        """
+        Нормализатор, общий для процесса, — для записи отдельных участий. Сбрасывается
+        сигналами при изменении правил в этом процессе; правила, изменённые в другом
+        процессе, подхватываются не позже чем через ROLE_RULES_TTL секунд.
+        """
+        global _role_normalizer
+        cached = _role_normalizer
+        if cached is not None and time.monotonic() - cached[0] < ROLE_RULES_TTL:
+            return cached[1]
+        normalizer = cls.normalizer()
+        _role_normalizer = (time.monotonic(), normalizer)
+        return normalizer
+
+    @classmethod
+    def clear_cached_normalizer(cls):
+        global _role_normalizer
+        _role_normalizer = None
+
+    class Meta:
+        verbose_name = "Правило для ролей"
+        verbose_name_plural = "Правила для ролей"
+        ordering = ['order', 'pk']
+
+
+class SheetFingerprint(models.Model):
+    """Хеш содержимого листа, загруженного в мероприятие (для пропуска неизменных листов)"""
+    sheet_name = models.CharField(max_length=255, verbose_name="Лист")
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, verbose_name="Мероприятие")
+    content_hash = models.CharField(max_length=64, verbose_name="Хеш содержимого")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Обновлён")
+
+    def __str__(self):
+        return f"{self.sheet_name} → {self.event}"
+
+    class Meta:
+        verbose_name = "Отпечаток листа"
+        verbose_name_plural = "Отпечатки листов"
+        unique_together = ('sheet_name', 'event')
+        indexes = [models.Index(fields=['sheet_name', 'content_hash'])]
+
+
+class ImportJob(models.Model):
+    """Фоновая загрузка Excel-файла с участиями"""
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'В очереди'),
+        (STATUS_RUNNING, 'Выполняется'),
+        (STATUS_DONE, 'Завершена'),
+        (STATUS_FAILED, 'Ошибка'),
+    ]
+
+    file_name = models.CharField(max_length=255, verbose_name="Файл")
+    # Содержимое файла хранится в базе, чтобы воркер мог работать на другой машине;
+    # после обработки очищается
+    data = models.BinaryField(verbose_name="Содержимое файла", blank=True, default=b"")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING, verbose_name="Статус")
+    force = models.BooleanField(default=False, verbose_name="Загружать неизменные листы")
+    dry_run = models.BooleanField(default=False, verbose_name="Пробная загрузка (без записи в базу)")
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, verbose_name="Загрузил"
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Создана")
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="Начата")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Завершена")
+    # Воркер отмечается здесь после каждого листа; задача в работе без отметки дольше
+    # ACHIEVEMENTS_IMPORT_STALE_SECONDS считается брошенной (воркер упал или был убит)
+    heartbeat_at = models.DateTimeField(null=True, blank=True, verbose_name="Последняя отметка воркера")
+    attempts = models.PositiveIntegerField(default=0, verbose_name="Попыток")
+
+    sheets_total = models.PositiveIntegerField(default=0, verbose_name="Листов всего")
+    sheets_done = models.PositiveIntegerField(default=0, verbose_name="Листов обработано")
+    success_sheets = models.PositiveIntegerField(default=0, verbose_name="Листов без ошибок")
+    unchanged_sheets = models.PositiveIntegerField(default=0, verbose_name="Листов без изменений")
+    events_created = models.PositiveIntegerField(default=0, verbose_name="Создано мероприятий")
+    participations_created = models.PositiveIntegerField(default=0, verbose_name="Добавлено участий")
+    participations_updated = models.PositiveIntegerField(default=0, verbose_name="Обновлено участий")
+    sheet_results = models.JSONField(default=list, blank=True, verbose_name="Результаты по листам")
+    error_sheets = models.JSONField(default=list, blank=True, verbose_name="Ошибки на листах")
+    error = models.TextField(blank=True, default="", verbose_name="Ошибка")
+    report = models.JSONField(default=list, blank=True, verbose_name="Отчёт проверки")
+
+    def __str__(self):
+        return f"{self.file_name} ({self.get_status_display()})"
+
+    class Meta:
+        verbose_name = "Загрузка"
+        verbose_name_plural = "Загрузки"
+        ordering = ['-created_at']
+        indexes = [models.Index(fields=['status', 'created_at'], name='importjob_status_created_idx')]
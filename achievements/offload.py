@@ -0,0 +1,180 @@
+"""
+Пул для тяжёлых по процессору задач веб-запросов — вёрстки PDF-отчётов.
+
+Асинхронное представление отдаёт задачу в пул и ждёт её, не занимая цикл событий
+(ASGI): пока reportlab верстает один отчёт, остальные запросы воркера
+обслуживаются. Задача выполняется в процессе пула, а не в потоке — вёрстка почти
+не отпускает GIL, и потоки одного процесса выполняли бы её по очереди.
+
+Пул ограничен: ACHIEVEMENTS_OFFLOAD_WORKERS процессов и не больше
+ACHIEVEMENTS_OFFLOAD_QUEUE задач в очереди сверх них. Когда заняты все места,
+run() сразу выбрасывает Saturated, и представление отвечает 503 с Retry-After
+(busy_response()), а не копит запросы, ответа на которые клиент не дождётся.
+
+Пул создаётся один на процесс веб-сервера — при первой задаче или заранее, в
+post_fork gunicorn (start()), пока у воркера нет потоков. Процессы пула живут до
+конца воркера и повторно используют загруженный reportlab и шрифт. При
+ACHIEVEMENTS_OFFLOAD_WORKERS = 0 задачи выполняются по одной в потоке текущего
+процесса (с тем же ограничением очереди).
+"""
+import asyncio
+import os
+import signal
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.module_loading import import_string
+
+from . import metrics
+
+RETRY_AFTER_SECONDS = 5
+
+_lock = threading.Lock()
+# (число процессов, пул) — пул пересоздаётся при смене настройки
+_pool = None
+_pending = 0
+
+
+class Saturated(Exception):
+    """Заняты все процессы пула и места в очереди."""
+
+
+def _reset():
+    global _pool, _pending
+    _pool = None
+    _pending = 0
+
+
+# Пул родителя (и его счётчик) не переходит в дочерний процесс: воркеру gunicorn
+# после preload нужен свой
+os.register_at_fork(after_in_child=_reset)
+
+
+def _workers():
+    return settings.ACHIEVEMENTS_OFFLOAD_WORKERS
+
+
+def _init_process():
+    # Процесс пула наследует обработчики сигналов воркера gunicorn — возвращаем
+    # стандартные, чтобы он завершался вместе с воркером
+    for signum in (signal.SIGTERM, signal.SIGHUP, signal.SIGQUIT, signal.SIGUSR1, signal.SIGUSR2):
+        signal.signal(signum, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    metrics.keep_local()
+
+
+def _executor(workers):
+    global _pool
+    with _lock:
+        if _pool is None or _pool[0] != workers:
+            if _pool is not None:
+                _pool[1].shutdown(wait=False)
+            if workers > 0:
+                executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_process)
+            else:
+                executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='offload')
+            _pool = (workers, executor)
+        return _pool[1]
+
+
+def _discard(executor):
+    global _pool
+    with _lock:
+        if _pool is not None and _pool[1] is executor:
+            _pool = None
+
+
+def _release(future=None):
+    global _pending
+    with _lock:
+        _pending -= 1
+
+
+def start():
+    """Создаёт пул и запускает его процессы (до первого запроса и до потоков воркера)."""
+    if _workers() > 0:
+        _executor(_workers()).submit(int).result()
+
+
+async def run(func, *args):
+    """
+    Выполняет func(*args) в пуле и возвращает результат, не занимая цикл событий.
+    func и args должны сериализоваться pickle. Saturated — если мест нет.
+    """
+    global _pending
+    workers = _workers()
+    with _lock:
+        if _pending >= max(workers, 1) + settings.ACHIEVEMENTS_OFFLOAD_QUEUE:
+            raise Saturated()
+        _pending += 1
+
+    executor = _executor(workers)
+    try:
+        future = executor.submit(func, *args)
+    except BrokenProcessPool:
+        # Процесс пула погиб (например, от нехватки памяти) — следующая задача создаст новый пул
+        _discard(executor)
+        _release()
+        raise
+    except BaseException:
+        _release()
+        raise
+    # Место освобождается, когда задача завершена в пуле, а не когда перестали
+    # ждать её результат (клиент мог отключиться)
+    future.add_done_callback(_release)
+    try:
+        return await asyncio.wrap_future(future)
+    except BrokenProcessPool:
+        _discard(executor)
+        raise
+
+
+def _render(func_path, args):
+    fd, path = tempfile.mkstemp(suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            import_string(func_path)(out, *args)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return path
+
+
+def _render_in_process(func_path, args):
+    # В родителя передаются путь к файлу с результатом и метрики задачи
+    try:
+        return _render(func_path, args), metrics.drain()
+    except BaseException:
+        metrics.drain()
+        raise
+
+
+async def render_to_file(func_path, *args):
+    """
+    Выполняет func(out, *args) в пуле и возвращает временный файл с тем, что func
+    записала в out, открытый для чтения с начала. func передаётся путём для
+    import_string: модуль с reportlab загружается в процессе пула, а не в воркере.
+    """
+    if _workers() > 0:
+        path, values = await run(_render_in_process, func_path, args)
+        metrics.merge(values)
+    else:
+        path = await run(_render, func_path, args)
+    out = open(path, 'rb')
+    # Открытый файл остаётся доступен до закрытия (ответ закроет его после отдачи)
+    os.unlink(path)
+    return out
+
+
+def busy_response():
+    """503 для запроса, которому не хватило места в пуле."""
+    response = HttpResponse(
+        'Сервер занят построением других отчётов, повторите запрос через несколько секунд',
+        status=503, content_type='text/plain; charset=utf-8',
+    )
+    response['Retry-After'] = str(RETRY_AFTER_SECONDS)
+    return response
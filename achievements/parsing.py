@@ -0,0 +1,433 @@
+"""
+Разбор листов Excel с участиями в нормализованные записи.
+
+Модуль не обращается к базе и не импортирует модели Django, поэтому листы можно
+разбирать в отдельных процессах, а сам разбор — вызывать и замерять без запроса и
+без настроенного Django. Шаблоны и таблицы соответствий собираются один раз при
+импорте модуля. Запись разбора листа — словарь:
+
+    {
+        'event': {'name', 'level', 'start_date', 'end_date', 'is_first_time'},
+        'participants': [(full_name, group, role, hours), ...],
+    }
+"""
+import hashlib
+import itertools
+import json
+import os
+import re
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import lru_cache
+
+from .readers import iter_sheets, sheet_names, cell
+
+# Заголовки блока мероприятия: подстрока в заголовке столбца -> поле
+HEADER_KEYS = (
+    ('название мероприятия', 'name'),
+    ('уровень', 'level'),
+    ('даты проведения', 'dates'),
+    ('впервые', 'first_time'),
+    ('организовано', 'first_time'),
+)
+
+# Уровень мероприятия: первая найденная подстрока определяет код (порядок важен)
+LEVEL_TABLE = (
+    ('факультетский', 'faculty'),
+    ('курсовой', 'course'),
+    ('университетский', 'university'),
+    ('межфакультетский', 'university'),
+    ('межуниверситетский', 'interuniversity'),
+    ('региональный', 'interuniversity'),
+    ('всероссийский', 'all_russian'),
+    ('межрегиональный', 'all_russian'),
+    ('день химика', 'chemistry_day'),
+    ('капустник', 'cabbage'),
+    ('посвящение в химики', 'dedication'),
+)
+
+FIRST_TIME_VALUES = frozenset(['да', 'yes', '1', 'true'])
+
+DATE_RE = re.compile(r'\d{1,2}\.\d{1,2}\.\d{4}')
+NON_DIGITS_RE = re.compile(r'[^\d]')
+WHITESPACE_RE = re.compile(r'\s+')
+DATE_FORMAT = '%d.%m.%Y'
+
+# Наибольшее число часов — предел PositiveIntegerField (Participation.hours) в PostgreSQL
+MAX_HOURS = 2147483647
+
+
+def parse_workbook(file, reader, workers=1, validate=False, on_timing=None):
+    """
+    Генератор (имя_листа, запись, ошибка) в порядке листов файла. Ошибка листа —
+    строка с описанием (запись тогда None); ошибка чтения самого файла пробрасывается.
+    С validate=True вместо записи отдаётся отчёт проверки (см. validate_sheet).
+
+    При workers > 1 листы делятся на workers подряд идущих частей, и части
+    разбираются параллельно в пуле процессов: каждый процесс открывает файл один
+    раз и читает только свои листы (книга не загружается заново на каждый лист).
+
+    on_timing(этап, секунды) получает длительность этапов для метрик: 'read' —
+    открытие книги и переход к листу, 'parse' — чтение строк и разбор одного листа
+    (в пуле процессов — время в дочернем процессе).
+    """
+    def timed(phase, started):
+        if on_timing is not None:
+            on_timing(phase, time.perf_counter() - started)
+
+    if workers <= 1:
+        sheets = iter_sheets(file, reader)
+        while True:
+            started = time.perf_counter()
+            item = next(sheets, None)
+            timed('read', started)
+            if item is None:
+                return
+            sheet_name, rows = item
+            started = time.perf_counter()
+            result = _parse_or_error(rows, validate)
+            timed('parse', started)
+            yield (sheet_name,) + result
+
+    started = time.perf_counter()
+    names = sheet_names(file)
+    path, is_temp = _file_path(file)
+    timed('read', started)
+    workers = min(workers, len(names) or 1)
+    size = -(-len(names) // workers) if names else 0
+    chunks = [names[start:start + size] for start in range(0, len(names), size or 1)]
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(
+                parse_sheets_from_file,
+                [path] * len(chunks), chunks, [reader] * len(chunks), [validate] * len(chunks),
+            )
+            for chunk, chunk_results in zip(chunks, results):
+                for sheet_name, (record, error, seconds) in zip(chunk, chunk_results):
+                    if on_timing is not None:
+                        on_timing('parse', seconds)
+                    yield sheet_name, record, error
+    finally:
+        if is_temp:
+            os.unlink(path)
+
+
+def parse_sheets_from_file(path, names, reader, validate=False):
+    """
+    Задача для пула процессов: открывает файл один раз и разбирает листы names.
+    Возвращает список (запись, ошибка, секунды) в порядке names.
+    """
+    results = {}
+    sheets = iter_sheets(path, reader, names=set(names))
+    while True:
+        started = time.perf_counter()
+        item = next(sheets, None)
+        if item is None:
+            break
+        sheet_name, rows = item
+        record, error = _parse_or_error(rows, validate)
+        results[sheet_name] = (record, error, time.perf_counter() - started)
+    return [results.get(name, (None, 'Лист не найден', 0.0)) for name in names]
+
+
+def _parse_or_error(rows, validate=False):
+    try:
+        if validate:
+            return validate_sheet(rows), None
+        return parse_sheet(rows), None
+    except Exception as e:
+        return None, str(e)
+
+
+def _file_path(file):
+    """Путь к файлу на диске; загруженный в память файл сохраняется во временный."""
+    if isinstance(file, (str, os.PathLike)):
+        return os.fspath(file), False
+    if hasattr(file, 'temporary_file_path'):
+        return file.temporary_file_path(), False
+    file.seek(0)
+    with tempfile.NamedTemporaryFile(suffix='.xlsx', delete=False) as tmp:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            tmp.write(chunk)
+    return tmp.name, True
+
+
+def parse_sheet(rows):
+    """
+    Разбирает один лист (строки — кортежи значений ячеек) в запись.
+    Бросает ValueError с описанием первой ошибки, если лист не соответствует формату.
+    """
+    sheet = _read_sheet(rows)
+    if sheet['errors']:
+        raise ValueError(sheet['errors'][0])
+    return {'event': sheet['event'], 'participants': sheet['participants']}
+
+
+def validate_sheet(rows):
+    """
+    Полный разбор листа без записи в базу — отчёт для пробной загрузки:
+
+        {
+            'event': {...} или None,
+            'errors': [ошибки листа],
+            'participants': число принимаемых строк,
+            'issues': [{'row': номер строки Excel, 'issue': код, 'message': текст}],
+        }
+
+    Коды проблем строк: 'empty_name' (заполнены данные, но нет ФИО),
+    'bad_hours' (часы не указаны или не положительны), 'hours_overflow' (часов
+    больше MAX_HOURS). Такие строки при обычной загрузке пропускаются.
+    """
+    sheet = _read_sheet(rows)
+    event = sheet['event']
+    if event is not None:
+        event = dict(event, start_date=event['start_date'].isoformat(), end_date=event['end_date'].isoformat())
+    return {
+        'event': event,
+        'errors': sheet['errors'],
+        'participants': len(sheet['participants']),
+        'issues': sheet['issues'],
+    }
+
+
+def _read_sheet(rows):
+    """Общий разбор листа: собирает все ошибки, а не только первую."""
+    errors = []
+    result = {'event': None, 'errors': errors, 'participants': [], 'issues': []}
+
+    # 1. ПАРСИНГ МЕТАДАННЫХ МЕРОПРИЯТИЯ
+    head = list(itertools.islice(rows, 2))
+    if len(head) < 2:
+        errors.append('Лист должен содержать минимум 2 строки')
+        return result
+
+    header_row, data_row = head
+    result['event'], event_errors = parse_event(header_row, data_row)
+    errors.extend(event_errors)
+
+    # 2. ПОИСК ТАБЛИЦЫ УЧАСТНИКОВ (строки читаются дальше из того же потока)
+    stream = itertools.chain(head, rows)
+    fio_row = None
+    for row_number, row in enumerate(stream, start=1):
+        if "ФИО" in str(cell(row, 0) or ""):
+            fio_row = row_number
+            break
+
+    if fio_row is None:
+        errors.append('Не найдена таблица с участниками (нет колонки "ФИО")')
+        return result
+
+    # 3. СБОР УЧАСТНИКОВ — по столбцам, сразу для всего блока
+    block = [tuple(row[:4]) + (None,) * (4 - len(row)) for row in stream]
+    result['participants'], result['issues'] = parse_participants(block, first_row=fio_row + 1)
+    return result
+
+
+def parse_event(header_row, data_row):
+    """
+    Разбирает блок мероприятия: первая строка листа — заголовки, вторая — значения.
+    Возвращает (поля мероприятия или None, список ошибок).
+    """
+    errors = []
+
+    # Маппинг заголовков на колонки
+    headers = {}
+    for col_idx, value in enumerate(header_row):
+        if value is None:
+            continue
+        field = match_header(str(value).strip().lower())
+        if field:
+            headers[field] = col_idx
+
+    def value_of(field):
+        return cell(data_row, headers[field]) if field in headers else None
+
+    # Извлечение значений
+    event_name = None
+    if value_of('name') is not None:
+        event_name = str(value_of('name')).strip()
+
+    level = None
+    if value_of('level') is not None:
+        level = match_level(str(value_of('level')).strip().lower())
+
+    start_date = None
+    end_date = None
+    date_val = value_of('dates')
+    if date_val is not None:
+        try:
+            if hasattr(date_val, 'strftime'):
+                # Если это уже datetime объект
+                start_date = end_date = date_val.date() if hasattr(date_val, 'date') else date_val
+            else:
+                start_date, end_date = parse_date_range(str(date_val).strip())
+        except ValueError as e:
+            errors.append(str(e))
+
+    is_first_time = False
+    if value_of('first_time') is not None:
+        is_first_time = str(value_of('first_time')).strip().lower() in FIRST_TIME_VALUES
+
+    # Проверка обязательных полей
+    if not event_name:
+        errors.append('Не найдено название мероприятия')
+    if not level:
+        errors.append('Не определён уровень мероприятия')
+    if not start_date or not end_date:
+        errors.append('Не определены даты проведения')
+
+    if errors:
+        return None, errors
+    return {
+        'name': event_name,
+        'level': level,
+        'start_date': start_date,
+        'end_date': end_date,
+        'is_first_time': is_first_time,
+    }, errors
+
+
+@lru_cache(maxsize=256)
+def match_header(text):
+    """Поле мероприятия по тексту заголовка столбца (в нижнем регистре) или None."""
+    for key, field in HEADER_KEYS:
+        if key in text:
+            return field
+    return None
+
+
+@lru_cache(maxsize=256)
+def match_level(text):
+    """Код уровня по тексту ячейки «Уровень» (в нижнем регистре) или None."""
+    for key, code in LEVEL_TABLE:
+        if key in text:
+            return code
+    return None
+
+
+@lru_cache(maxsize=1024)
+def parse_date_range(text):
+    """
+    (начало, конец) из текста «Даты проведения»: «01.03.2025 - 02.03.2025» или одна
+    дата. (None, None), если даты не найдены; ValueError для несуществующей даты.
+    Одни и те же строки повторяются на многих листах, поэтому результат кешируется.
+    """
+    dates = DATE_RE.findall(text)
+    if len(dates) >= 2:
+        return _to_date(dates[0]), _to_date(dates[1])
+    if len(dates) == 1:
+        single = _to_date(dates[0])
+        return single, single
+    # Попробуем разделить по дефису
+    if '-' in text:
+        parts = text.split('-')
+        if len(parts) == 2:
+            return _to_date(parts[0].strip()), _to_date(parts[1].strip())
+    return None, None
+
+
+def _to_date(text):
+    return datetime.strptime(text, DATE_FORMAT).date()
+
+
+def parse_participants(block, first_row=1):
+    """
+    Разбирает блок строк таблицы участников (столбцы ФИО, группа, роль, часы)
+    векторными операциями pandas. first_row — номер первой строки блока в листе.
+
+    Возвращает (участники, проблемы): участники — кортежи
+    (full_name, group, role, hours) в порядке строк, проблемы — как в validate_sheet.
+    """
+    if not block:
+        return [], []
+
+    import numpy as np
+    import pandas as pd
+
+    df = pd.DataFrame(block, columns=range(4), dtype=object)
+    df.index = range(first_row, first_row + len(df))
+
+    names = _clean_text(df[0])
+    groups = _clean_text(df[1])
+    roles = _clean_text(df[2])
+
+    # Часы: в текстовых ячейках оставляем только цифры (отбрасываем +, пробелы, текст),
+    # числовые берём как есть — 5.0 не должно превращаться в «50». Значения сначала
+    # собираются в float64: число длиннее int64 при приведении переполнилось бы молча
+    hours_raw = df[3]
+    is_text = hours_raw.map(type).eq(str)
+    is_number = hours_raw.map(_is_number).astype(bool)
+    values = pd.Series(np.nan, index=df.index, dtype='float64')
+    digits = hours_raw[is_text].astype('string').str.replace(NON_DIGITS_RE, '', regex=True)
+    digits = digits[digits.ne('')]
+    values.loc[digits.index] = pd.to_numeric(digits, errors='coerce').astype('float64')
+    values.loc[is_number[is_number].index] = pd.to_numeric(hours_raw[is_number], errors='coerce').astype('float64')
+    too_large = values.gt(MAX_HOURS)
+    hours = np.trunc(values.mask(too_large, 0).fillna(0)).astype('int64')
+
+    has_name = names.ne('')
+    has_data = groups.ne('') | roles.ne('') | _clean_text(hours_raw).ne('')
+    accepted = has_name & hours.gt(0)
+
+    participants = list(zip(
+        names[accepted].tolist(),
+        groups[accepted].tolist(),
+        roles[accepted].tolist(),
+        hours[accepted].tolist(),
+    ))
+
+    issues = []
+    for row_number in df.index[~has_name & has_data]:
+        issues.append({'row': int(row_number), 'issue': 'empty_name', 'message': 'Не указано ФИО'})
+    for row_number in df.index[has_name & too_large]:
+        issues.append({
+            'row': int(row_number),
+            'issue': 'hours_overflow',
+            'message': f'Слишком большое число часов: «{hours_raw[row_number]}» (не больше {MAX_HOURS})',
+        })
+    for row_number in df.index[has_name & ~too_large & hours.le(0)]:
+        value = hours_raw[row_number]
+        issues.append({
+            'row': int(row_number),
+            'issue': 'bad_hours',
+            'message': f'Некорректные часы: «{"" if value is None else value}»',
+        })
+    issues.sort(key=lambda issue: issue['row'])
+    return participants, issues
+
+
+def _clean_text(column):
+    """str(значение).strip() для столбца; пустые ячейки — ''."""
+    return column.astype('string').str.strip().fillna('').astype(object)
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def normalize_name(full_name):
+    """
+    Ключ для сравнения ФИО: регистр, ё/е и лишние пробелы не различаются
+    («Иванов  Иван», «иванов иван» и «Иванов Иван» дают один ключ).
+    """
+    return WHITESPACE_RE.sub(' ', full_name.casefold().replace('ё', 'е')).strip()
+
+
+def record_fingerprint(record):
+    """
+    Хеш содержимого записи листа. Совпадает у листов с одинаковыми мероприятием и
+    участниками, даже если в исходном файле менялось оформление.
+    """
+    event = record['event']
+    payload = json.dumps(
+        [
+            [event['name'], event['level'], event['start_date'].isoformat(),
+             event['end_date'].isoformat(), event['is_first_time']],
+            [list(participant) for participant in record['participants']],
+        ],
+        ensure_ascii=False,
+        separators=(',', ':'),
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
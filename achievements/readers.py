@@ -0,0 +1,71 @@
+"""
+Чтение Excel-файлов с участиями.
+
+Оба читателя отдают листы по одному в виде (имя_листа, итератор_строк), где строка —
+кортеж значений ячеек, а пустая ячейка — None. Потоковый читатель на openpyxl
+(read-only) держит в памяти только текущую строку; pandas оставлен как запасной
+вариант и читает в память по одному листу.
+"""
+from django.conf import settings
+
+READER_STREAMING = 'openpyxl'
+READER_PANDAS = 'pandas'
+
+
+def iter_sheets(file, reader=None, names=None):
+    """
+    Возвращает генератор листов выбранного читателя (по умолчанию — из настроек).
+    names — только эти листы (в порядке файла); файл при этом открывается один раз.
+    """
+    reader = reader or getattr(settings, 'ACHIEVEMENTS_EXCEL_READER', READER_STREAMING)
+    if reader == READER_PANDAS:
+        return iter_sheets_pandas(file, names)
+    return iter_sheets_streaming(file, names)
+
+
+def iter_sheets_streaming(file, names=None):
+    """Лениво читает листы через openpyxl в режиме read-only."""
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+    try:
+        for worksheet in workbook.worksheets:
+            if names is not None and worksheet.title not in names:
+                continue
+            # Размер листа в файле может быть записан неверно — читаем до конца
+            worksheet.reset_dimensions()
+            yield worksheet.title, worksheet.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def iter_sheets_pandas(file, names=None):
+    """Запасной вариант: читает листы через pandas, по одному DataFrame за раз."""
+    import pandas as pd
+
+    with pd.ExcelFile(file, engine='openpyxl') as excel:
+        for sheet_name in excel.sheet_names:
+            if names is not None and sheet_name not in names:
+                continue
+            df = excel.parse(sheet_name, header=None)
+            # NaN/NaT -> None, чтобы строки не отличались от потокового читателя
+            df = df.astype(object).where(df.notna(), None)
+            yield sheet_name, df.itertuples(index=False, name=None)
+
+
+def cell(row, idx):
+    """Значение ячейки строки или None, если строка короче."""
+    return row[idx] if idx < len(row) else None
+
+
+def sheet_names(file):
+    """Имена листов файла без чтения их содержимого."""
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(file, read_only=True)
+    try:
+        return list(workbook.sheetnames)
+    finally:
+        workbook.close()
+        if hasattr(file, 'seek'):
+            file.seek(0)
@@ -0,0 +1,6 @@
+"""
+Формирование PDF-отчётов. Шрифт с кириллицей регистрируется лениво, один раз на
+процесс — при первом отчёте, под блокировкой (fonts.register_fonts), стили и шаблон
+таблицы кэшируются на процесс (styles.get_styles). Под gunicorn --preload это
+делает заранее, в мастер-процессе, warmup.warm_up().
+"""
@@ -0,0 +1,77 @@
+"""
+Пакетные отчёты: по группе (или по всем студентам) за период.
+
+Данные всех отчётов пакета выбираются двумя запросами (см. data.batch_report_data),
+после чего отчёты рисуются в пуле процессов (в ZIP по файлу на студента) или
+одним PDF с закладками.
+"""
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+
+from .pdf import render_combined_report, render_report, spooled_file
+
+FORMAT_ZIP = 'zip'
+FORMAT_PDF = 'pdf'
+
+
+def render_batch(reports, date_from, date_to, output_format=FORMAT_ZIP, workers=None, title=''):
+    """
+    Пакет отчётов во временном файле, готовом к чтению с начала.
+    reports — список (id студента, ФИО, данные отчёта), см. data.batch_report_data.
+    """
+    out = spooled_file()
+    write_batch(out, reports, date_from, date_to, output_format, workers, title)
+    out.seek(0)
+    return out
+
+
+def write_batch(out, reports, date_from, date_to, output_format=FORMAT_ZIP, workers=None, title=''):
+    """Записывает пакет отчётов в файлоподобный объект out (см. render_batch)."""
+    if output_format == FORMAT_PDF:
+        render_combined_report(
+            out, [(full_name, data) for _, full_name, data in reports], date_from, date_to, title,
+        )
+    else:
+        write_zip(out, reports, date_from, date_to, workers)
+
+
+def write_zip(out, reports, date_from, date_to, workers=None):
+    """
+    ZIP с отдельным PDF на каждого студента. При workers > 1 отчёты рисуются в
+    пуле процессов, в архив их пишет текущий процесс в порядке списка.
+    """
+    if workers is None:
+        workers = settings.ACHIEVEMENTS_REPORT_WORKERS
+    args = (
+        [full_name for _, full_name, _ in reports],
+        [data for _, _, data in reports],
+        [date_from] * len(reports),
+        [date_to] * len(reports),
+    )
+    with zipfile.ZipFile(out, 'w', zipfile.ZIP_DEFLATED) as archive:
+        if workers > 1 and len(reports) > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(reports))) as executor:
+                rendered = executor.map(render_report_bytes, *args, chunksize=4)
+                _write_entries(archive, reports, rendered, date_from, date_to)
+        else:
+            _write_entries(archive, reports, map(render_report_bytes, *args), date_from, date_to)
+
+
+def _write_entries(archive, reports, rendered, date_from, date_to):
+    for (student_id, full_name, _), data in zip(reports, rendered):
+        archive.writestr(report_file_name(student_id, full_name, date_from, date_to), data)
+
+
+def render_report_bytes(full_name, data, date_from, date_to):
+    """Отчёт одного студента в байтах (выполняется в дочернем процессе)."""
+    out = spooled_file()
+    render_report(out, full_name, date_from, date_to, data)
+    out.seek(0)
+    return out.read()
+
+
+def report_file_name(student_id, full_name, date_from, date_to):
+    name = ' '.join(full_name.replace('/', ' ').replace('\\', ' ').split())
+    return f"{name} ({student_id})_{date_from}_{date_to}.pdf"
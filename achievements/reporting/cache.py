@@ -0,0 +1,140 @@
+"""
+Кэш готовых PDF-отчётов на локальном диске.
+
+Ключ — (студент, период, версия данных студента), поэтому при изменении данных
+отчёт не нужно удалять: новая версия даёт новый ключ, а старые файлы вытесняются
+по LRU, когда кэш превышает ACHIEVEMENTS_REPORT_CACHE_MAX_BYTES. Время последнего
+обращения — mtime файла (обновляется при попадании). Повторная выдача отчёта —
+одно чтение файла.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+
+from django.conf import settings
+
+# Увеличить при изменении вида отчёта, чтобы не отдавать файлы старой вёрстки
+LAYOUT_VERSION = 2
+
+
+def report_key(student_id, date_from, date_to, data_version):
+    raw = f'{LAYOUT_VERSION}:{student_id}:{date_from.isoformat()}:{date_to.isoformat()}:{data_version}'
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class ReportCache:
+    """Файловый кэш с ограничением размера и счётчиками попаданий в текущем процессе."""
+
+    def __init__(self, directory, max_bytes):
+        self.directory = str(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def _path(self, key):
+        return os.path.join(self.directory, f'{key}.pdf')
+
+    def get(self, key):
+        """Открытый файл отчёта или None."""
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            out = open(path, 'rb')
+        except FileNotFoundError:
+            self._count('misses')
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            # Файл вытеснен другим процессом, но уже открыт — отдаём его
+            pass
+        self._count('hits')
+        return out
+
+    def put(self, key, data):
+        """
+        Сохраняет отчёт из файлоподобного объекта data (читается с текущей позиции,
+        затем возвращается в неё). Запись атомарна: временный файл и os.replace.
+        """
+        if not self.enabled:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        position = data.tell()
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                while chunk := data.read(64 * 1024):
+                    out.write(chunk)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        finally:
+            data.seek(position)
+        self.evict()
+
+    def evict(self):
+        """Удаляет давно не запрошенные отчёты, пока кэш больше max_bytes."""
+        entries = []
+        total = 0
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.name.endswith('.pdf'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        if total <= self.max_bytes:
+            return
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                continue
+            total -= size
+            self._count('evictions')
+
+    def clear(self):
+        if not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if name.endswith(('.pdf', '.tmp')):
+                try:
+                    os.unlink(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    pass
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+
+_cache = None
+
+
+def get_report_cache():
+    """Кэш отчётов из настроек (один на процесс, пересоздаётся при смене настроек)."""
+    global _cache
+    directory = str(settings.ACHIEVEMENTS_REPORT_CACHE_DIR)
+    max_bytes = settings.ACHIEVEMENTS_REPORT_CACHE_MAX_BYTES
+    if _cache is None or (_cache.directory, _cache.max_bytes) != (directory, max_bytes):
+        _cache = ReportCache(directory, max_bytes)
+    return _cache
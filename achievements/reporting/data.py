@@ -0,0 +1,92 @@
+"""
+Данные для PDF-отчётов.
+
+Строки отчёта — один запрос с JOIN мероприятий, только нужные колонки. Итоги и
+подытоги по уровням мероприятий считает база (Sum/Count с группировкой), так что
+число запросов не зависит от числа участий.
+
+Данные отчёта — словарь:
+    rows — строки (начало, конец, мероприятие, уровень, роль, часы) по дате начала;
+    levels — подытоги (уровень, мероприятий, часов) в порядке Event.LEVEL_CHOICES;
+    total_hours — всего часов.
+"""
+from django.db.models import Count, Sum
+
+from .. import metrics
+from ..models import Event, Participation
+
+LEVEL_DISPLAY = dict(Event.LEVEL_CHOICES)
+LEVEL_ORDER = {level: idx for idx, (level, _) in enumerate(Event.LEVEL_CHOICES)}
+
+ROW_FIELDS = (
+    'event__start_date', 'event__end_date', 'event__name', 'event__level', 'role_normalized', 'hours',
+)
+
+
+def period_participations(date_from, date_to):
+    return Participation.objects.filter(event__start_date__range=[date_from, date_to])
+
+
+@metrics.span('report_data')
+def report_data(student_id, date_from, date_to):
+    """Данные отчёта одного студента: два запроса при любом числе участий."""
+    participations = period_participations(date_from, date_to).filter(student_id=student_id)
+    rows = [
+        _row(values)
+        for values in participations.order_by('event__start_date', 'event_id').values_list(*ROW_FIELDS)
+    ]
+    subtotals = (
+        participations.order_by()
+        .values_list('event__level')
+        .annotate(count=Count('id'), hours=Sum('hours'))
+    )
+    return _with_totals(rows, subtotals)
+
+
+@metrics.span('report_data')
+def batch_report_data(date_from, date_to, group=None):
+    """
+    Данные отчётов группы (group=None — все студенты): список (id студента, ФИО,
+    данные отчёта) по ФИО. Два запроса на весь пакет; студенты без участий за
+    период в него не попадают.
+    """
+    participations = period_participations(date_from, date_to)
+    if group is not None:
+        participations = participations.filter(student__group=group)
+
+    subtotals = {}
+    grouped = (
+        participations.order_by()
+        .values_list('student_id', 'event__level')
+        .annotate(count=Count('id'), hours=Sum('hours'))
+    )
+    for student_id, level, count, hours in grouped:
+        subtotals.setdefault(student_id, []).append((level, count, hours))
+
+    reports = []
+    current = None
+    values = participations.order_by('student__full_name', 'student_id', 'event__start_date', 'event_id')
+    for student_id, full_name, *fields in values.values_list('student_id', 'student__full_name', *ROW_FIELDS).iterator():
+        if current is None or current[0] != student_id:
+            current = (student_id, full_name, [])
+            reports.append(current)
+        current[2].append(_row(fields))
+
+    return [
+        (student_id, full_name, _with_totals(rows, subtotals[student_id]))
+        for student_id, full_name, rows in reports
+    ]
+
+
+def _row(values):
+    start_date, end_date, name, level, role, hours = values
+    return (start_date, end_date, name, LEVEL_DISPLAY.get(level, level), role, hours)
+
+
+def _with_totals(rows, subtotals):
+    subtotals = sorted(subtotals, key=lambda item: LEVEL_ORDER.get(item[0], len(LEVEL_ORDER)))
+    return {
+        'rows': rows,
+        'levels': [(LEVEL_DISPLAY.get(level, level), count, hours) for level, count, hours in subtotals],
+        'total_hours': sum(hours for _, _, hours in subtotals),
+    }
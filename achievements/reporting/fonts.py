@@ -0,0 +1,43 @@
+"""
+Регистрация шрифтов с кириллицей для PDF.
+
+Разбор TTF-файла дорогой, поэтому шрифт регистрируется один раз на процесс — при
+первом отчёте или заранее, в мастер-процессе gunicorn (warmup.warm_up()).
+"""
+import os
+import threading
+
+from django.conf import settings
+
+FALLBACK_FONT = 'Helvetica'  # без кириллицы, если подходящий TTF не найден
+
+# (имя шрифта в reportlab, путь к файлу) в порядке предпочтения
+FONT_CANDIDATES = (
+    ('DejaVuSans', os.path.join(settings.BASE_DIR, 'fonts', 'DejaVuSans.ttf')),
+    ('Arial', 'C:\\Windows\\Fonts\\arial.ttf'),
+)
+
+_lock = threading.Lock()
+_font_name = None
+
+
+def register_fonts():
+    """Регистрирует шрифт отчётов (повторные вызовы ничего не делают) и возвращает его имя."""
+    global _font_name
+    if _font_name is not None:
+        return _font_name
+
+    with _lock:
+        if _font_name is None:
+            from reportlab.pdfbase import pdfmetrics
+            from reportlab.pdfbase.ttfonts import TTFont
+
+            font_name = FALLBACK_FONT
+            for name, path in FONT_CANDIDATES:
+                if os.path.exists(path):
+                    if name not in pdfmetrics.getRegisteredFontNames():
+                        pdfmetrics.registerFont(TTFont(name, path))
+                    font_name = name
+                    break
+            _font_name = font_name
+    return _font_name
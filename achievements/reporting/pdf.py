@@ -0,0 +1,185 @@
+"""
+PDF-отчёт по участиям студента.
+
+Документ собирается platypus: таблица сама разбивается на страницы с повтором
+строки заголовка, на каждой странице — номер. Результат пишется во временный
+файл, который держится в памяти до SPOOL_MAX_SIZE, а дальше уходит на диск.
+
+Отчёт строится по готовым данным (см. reporting.data), поэтому его можно рисовать
+и в дочернем процессе без доступа к базе (reporting.batch, пул offload).
+"""
+import tempfile
+import time
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import mm
+from reportlab.pdfgen.canvas import Canvas
+from reportlab.platypus import BaseDocTemplate, Flowable, Frame, PageBreak, PageTemplate, Paragraph, LongTable, Spacer, Table
+
+from .. import metrics
+from .styles import (
+    COL_WIDTHS, HEADER_TITLES, TABLE_STYLE, LEVEL_COL_WIDTHS, LEVEL_HEADER_TITLES, LEVEL_TABLE_STYLE, get_styles,
+)
+
+SPOOL_MAX_SIZE = 1024 * 1024
+
+PAGE_WIDTH, PAGE_HEIGHT = A4
+TOP_MARGIN = 20*mm
+BOTTOM_MARGIN = 15*mm
+
+
+def spooled_file():
+    """Временный файл для отчёта: в памяти до SPOOL_MAX_SIZE, дальше на диске."""
+    return tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+
+
+def render_report(out, full_name, date_from, date_to, data):
+    """Рисует отчёт одного студента в файлоподобный объект out."""
+    styles = get_styles()
+    doc = _document(out, styles, title=f"Отчёт по студенту: {full_name}")
+    _build(doc, report_flowables(styles, full_name, date_from, date_to, data))
+
+
+def render_combined_report(out, reports, date_from, date_to, title):
+    """
+    Отчёты нескольких студентов в одном PDF: каждый с новой страницы и с
+    закладкой в оглавлении. reports — пары (ФИО, данные отчёта).
+    """
+    styles = get_styles()
+    story = []
+    for idx, (full_name, data) in enumerate(reports):
+        if story:
+            story.append(PageBreak())
+        story.extend(report_flowables(styles, full_name, date_from, date_to, data, bookmark=f'student{idx}'))
+    doc = _document(out, styles, title=title)
+    _build(doc, story)
+
+
+class _MeasuredCanvas(Canvas):
+    """Canvas, замеряющий запись готового документа в файл."""
+    output_seconds = 0.0
+
+    def save(self):
+        started = time.perf_counter()
+        super().save()
+        self.output_seconds = time.perf_counter() - started
+
+
+def _build(doc, story):
+    """doc.build с метриками: вёрстка (report_layout) и запись PDF (report_output)."""
+    started = time.perf_counter()
+    doc.build(story, canvasmaker=_MeasuredCanvas)
+    output_seconds = doc.canv.output_seconds
+    metrics.observe('achievements_span_duration_seconds', time.perf_counter() - started - output_seconds, span='report_layout')
+    metrics.observe('achievements_span_duration_seconds', output_seconds, span='report_output')
+
+
+def _document(out, styles, title):
+    font_name = styles.font_name
+
+    def draw_page_number(canvas, doc):
+        canvas.saveState()
+        canvas.setFont(font_name, 9)
+        canvas.drawRightString(PAGE_WIDTH-20*mm, 8*mm, f"Стр. {doc.page}")
+        canvas.restoreState()
+
+    # Таблица центрируется по ширине страницы (hAlign по умолчанию — CENTER)
+    frame = Frame(
+        0, BOTTOM_MARGIN, PAGE_WIDTH, PAGE_HEIGHT - TOP_MARGIN - BOTTOM_MARGIN,
+        leftPadding=0, rightPadding=0, topPadding=0, bottomPadding=0, id='report',
+    )
+    doc = BaseDocTemplate(
+        out,
+        pagesize=A4,
+        title=title,
+        leftMargin=0, rightMargin=0, topMargin=0, bottomMargin=0,
+    )
+    doc.addPageTemplates([PageTemplate('report', [frame], onPage=draw_page_number)])
+    return doc
+
+
+def report_flowables(styles, full_name, date_from, date_to, data, bookmark=None):
+    """Заголовок, таблица участий и подытоги по уровням одного отчёта."""
+    flowables = [
+        ReportHeader(styles.font_name, full_name, date_from, date_to, bookmark=bookmark),
+        build_table(styles, data['rows'], data['total_hours']),
+    ]
+    if data['levels']:
+        flowables += [Spacer(1, 6*mm), build_level_table(styles, data['levels'])]
+    return flowables
+
+
+class ReportHeader(Flowable):
+    """
+    ----- ЗАГОЛОВОК ОТЧЁТА -----
+    Рисуется с отступа 20 мм от левого края страницы; таблица начинается на 45 мм
+    от верха. В общем PDF ставит закладку на страницу.
+    """
+
+    def __init__(self, font_name, full_name, date_from, date_to, bookmark=None):
+        super().__init__()
+        self.font_name = font_name
+        self.full_name = full_name
+        self.date_from = date_from
+        self.date_to = date_to
+        self.bookmark = bookmark
+
+    def wrap(self, avail_width, avail_height):
+        self.width, self.height = avail_width, 25*mm
+        return self.width, self.height
+
+    def draw(self):
+        canvas = self.canv
+        if self.bookmark:
+            canvas.bookmarkPage(self.bookmark)
+            canvas.addOutlineEntry(self.full_name, self.bookmark, level=0)
+        canvas.setFont(self.font_name, 16)
+        canvas.drawString(20*mm, self.height, f"Отчёт по студенту: {self.full_name}")
+        canvas.setFont(self.font_name, 12)
+        canvas.drawString(20*mm, self.height-10*mm, f"Период: {self.date_from.strftime('%d.%m.%Y')} - {self.date_to.strftime('%d.%m.%Y')}")
+
+
+def build_table(styles, rows, total_hours):
+    """Таблица участий с итоговой строкой; строка заголовка повторяется на каждой странице."""
+    # ----- ПОДГОТОВКА ДАННЫХ ДЛЯ ТАБЛИЦЫ -----
+    data = [[Paragraph(title, styles.header) for title in HEADER_TITLES]]
+
+    for start_date, end_date, event_name, level, role, hours in rows:
+        row = [
+            Paragraph(start_date.strftime("%d.%m.%Y"), styles.center),
+            Paragraph(end_date.strftime("%d.%m.%Y"), styles.center),
+            Paragraph(event_name, styles.normal),
+            Paragraph(level, styles.normal),
+            Paragraph(role, styles.normal),
+            Paragraph(str(hours), styles.center),
+        ]
+        data.append(row)
+
+    # Итоговая строка
+    data.append([
+        Paragraph("", styles.normal),
+        Paragraph("", styles.normal),
+        Paragraph("", styles.normal),
+        Paragraph("", styles.normal),
+        Paragraph("ИТОГО часов:", styles.right),
+        Paragraph(str(total_hours), styles.center),
+    ])
+
+    # LongTable быстрее обычной Table разбивается на страницы при сотнях строк
+    table = LongTable(data, colWidths=COL_WIDTHS, repeatRows=1)
+    table.setStyle(TABLE_STYLE)
+    return table
+
+
+def build_level_table(styles, levels):
+    """Подытоги по уровням мероприятий: уровень, число мероприятий, часы."""
+    data = [[Paragraph(title, styles.header) for title in LEVEL_HEADER_TITLES]]
+    for level, count, hours in levels:
+        data.append([
+            Paragraph(level, styles.normal),
+            Paragraph(str(count), styles.center),
+            Paragraph(str(hours), styles.center),
+        ])
+    table = Table(data, colWidths=LEVEL_COL_WIDTHS, repeatRows=1)
+    table.setStyle(LEVEL_TABLE_STYLE)
+    return table
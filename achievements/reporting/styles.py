@@ -0,0 +1,91 @@
+"""
+Стили отчёта. Собираются один раз на процесс (после регистрации шрифта) и
+переиспользуются всеми отчётами — в reportlab они не изменяются при отрисовке.
+"""
+from functools import lru_cache
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.units import mm
+from reportlab.platypus import TableStyle
+
+from .fonts import register_fonts
+
+# ----- ШИРИНА КОЛОНОК (оптимизировано под A4) -----
+COL_WIDTHS = [
+    25*mm,   # Начало
+    25*mm,   # Конец
+    50*mm,   # Мероприятие
+    30*mm,   # Уровень
+    50*mm,   # Роль (с переносом)
+    15*mm,   # Часы
+]
+
+HEADER_TITLES = ["Начало", "Конец", "Мероприятие", "Уровень", "Роль", "Часы"]
+
+# ----- СТИЛЬ ТАБЛИЦЫ -----
+TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0,0), (-1,0), colors.grey),
+    ('TEXTCOLOR', (0,0), (-1,0), colors.whitesmoke),
+    ('ALIGN', (0,0), (-1,0), 'CENTER'),
+    ('VALIGN', (0,0), (-1,0), 'MIDDLE'),
+    ('GRID', (0,0), (-1,-1), 0.5, colors.black),   # сетка для всех ячеек
+    ('BACKGROUND', (0,-1), (-1,-1), colors.lightgrey),
+    ('ALIGN', (4,-1), (4,-1), 'RIGHT'),
+    ('ALIGN', (5,-1), (5,-1), 'CENTER'),
+    ('VALIGN', (0,0), (-1,-1), 'TOP'),            # прижимаем текст вверх
+    ('LEFTPADDING', (0,0), (-1,-1), 3),
+    ('RIGHTPADDING', (0,0), (-1,-1), 3),
+    ('TOPPADDING', (0,0), (-1,-1), 2),
+    ('BOTTOMPADDING', (0,0), (-1,-1), 2),
+])
+
+
+# ----- ПОДЫТОГИ ПО УРОВНЯМ -----
+LEVEL_COL_WIDTHS = [50*mm, 30*mm, 20*mm]
+
+LEVEL_HEADER_TITLES = ["Уровень", "Мероприятий", "Часов"]
+
+LEVEL_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0,0), (-1,0), colors.grey),
+    ('VALIGN', (0,0), (-1,-1), 'TOP'),
+    ('GRID', (0,0), (-1,-1), 0.5, colors.black),
+    ('LEFTPADDING', (0,0), (-1,-1), 3),
+    ('RIGHTPADDING', (0,0), (-1,-1), 3),
+    ('TOPPADDING', (0,0), (-1,-1), 2),
+    ('BOTTOMPADDING', (0,0), (-1,-1), 2),
+])
+
+
+class ReportStyles:
+    """Шрифт и стили абзацев отчёта"""
+
+    def __init__(self, font_name):
+        self.font_name = font_name
+        # Paragraph даёт автоматический перенос и рост высоты строк
+        self.normal = self._paragraph('Normal', TA_LEFT)
+        self.center = self._paragraph('Center', TA_CENTER)
+        self.right = self._paragraph('Right', TA_RIGHT)
+        self.header = self._paragraph('Header', TA_CENTER, textColor=colors.whitesmoke)
+
+    def _paragraph(self, name, alignment, **extra):
+        return ParagraphStyle(
+            name=name,
+            fontName=self.font_name,
+            fontSize=9,
+            leading=13,
+            alignment=alignment,
+            wordWrap='CJK',          # переносит любые символы
+            **extra
+        )
+
+
+@lru_cache(maxsize=None)
+def _styles_for(font_name):
+    return ReportStyles(font_name)
+
+
+def get_styles():
+    """Стили для зарегистрированного шрифта (создаются один раз)."""
+    return _styles_for(register_fonts())
@@ -0,0 +1,33 @@
+"""
+Нормализация текста роли участника («главныйорганизатор» → «главный организатор»).
+
+Правила хранятся в базе (RoleRule, правятся в админке) и применяются один раз —
+при записи участия; готовый текст лежит в Participation.role_normalized, и отчёты
+берут его без обработки. После изменения правил существующие участия пересчитывает
+manage.py normalize_roles.
+"""
+import re
+
+
+class RoleNormalizer:
+    """
+    Скомпилированный набор правил. rules — тройки (шаблон, замена, регулярное ли
+    выражение) в порядке применения; флаги регулярного выражения — встроенные,
+    например «(?i)». Обычный шаблон заменяется как текст. Итог очищается от
+    лишних пробелов.
+    """
+
+    def __init__(self, rules):
+        self.rules = [
+            (re.compile(pattern) if is_regex else pattern, replacement)
+            for pattern, replacement, is_regex in rules
+        ]
+
+    def __call__(self, role):
+        role = role.strip()
+        for pattern, replacement in self.rules:
+            if isinstance(pattern, str):
+                role = role.replace(pattern, replacement)
+            else:
+                role = pattern.sub(replacement, role)
+        return ' '.join(role.split())
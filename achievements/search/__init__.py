@@ -0,0 +1,131 @@
+"""
+Полнотекстовый поиск по студентам, мероприятиям и участиям.
+
+Индекс — отдельные таблицы в той же базе (см. backends: FTS5 в SQLite, tsvector
+с GIN-индексом в PostgreSQL). Документ объекта — нормализованный текст полей из
+DOCUMENT_FIELDS; документ участия включает ФИО студента и название мероприятия,
+поэтому при их изменении участия индексируются заново.
+
+Индекс обновляется там же, где сводка часов: сигналы сохранения и удаления
+(signals.py) и пакетные пути — загрузка Excel и команды. Полная перестройка —
+rebuild() и команда rebuild_search_index. На базах без полнотекстового поиска
+запросы выполняются через icontains по тем же полям.
+"""
+import re
+
+from django.db import connections, router
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from ..parsing import normalize_name
+from .backends import KINDS, get_backend
+
+DOCUMENT_FIELDS = {
+    'student': ('full_name', 'group'),
+    'event': ('name',),
+    'participation': ('student__full_name', 'event__name', 'role', 'role_normalized'),
+}
+
+MAX_TERMS = 10
+
+CHUNK_SIZE = 2000
+
+TERM_RE = re.compile(r'[^\W_]+')
+
+
+def _model(kind):
+    from ..models import Event, Participation, Student
+
+    return {'student': Student, 'event': Event, 'participation': Participation}[kind]
+
+
+def _backend(model):
+    return get_backend(connections[router.db_for_write(model)])
+
+
+def terms(query):
+    """Слова запроса: нормализованные, без знаков препинания, не больше MAX_TERMS."""
+    return TERM_RE.findall(normalize_name(query))[:MAX_TERMS]
+
+
+def documents(kind, queryset):
+    """(pk, текст документа) объектов выборки; поля с одинаковым текстом — один раз."""
+    for pk, *values in queryset.order_by().values_list('pk', *DOCUMENT_FIELDS[kind]).iterator(chunk_size=CHUNK_SIZE):
+        yield pk, normalize_name(' '.join(dict.fromkeys(value for value in values if value)))
+
+
+def index(kind, queryset):
+    """Записывает в индекс документы объектов выборки (новых или изменившихся)."""
+    backend = _backend(queryset.model)
+    if backend is not None:
+        backend.write(kind, list(documents(kind, queryset)))
+
+
+def index_pks(kind, pks):
+    """index() для объектов из списка pk (порциями — список может быть длинным)."""
+    pks = list(pks)
+    model = _model(kind)
+    for start in range(0, len(pks), CHUNK_SIZE):
+        index(kind, model._default_manager.filter(pk__in=pks[start:start + CHUNK_SIZE]))
+
+
+def unindex(kind, pks):
+    backend = _backend(_model(kind))
+    if backend is not None:
+        backend.delete(kind, pks)
+
+
+def rebuild(using=None):
+    """Перестраивает индекс целиком. Возвращает {вид: число документов}."""
+    counts = {}
+    backend = get_backend(connections[using or router.db_for_write(_model('participation'))])
+    if backend is None:
+        return counts
+    backend.create()
+    for kind in KINDS:
+        model = _model(kind)
+        backend.clear(kind)
+        docs = list(documents(kind, model._default_manager.all()))
+        backend.write(kind, docs)
+        counts[kind] = len(docs)
+    return counts
+
+
+def _fallback(kind, words):
+    condition = Q()
+    for word in words:
+        condition &= Q(*[(f'{field}__icontains', word) for field in DOCUMENT_FIELDS[kind]], _connector=Q.OR)
+    return condition
+
+
+def filter_queryset(kind, queryset, query):
+    """Объекты выборки, в документе которых есть все слова query (по началу слова)."""
+    words = terms(query)
+    if not words:
+        return queryset
+    backend = get_backend(connections[queryset.db])
+    if backend is None:
+        return queryset.filter(_fallback(kind, words))
+    sql, params = backend.match_sql(kind, words)
+    return queryset.filter(pk__in=RawSQL(sql, params))
+
+
+def search(kind, query, limit=20):
+    """Первые limit объектов вида kind по релевантности запросу query."""
+    model = _model(kind)
+    words = terms(query)
+    if not words:
+        return []
+    queryset = model._default_manager.all()
+    if kind == 'participation':
+        queryset = queryset.select_related('student', 'event')
+    backend = get_backend(connections[queryset.db])
+    if backend is None:
+        return list(queryset.filter(_fallback(kind, words)).order_by('pk')[:limit])
+
+    sql, params = backend.ranked_sql(kind, words, limit)
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(sql, params)
+        pks = [row[0] for row in cursor.fetchall()]
+    objects = queryset.in_bulk(pks)
+    return [objects[pk] for pk in pks if pk in objects]
@@ -0,0 +1,168 @@
+"""
+Хранение полнотекстового индекса в базе: по таблице на вид объектов
+(achievements_search_student, _event, _participation), строка — (pk объекта, текст).
+
+SQLite — виртуальные таблицы FTS5 (rowid = pk), запрос — префиксы слов через
+MATCH, порядок — bm25. PostgreSQL — таблица с tsvector в конфигурации russian
+(со стеммингом) и GIN-индексом, запрос — to_tsquery с префиксами, порядок — ts_rank.
+
+Релевантность считается только для RANK_CANDIDATES последних (по pk) совпадений:
+по частому слову совпадают десятки тысяч участий, и ранжирование их всех занимает
+больше, чем сам поиск.
+
+Текст документов и слова запроса приходят уже нормализованными (нижний регистр,
+ё → е): FTS5 не считает «ё» и «е» одной буквой.
+"""
+from abc import ABC, abstractmethod
+
+KINDS = ('student', 'event', 'participation')
+
+BATCH_SIZE = 500
+
+RANK_CANDIDATES = 1000
+
+
+def table_name(kind):
+    return f'achievements_search_{kind}'
+
+
+class SearchBackend(ABC):
+    """SQL индекса для одной базы. Методы выполняют запросы через connection."""
+    vendor = None
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    @abstractmethod
+    def create(self):
+        """Создаёт таблицы индекса, если их ещё нет."""
+
+    def drop(self):
+        with self.connection.cursor() as cursor:
+            for kind in KINDS:
+                cursor.execute(f'DROP TABLE IF EXISTS {table_name(kind)}')
+
+    @abstractmethod
+    def write(self, kind, documents):
+        """Записывает (pk, текст) поверх прежних документов тех же объектов."""
+
+    @abstractmethod
+    def delete(self, kind, pks):
+        """Удаляет документы объектов из списка pk."""
+
+    def clear(self, kind):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {table_name(kind)}')
+
+    @abstractmethod
+    def match_sql(self, kind, terms):
+        """(sql, params) запроса pk всех документов со всеми словами (по префиксу)."""
+
+    @abstractmethod
+    def ranked_sql(self, kind, terms, limit):
+        """(sql, params) запроса pk первых limit документов по релевантности."""
+
+
+class SQLiteBackend(SearchBackend):
+    vendor = 'sqlite'
+
+    def create(self):
+        with self.connection.cursor() as cursor:
+            for kind in KINDS:
+                cursor.execute(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {table_name(kind)} "
+                    f"USING fts5(body, tokenize = 'unicode61 remove_diacritics 2')"
+                )
+
+    def write(self, kind, documents):
+        table = table_name(kind)
+        with self.connection.cursor() as cursor:
+            for start in range(0, len(documents), BATCH_SIZE):
+                batch = documents[start:start + BATCH_SIZE]
+                # В FTS5 нет INSERT ... ON CONFLICT: прежние документы удаляются
+                cursor.execute(
+                    f'DELETE FROM {table} WHERE rowid IN ({", ".join(["%s"] * len(batch))})',
+                    [pk for pk, _ in batch],
+                )
+                cursor.executemany(f'INSERT INTO {table} (rowid, body) VALUES (%s, %s)', batch)
+
+    def delete(self, kind, pks):
+        pks = list(pks)
+        with self.connection.cursor() as cursor:
+            for start in range(0, len(pks), BATCH_SIZE):
+                batch = pks[start:start + BATCH_SIZE]
+                cursor.execute(
+                    f'DELETE FROM {table_name(kind)} WHERE rowid IN ({", ".join(["%s"] * len(batch))})',
+                    batch,
+                )
+
+    def _query(self, terms):
+        # Слова — только буквы и цифры (см. search.terms), кавычки в них не попадают
+        return ' '.join(f'"{term}"*' for term in terms)
+
+    def match_sql(self, kind, terms):
+        table = table_name(kind)
+        return f'SELECT rowid FROM {table} WHERE {table} MATCH %s', [self._query(terms)]
+
+    def ranked_sql(self, kind, terms, limit):
+        table = table_name(kind)
+        # rank (bm25) вычисляется только для строк, прошедших внутренний LIMIT
+        return (
+            f'SELECT rowid FROM (SELECT rowid, rank FROM {table} WHERE {table} MATCH %s '
+            f'ORDER BY rowid DESC LIMIT %s) ORDER BY rank LIMIT %s',
+            [self._query(terms), RANK_CANDIDATES, limit],
+        )
+
+
+class PostgreSQLBackend(SearchBackend):
+    vendor = 'postgresql'
+    config = 'russian'
+
+    def create(self):
+        with self.connection.cursor() as cursor:
+            for kind in KINDS:
+                table = table_name(kind)
+                cursor.execute(
+                    f'CREATE TABLE IF NOT EXISTS {table} (id bigint PRIMARY KEY, document tsvector NOT NULL)'
+                )
+                cursor.execute(f'CREATE INDEX IF NOT EXISTS {table}_document_idx ON {table} USING gin (document)')
+
+    def write(self, kind, documents):
+        table = table_name(kind)
+        with self.connection.cursor() as cursor:
+            for start in range(0, len(documents), BATCH_SIZE):
+                cursor.executemany(
+                    f"INSERT INTO {table} (id, document) VALUES (%s, to_tsvector('{self.config}', %s)) "
+                    f"ON CONFLICT (id) DO UPDATE SET document = EXCLUDED.document",
+                    documents[start:start + BATCH_SIZE],
+                )
+
+    def delete(self, kind, pks):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {table_name(kind)} WHERE id = ANY(%s)', [list(pks)])
+
+    def _query(self, terms):
+        return ' & '.join(f'{term}:*' for term in terms)
+
+    def match_sql(self, kind, terms):
+        return (
+            f"SELECT id FROM {table_name(kind)} WHERE document @@ to_tsquery('{self.config}', %s)",
+            [self._query(terms)],
+        )
+
+    def ranked_sql(self, kind, terms, limit):
+        return (
+            f"SELECT id FROM (SELECT id, document, q FROM {table_name(kind)}, to_tsquery('{self.config}', %s) q "
+            f"WHERE document @@ q ORDER BY id DESC LIMIT %s) candidates "
+            f"ORDER BY ts_rank(document, q) DESC, id DESC LIMIT %s",
+            [self._query(terms), RANK_CANDIDATES, limit],
+        )
+
+
+BACKENDS = {backend.vendor: backend for backend in (SQLiteBackend, PostgreSQLBackend)}
+
+
+def get_backend(connection):
+    """Индекс для базы connection или None, если её полнотекстовый поиск не поддержан."""
+    backend = BACKENDS.get(connection.vendor)
+    return backend(connection) if backend is not None else None
@@ -0,0 +1,163 @@
+"""
+Производные данные, которые следуют за изменениями участий.
+
+Версия данных отчёта студента (Student.data_version): любое изменение, которое
+меняет PDF-отчёт студента, увеличивает его версию, так что закэшированные отчёты
+прежней версии просто перестают находиться. Студент поднимает версию сам в
+Student.save(), мероприятия и участия — через сигналы. Вместе с ней растёт общая
+версия данных (DataVersion) — по ней API отвечает 304 Not Modified.
+
+Сводка часов (HoursSummary, см. summary.py): сигналы применяют к ней приращения.
+
+Полнотекстовый индекс (search): сигналы переписывают документы сохранённых
+объектов и удаляют документы удалённых.
+
+Правила ролей (RoleRule): сигналы сбрасывают нормализатор, закэшированный в процессе.
+
+Пакетные пути (загрузка Excel, слияние дубликатов, пересчёт ролей) сигналов не
+отправляют и обновляют всё это сами.
+"""
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import search
+from .models import DataVersion, Student, Event, Participation, RoleRule
+from .summary import add_delta, apply_deltas, bucket_of, event_contributions
+
+
+def bump_data_version(student_ids=None, event=None):
+    """
+    Увеличивает версию студентов из списка и/или всех участников мероприятия одним
+    UPDATE, а также общую версию данных (без аргументов — только её).
+    """
+    DataVersion.bump()
+    if student_ids is not None:
+        Student.objects.filter(pk__in=list(student_ids)).update(data_version=F('data_version') + 1)
+    if event is not None:
+        Student.objects.filter(participation__event=event).update(data_version=F('data_version') + 1)
+
+
+def _deleted_with(origin, *models):
+    """Удаление началось с объекта (или выборки) одной из моделей — каскад."""
+    model = origin._meta.model if hasattr(origin, '_meta') else getattr(origin, 'model', None)
+    return model in models
+
+
+@receiver(pre_save, sender=Event)
+def event_before_save(sender, instance, **kwargs):
+    # Прежние уровень и дата нужны, чтобы перенести часы в другую строку сводки,
+    # прежнее название — чтобы понять, нужно ли переиндексировать мероприятие и участия
+    instance._summary_bucket = None
+    instance._search_name = None
+    if instance.pk is not None and not instance._state.adding:
+        old = Event.objects.filter(pk=instance.pk).values_list('level', 'start_date', 'name').first()
+        if old is not None:
+            instance._summary_bucket = bucket_of(*old[:2])
+            instance._search_name = old[2]
+
+
+@receiver(post_save, sender=Event)
+def event_saved(sender, instance, created, **kwargs):
+    renamed = getattr(instance, '_search_name', None) != instance.name
+    if created or renamed:
+        search.index('event', Event.objects.filter(pk=instance.pk))
+    if created:
+        bump_data_version()
+        return
+    if renamed:
+        search.index('participation', Participation.objects.filter(event=instance))
+    bump_data_version(event=instance)
+
+    old_bucket = getattr(instance, '_summary_bucket', None)
+    new_bucket = bucket_of(instance.level, instance.start_date)
+    if old_bucket is not None and old_bucket != new_bucket:
+        deltas = {}
+        for student_id, (hours, count) in event_contributions(instance).items():
+            add_delta(deltas, student_id, old_bucket, -hours, -count)
+            add_delta(deltas, student_id, new_bucket, hours, count)
+        apply_deltas(deltas)
+
+
+@receiver(pre_delete, sender=Event)
+def event_deleted(sender, instance, **kwargs):
+    # После удаления участников мероприятия уже не найти
+    bump_data_version(event=instance)
+    bucket = bucket_of(instance.level, instance.start_date)
+    deltas = {}
+    for student_id, (hours, count) in event_contributions(instance).items():
+        add_delta(deltas, student_id, bucket, -hours, -count)
+    apply_deltas(deltas)
+
+
+@receiver(post_delete, sender=Event)
+def event_unindexed(sender, instance, **kwargs):
+    search.unindex('event', [instance.pk])
+
+
+@receiver(post_save, sender=Student)
+def student_saved(sender, instance, created, update_fields=None, **kwargs):
+    bump_data_version()
+    search.index('student', Student.objects.filter(pk=instance.pk))
+    # ФИО входит в документы участий студента
+    if not created and (update_fields is None or 'full_name' in update_fields):
+        search.index('participation', Participation.objects.filter(student=instance))
+
+
+@receiver(post_delete, sender=Student)
+def student_deleted(sender, instance, **kwargs):
+    bump_data_version()
+    search.unindex('student', [instance.pk])
+
+
+@receiver(pre_save, sender=Participation)
+def participation_before_save(sender, instance, **kwargs):
+    instance._summary_old = None
+    if instance.pk is not None and not instance._state.adding:
+        old = (
+            Participation.objects.filter(pk=instance.pk)
+            .values_list('student_id', 'event__level', 'event__start_date', 'hours').first()
+        )
+        if old is not None:
+            student_id, level, start_date, hours = old
+            instance._summary_old = (student_id, bucket_of(level, start_date), hours)
+
+
+@receiver(post_save, sender=Participation)
+def participation_saved(sender, instance, **kwargs):
+    bump_data_version([instance.student_id])
+    search.index('participation', Participation.objects.filter(pk=instance.pk))
+
+    deltas = {}
+    old = getattr(instance, '_summary_old', None)
+    if old is not None:
+        student_id, bucket, hours = old
+        add_delta(deltas, student_id, bucket, -hours, -1)
+    event = instance.event
+    add_delta(deltas, instance.student_id, bucket_of(event.level, event.start_date), instance.hours, 1)
+    apply_deltas(deltas)
+
+
+@receiver(post_delete, sender=Participation)
+def participation_deleted(sender, instance, origin=None, **kwargs):
+    bump_data_version([instance.student_id])
+    search.unindex('participation', [instance.pk])
+
+    # При удалении мероприятия сводку уже поправил event_deleted, при удалении
+    # студента его строки сводки удаляются каскадом
+    if _deleted_with(origin, Event, Student):
+        return
+    event = Event.objects.filter(pk=instance.event_id).values_list('level', 'start_date').first()
+    if event is not None:
+        deltas = {}
+        add_delta(deltas, instance.student_id, bucket_of(*event), -instance.hours, -1)
+        apply_deltas(deltas)
+
+
+@receiver(post_save, sender=RoleRule)
+@receiver(post_delete, sender=RoleRule)
+def role_rules_changed(sender, **kwargs):
+    RoleRule.clear_cached_normalizer()
+    # Участие, сохранённое до конца транзакции в другом потоке, могло снова загрузить прежние правила
+    transaction.on_commit(RoleRule.clear_cached_normalizer)
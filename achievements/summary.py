@@ -0,0 +1,195 @@
+"""
+Сводка часов для аналитики (HoursSummary): студент × уровень × семестр.
+
+Сводка меняется приращениями там же, где меняются участия: загрузка Excel
+(importer.save_sheet) и сигналы сохранения/удаления мероприятий и участий
+(signals.py). Полный пересчёт — rebuild() и команда rebuild_hours_summary.
+
+Семестр считается по дате начала мероприятия: осенний — с сентября по январь,
+весенний — с февраля по август; учебный год обозначается годом начала.
+"""
+from datetime import date
+
+from django.db import transaction
+from django.db.models import Case, Count, IntegerField, Q, Sum, Value, When
+from django.db.models.functions import ExtractYear
+
+from .models import HoursSummary, Participation
+
+
+def semester_of(day):
+    """(учебный год, семестр) для даты."""
+    if day.month >= 9:
+        return day.year, HoursSummary.TERM_AUTUMN
+    if day.month == 1:
+        return day.year - 1, HoursSummary.TERM_AUTUMN
+    return day.year - 1, HoursSummary.TERM_SPRING
+
+
+def semester_label(academic_year, term=None):
+    label = f'{academic_year}/{academic_year + 1}'
+    if term is not None:
+        label += f', {dict(HoursSummary.TERM_CHOICES)[term].lower()} семестр'
+    return label
+
+
+def bucket_of(level, start_date):
+    """Ключ строки сводки без студента: (уровень, учебный год, семестр)."""
+    return (level, *semester_of(start_date))
+
+
+def add_delta(deltas, student_id, bucket, hours, count):
+    """Прибавляет приращение (часы, участия) к ключу (студент, *bucket)."""
+    key = (student_id, *bucket)
+    old_hours, old_count = deltas.get(key, (0, 0))
+    deltas[key] = (old_hours + hours, old_count + count)
+
+
+def apply_deltas(deltas):
+    """
+    Применяет приращения {(студент, уровень, учебный год, семестр): (часы, участия)}.
+    Строки с нулём участий удаляются. Отрицательное приращение не создаёт строку:
+    её нет, только если студент удаляется вместе со сводкой.
+    """
+    deltas = {key: delta for key, delta in deltas.items() if delta != (0, 0)}
+    if not deltas:
+        return
+
+    with transaction.atomic():
+        rows = HoursSummary.objects.select_for_update().filter(
+            student_id__in={key[0] for key in deltas},
+            level__in={key[1] for key in deltas},
+            academic_year__in={key[2] for key in deltas},
+        )
+        existing = {(row.student_id, row.level, row.academic_year, row.term): row for row in rows}
+
+        to_create, to_update, to_delete = [], [], []
+        for key, (hours, count) in deltas.items():
+            row = existing.get(key)
+            if row is None:
+                if count > 0:
+                    student_id, level, academic_year, term = key
+                    to_create.append(HoursSummary(
+                        student_id=student_id, level=level, academic_year=academic_year, term=term,
+                        hours=max(hours, 0), count=count,
+                    ))
+                continue
+            row.hours = max(row.hours + hours, 0)
+            row.count = row.count + count
+            if row.count <= 0:
+                to_delete.append(row.pk)
+            else:
+                to_update.append(row)
+
+        if to_delete:
+            HoursSummary.objects.filter(pk__in=to_delete).delete()
+        if to_update:
+            HoursSummary.objects.bulk_update(to_update, ['hours', 'count'])
+        if to_create:
+            HoursSummary.objects.bulk_create(to_create)
+
+
+def event_contributions(event):
+    """Вклад мероприятия в сводку: {студент: (часы, участия)} одним запросом."""
+    rows = (
+        Participation.objects.filter(event=event).order_by()
+        .values_list('student_id').annotate(hours=Sum('hours'), count=Count('id'))
+    )
+    return {student_id: (hours, count) for student_id, hours, count in rows}
+
+
+def summary_rows(participations):
+    """
+    Сводка по выборке участий одним запросом с группировкой в базе:
+    (студент, уровень, учебный год, семестр, часы, участия). Семестр — как в semester_of.
+    """
+    year = ExtractYear('event__start_date')
+    autumn = Q(event__start_date__month__gte=9)
+    return (
+        participations.order_by()
+        .annotate(
+            academic_year=Case(When(autumn, then=year), default=year - 1, output_field=IntegerField()),
+            term=Case(
+                When(autumn | Q(event__start_date__month=1), then=Value(HoursSummary.TERM_AUTUMN)),
+                default=Value(HoursSummary.TERM_SPRING),
+                output_field=IntegerField(),
+            ),
+        )
+        .values_list('student_id', 'event__level', 'academic_year', 'term')
+        .annotate(hours=Sum('hours'), count=Count('id'))
+    )
+
+
+def rebuild(student_ids=None):
+    """Пересчитывает сводку целиком (или для студентов из списка). Возвращает число строк."""
+    participations = Participation.objects.all()
+    summaries = HoursSummary.objects.all()
+    if student_ids is not None:
+        student_ids = list(student_ids)
+        participations = participations.filter(student_id__in=student_ids)
+        summaries = summaries.filter(student_id__in=student_ids)
+
+    with transaction.atomic():
+        summaries.delete()
+        created = HoursSummary.objects.bulk_create(
+            [
+                HoursSummary(
+                    student_id=student_id, level=level, academic_year=academic_year, term=term,
+                    hours=hours, count=count,
+                )
+                for student_id, level, academic_year, term, hours, count in summary_rows(participations)
+            ],
+            batch_size=1000,
+        )
+    return len(created)
+
+
+def analytics(academic_year=None, term=None, limit=20):
+    """
+    Данные страницы аналитики — только из сводки. academic_year=None — текущий
+    учебный год (или последний, за который есть данные); term=None — весь год.
+    """
+    years = list(
+        HoursSummary.objects.order_by('-academic_year').values_list('academic_year', flat=True).distinct()
+    )
+    if academic_year is None:
+        academic_year = semester_of(date.today())[0]
+        if years and academic_year not in years:
+            academic_year = years[0]
+
+    period = HoursSummary.objects.filter(academic_year=academic_year)
+    if term is not None:
+        period = period.filter(term=term)
+
+    semesters = (
+        HoursSummary.objects.order_by('academic_year', 'term')
+        .values_list('academic_year', 'term').annotate(hours=Sum('hours'), count=Sum('count'))
+    )
+    levels = period.order_by().values_list('level').annotate(hours=Sum('hours'), count=Sum('count'))
+    level_display = dict(HoursSummary._meta.get_field('level').choices)
+    top = (
+        period.values_list('student_id', 'student__full_name', 'student__group')
+        .annotate(hours=Sum('hours'), count=Sum('count'))
+        .order_by('-hours', 'student__full_name')[:limit]
+    )
+    return {
+        'academic_year': academic_year,
+        'term': term,
+        'label': semester_label(academic_year, term),
+        'years': [{'academic_year': year, 'label': semester_label(year)} for year in years],
+        'semesters': [
+            {'academic_year': year, 'term': term_, 'label': semester_label(year, term_), 'hours': hours, 'count': count}
+            for year, term_, hours, count in semesters
+        ],
+        'levels': sorted(
+            (
+                {'level': level, 'level_display': level_display.get(level, level), 'hours': hours, 'count': count}
+                for level, hours, count in levels
+            ),
+            key=lambda item: -item['hours'],
+        ),
+        'top': [
+            {'student_id': student_id, 'full_name': full_name, 'group': group, 'hours': hours, 'count': count}
+            for student_id, full_name, group, hours, count in top
+        ],
+    }
@@ -1,3 +1,1499 @@
-from django.test import TestCase
+import asyncio
+import io
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import warnings
+from datetime import date, timedelta
+from unittest import mock
+from urllib.parse import quote
 
-# Create your tests here.
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.paginator import UnorderedObjectListWarning
+from django.db import connection, IntegrityError
+from django.db.models import F
+from django.db.migrations.executor import MigrationExecutor
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from . import jobs, metrics, offload, search
+from .autocomplete import MAX_LIMIT, search_students
+from .benchmark import generate_workbook
+from .export import COLUMNS, acsv_stream, csv_stream, export_queryset
+from .importer import StudentIndex, import_workbook, save_sheet, validate_workbook
+from .jobs import Heartbeat, JobLost, claim_next_job, create_job, recover_stale_jobs, run_job
+from .middleware import MetricsMiddleware
+from .models import Student, Event, Participation, HoursSummary, ImportJob, RoleRule
+from .parsing import (
+    MAX_HOURS, match_header, match_level, normalize_name, parse_date_range, parse_participants, parse_workbook,
+)
+from .reporting.cache import get_report_cache
+from .reporting.data import batch_report_data, report_data
+from .summary import rebuild as rebuild_summary
+
+
+class QueryPlanTests(TestCase):
+    """Горячие выборки загрузки и отчёта идут по индексам, а не полным сканированием"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = Student.objects.create(full_name='Иванов Иван', group='1 курс')
+        events = Event.objects.bulk_create([
+            Event(name=f'Мероприятие {i}', level='course', start_date=date(2025, 1, 1 + i % 28),
+                  end_date=date(2025, 1, 1 + i % 28))
+            for i in range(50)
+        ])
+        Participation.objects.bulk_create([
+            Participation(student=cls.student, event=event, hours=2) for event in events
+        ])
+
+    def explain(self, queryset):
+        if connection.vendor == 'postgresql':
+            # На маленькой тестовой таблице планировщик иначе выбрал бы seq scan
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        return queryset.explain()
+
+    def assertIndexScan(self, queryset, table, condition=''):
+        """
+        Таблица читается по индексу. SQLite: «SEARCH <table> USING ... INDEX (<condition>)»
+        (имена уникальных ограничений там sqlite_autoindex_*), PostgreSQL: Index/Bitmap
+        Index Scan и ни одного Seq Scan.
+        """
+        plan = self.explain(queryset)
+        if connection.vendor == 'sqlite':
+            self.assertRegex(plan, rf'SEARCH {table} USING (COVERING )?INDEX \w+ \({re.escape(condition)}', plan)
+            self.assertIsNone(re.search(r'SCAN achievements_\w+$', plan, re.MULTILINE), plan)
+        else:
+            self.assertRegex(plan, rf'(Index (Only )?Scan using \w+ on {table}|Bitmap Heap Scan on {table})', plan)
+            self.assertNotIn('Seq Scan', plan)
+
+    def test_student_lookup_by_full_name(self):
+        self.assertIndexScan(
+            Student.objects.filter(full_name='Иванов Иван'), 'achievements_student', 'full_name=?',
+        )
+        self.assertIndexScan(
+            Student.objects.filter(full_name__in=['Иванов Иван', 'Петров']), 'achievements_student', 'full_name=?',
+        )
+
+    def test_student_prefix_search(self):
+        self.assertIndexScan(search_students('Иван'), 'achievements_student', 'name_key>? AND name_key<?')
+
+    def test_event_lookup_by_natural_key(self):
+        queryset = Event.objects.filter(name='Мероприятие 1', start_date=date(2025, 1, 2), end_date=date(2025, 1, 2))
+        self.assertIndexScan(queryset, 'achievements_event', 'name=? AND start_date=? AND end_date=?')
+
+    def test_event_lookup_by_date_range(self):
+        queryset = Event.objects.filter(start_date__range=[date(2025, 1, 1), date(2025, 1, 10)])
+        self.assertIndexScan(queryset, 'achievements_event', 'start_date>? AND start_date<?')
+
+    def test_report_participations_lookup(self):
+        queryset = Participation.objects.filter(
+            student=self.student,
+            event__start_date__range=[date(2025, 1, 1), date(2025, 1, 10)],
+        ).order_by('event__start_date')
+        self.assertIndexScan(queryset, 'achievements_participation', 'student_id=?')
+
+    def test_event_natural_key_is_unique(self):
+        with self.assertRaises(IntegrityError):
+            Event.objects.create(name='Мероприятие 1', level='faculty',
+                                 start_date=date(2025, 1, 2), end_date=date(2025, 1, 2))
+
+
+class ReportDataTests(TestCase):
+    """Число запросов отчёта не зависит от числа участий"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.events = Event.objects.bulk_create([
+            Event(name=f'Мероприятие {i}', level='course' if i % 3 else 'faculty',
+                  start_date=date(2025, 1 + i % 12, 1), end_date=date(2025, 1 + i % 12, 2))
+            for i in range(40)
+        ])
+        cls.one = Student.objects.create(full_name='Иванов Иван', group='1 курс')
+        cls.many = Student.objects.create(full_name='Петров Пётр', group='1 курс')
+        Participation.objects.bulk_create(
+            [Participation(student=cls.one, event=cls.events[0], role='участник', role_normalized='участник', hours=2)]
+            + [
+                Participation(student=cls.many, event=event, role='волонтёр', role_normalized='волонтёр', hours=1 + i % 4)
+                for i, event in enumerate(cls.events)
+            ]
+        )
+        cls.staff = User.objects.create_user('staff', password='x', is_staff=True)
+
+    def test_report_data_query_count(self):
+        for student in (self.one, self.many):
+            with self.assertNumQueries(2):
+                report_data(student.pk, date(2025, 1, 1), date(2025, 12, 31))
+
+    def test_report_data_totals(self):
+        data = report_data(self.many.pk, date(2025, 1, 1), date(2025, 12, 31))
+        self.assertEqual(len(data['rows']), 40)
+        self.assertEqual(data['total_hours'], sum(1 + i % 4 for i in range(40)))
+        self.assertEqual(
+            data['levels'],
+            [('Курсовой', 26, sum(1 + i % 4 for i in range(40) if i % 3)),
+             ('Факультетский', 14, sum(1 + i % 4 for i in range(40) if not i % 3))],
+        )
+        self.assertEqual([row[0] for row in data['rows']], sorted(row[0] for row in data['rows']))
+
+    def test_batch_report_data_query_count(self):
+        with self.assertNumQueries(2):
+            reports = batch_report_data(date(2025, 1, 1), date(2025, 12, 31), '1 курс')
+        self.assertEqual([student_id for student_id, _, _ in reports], [self.one.pk, self.many.pk])
+        self.assertEqual(reports[0][2]['total_hours'], 2)
+
+    @override_settings(ACHIEVEMENTS_REPORT_CACHE_MAX_BYTES=0)
+    def test_report_view_query_count(self):
+        self.client.force_login(self.staff)
+        counts = []
+        for student in (self.one, self.many):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post('/report/', {
+                    'student': student.pk, 'date_from': '2025-01-01', 'date_to': '2025-12-31',
+                })
+                b''.join(response.streaming_content)
+            self.assertEqual(response['Content-Type'], 'application/pdf')
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+
+class StudentSearchTests(TestCase):
+    """Подсказки для поля «Студент» вместо списка всех студентов"""
+
+    @classmethod
+    def setUpTestData(cls):
+        Student.objects.bulk_create([
+            Student(full_name=f'Студент {i}', group='1 курс', name_key=f'студент {i}') for i in range(120)
+        ])
+        cls.fedorov = Student.objects.create(full_name='Фёдоров Семён', group='2 курс')
+        cls.staff = User.objects.create_user('staff', password='x', is_staff=True)
+
+    def setUp(self):
+        self.client.force_login(self.staff)
+
+    def test_search_by_prefix(self):
+        response = self.client.get('/students/search/', {'q': 'федоров  СЕМ'})
+        self.assertEqual(response.json(), {'results': [{'id': self.fedorov.pk, 'text': 'Фёдоров Семён (2 курс)'}]})
+
+    def test_search_limit(self):
+        self.assertEqual(len(self.client.get('/students/search/', {'q': 'студент 1', 'limit': 5}).json()['results']), 5)
+        self.assertEqual(len(self.client.get('/students/search/', {'q': 'студент', 'limit': 1000}).json()['results']), MAX_LIMIT)
+        self.assertEqual(self.client.get('/students/search/', {'q': ' '}).json(), {'results': []})
+
+    def test_report_form_does_not_list_students(self):
+        response = self.client.get('/report/')
+        self.assertNotContains(response, 'Студент 1')
+        self.assertNotContains(response, '<option')
+
+
+class AdminChangelistTests(TestCase):
+    """Список участий в админке: число запросов не зависит от числа студентов и мероприятий"""
+
+    @classmethod
+    def setUpTestData(cls):
+        students = Student.objects.bulk_create([
+            Student(full_name=f'Студент {i}', group=f'{i % 4} курс', name_key=f'студент {i}') for i in range(60)
+        ])
+        events = Event.objects.bulk_create([
+            Event(name=f'Мероприятие {i}', level='course', start_date=date(2025, 10, i + 1), end_date=date(2025, 10, i + 1))
+            for i in range(20)
+        ])
+        Participation.objects.bulk_create([
+            Participation(student=student, event=events[i % 20], role='Участник', hours=2)
+            for i, student in enumerate(students)
+        ])
+        cls.student = students[3]
+        cls.admin = User.objects.create_superuser('admin', password='x')
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def test_participation_changelist(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/admin/achievements/participation/')
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(len(queries), 5)
+        # Фильтры не выводят всех студентов и все мероприятия списком
+        self.assertNotContains(response, 'Мероприятие 19</a>')
+
+    def test_participation_filter_by_student(self):
+        response = self.client.get('/admin/achievements/participation/', {'student__id__exact': self.student.pk})
+        self.assertContains(response, f'<option value="{self.student.pk}" selected>{self.student}</option>', html=True)
+        self.assertEqual(response.context['cl'].result_count, 1)
+
+    def test_student_group_filter(self):
+        response = self.client.get('/admin/achievements/student/', {'group__exact': '1 курс'})
+        self.assertEqual(response.context['cl'].result_count, 15)
+        self.assertContains(response, '<option value="3 курс">', html=True)
+
+    def test_autocomplete_is_ordered(self):
+        for field_name, expected in (('student', 'Студент 0'), ('event', 'Мероприятие 19')):
+            with self.subTest(field_name), warnings.catch_warnings():
+                warnings.simplefilter('error', UnorderedObjectListWarning)
+                response = self.client.get('/admin/autocomplete/', {
+                    'app_label': 'achievements', 'model_name': 'participation', 'field_name': field_name,
+                })
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response.json()['results'][0]['text'].startswith(f'{expected} ('))
+
+
+class SearchTests(TestCase):
+    """Полнотекстовый индекс следует за сохранением, загрузкой и удалением"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = Student.objects.create(full_name='Фёдоров Семён', group='2 курс')
+        cls.event = Event.objects.create(
+            name='Олимпиада по химии', level='course', start_date=date(2025, 10, 1), end_date=date(2025, 10, 1),
+        )
+        cls.participation = Participation.objects.create(
+            student=cls.student, event=cls.event, role='главныйорганизатор', hours=3,
+        )
+        cls.staff = User.objects.create_user('staff', password='x', is_staff=True)
+
+    def found(self, kind, query):
+        return [obj.pk for obj in search.search(kind, query)]
+
+    def test_search_by_word_prefixes(self):
+        self.assertEqual(self.found('student', 'федоров сем'), [self.student.pk])
+        self.assertEqual(self.found('participation', 'семен олимп'), [self.participation.pk])
+        # Роль ищется и в исходном, и в нормализованном виде
+        self.assertEqual(self.found('participation', 'главный организатор'), [self.participation.pk])
+        self.assertEqual(self.found('participation', 'федоров конференция'), [])
+
+    def test_index_follows_changes(self):
+        self.event.name = 'Конференция'
+        self.event.save()
+        self.assertEqual(self.found('participation', 'олимпиада'), [])
+        self.assertEqual(self.found('participation', 'конференция семен'), [self.participation.pk])
+
+        self.participation.delete()
+        self.student.delete()
+        self.assertEqual(self.found('participation', 'конференция'), [])
+        self.assertEqual(self.found('student', 'федоров'), [])
+
+    def test_import_updates_index(self):
+        save_sheet(
+            {'name': 'Субботник', 'level': 'course', 'start_date': date(2025, 11, 1),
+             'end_date': date(2025, 11, 1), 'is_first_time': False},
+            [('Сидоров Артём', '1 курс', 'волонтёр', 2), ('Фёдоров Семён', '3 курс', 'участник', 1)],
+        )
+        self.assertEqual(len(self.found('participation', 'субботник')), 2)
+        self.assertEqual(self.found('student', '3 курс'), [self.student.pk])
+        self.assertEqual(len(self.found('student', 'сидоров артем')), 1)
+
+    def test_admin_and_endpoint(self):
+        self.client.force_login(User.objects.create_superuser('admin', password='x'))
+        response = self.client.get('/admin/achievements/participation/', {'q': 'федоров олимп'})
+        self.assertEqual(response.context['cl'].result_count, 1)
+
+        self.client.force_login(self.staff)
+        response = self.client.get('/search/', {'q': 'семен', 'kind': 'student'})
+        self.assertEqual(response.json(), {'student': [{'id': self.student.pk, 'text': 'Фёдоров Семён (2 курс)'}]})
+        self.assertEqual(self.client.get('/search/', {'q': 'x', 'kind': 'group'}).status_code, 400)
+
+
+@override_settings(ACHIEVEMENTS_API_TOKENS=['secret'])
+class ApiTests(TestCase):
+    """JSON API: страницы по курсору и 304 для неизменившихся данных"""
+
+    @classmethod
+    def setUpTestData(cls):
+        Student.objects.bulk_create([
+            Student(full_name=f'Студент {i}', group=f'{i % 2} курс', name_key=f'студент {i}') for i in range(30)
+        ])
+        cls.student = Student.objects.create(full_name='Фёдоров Семён', group='2 курс')
+
+    def get(self, path, params=None, **headers):
+        return self.client.get(path, params, HTTP_AUTHORIZATION='Bearer secret', **headers)
+
+    def test_auth(self):
+        self.assertEqual(self.client.get('/api/students/').status_code, 401)
+        self.assertEqual(self.client.get('/api/students/', HTTP_AUTHORIZATION='Bearer wrong').status_code, 401)
+        self.assertEqual(self.get('/api/students/').status_code, 200)
+
+    def test_cursor_pagination(self):
+        ids = []
+        url = '/api/students/?group=1+курс&limit=4'
+        while url:
+            page = self.get(url).json()
+            ids += [row['id'] for row in page['results']]
+            url = page['next']
+        self.assertEqual(ids, list(Student.objects.filter(group='1 курс').order_by('pk').values_list('pk', flat=True)))
+        self.assertEqual(self.get('/api/students/', {'cursor': '!'}).status_code, 400)
+
+    def test_filters(self):
+        response = self.get('/api/students/', {'full_name': 'федоров  СЕМЁН'})
+        self.assertEqual(response.json()['results'], [{'id': self.student.pk, 'full_name': 'Фёдоров Семён', 'group': '2 курс'}])
+        self.assertEqual(self.get('/api/events/', {'level': 'unknown'}).status_code, 400)
+
+    def test_not_modified_until_data_changes(self):
+        response = self.get('/api/students/')
+        with CaptureQueriesContext(connection) as queries:
+            cached = self.get('/api/students/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(len(queries), 1)
+
+        Event.objects.create(name='Субботник', level='course', start_date=date(2025, 11, 1), end_date=date(2025, 11, 1))
+        self.assertEqual(self.get('/api/students/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+
+@override_settings(ACHIEVEMENTS_METRICS_DIR='', ACHIEVEMENTS_METRICS_TOKENS=['scrape'], ACHIEVEMENTS_REPORT_CACHE_MAX_BYTES=0)
+class MetricsTests(TestCase):
+    """Метрики запросов и этапов построения отчёта в /metrics"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = Student.objects.create(full_name='Иванов Иван', group='1 курс')
+        event = Event.objects.create(name='Субботник', level='course', start_date=date(2025, 10, 1), end_date=date(2025, 10, 1))
+        Participation.objects.create(student=cls.student, event=event, role='Участник', hours=2)
+        cls.staff = User.objects.create_user('staff', password='x', is_staff=True)
+
+    def scrape(self):
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape')
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def count(self, text, series):
+        for line in text.splitlines():
+            if line.startswith(series + ' '):
+                return float(line.rsplit(' ', 1)[1])
+        return 0
+
+    def test_requires_token_or_staff(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code, 401)
+
+    def test_report_request_and_spans(self):
+        before = self.scrape()
+        self.client.force_login(self.staff)
+        response = self.client.post('/report/', {'student': self.student.pk, 'date_from': '2025-01-01', 'date_to': '2025-12-31'})
+        size = len(b''.join(response.streaming_content))
+        after = self.scrape()
+
+        series = 'achievements_request_duration_seconds_count{method="POST",view="report"}'
+        self.assertEqual(self.count(after, series) - self.count(before, series), 1)
+        series = 'achievements_response_size_bytes_sum{view="report"}'
+        self.assertEqual(self.count(after, series) - self.count(before, series), size)
+        for span in ('report_data', 'report_layout', 'report_output'):
+            series = f'achievements_span_duration_seconds_count{{span="{span}"}}'
+            self.assertEqual(self.count(after, series) - self.count(before, series), 1)
+        self.assertIn('# TYPE achievements_request_db_queries histogram', after)
+
+
+class StartupImportTests(SimpleTestCase):
+    """Процесс, загрузивший приложение и urls.py, не импортирует reportlab, pandas и openpyxl"""
+
+    HEAVY_MODULES = ('reportlab', 'pandas', 'openpyxl')
+
+    def loaded_modules(self, code):
+        # Отдельный процесс: в процессе тестов эти модули уже загружены другими тестами
+        script = (
+            'import os, sys, django\n'
+            "os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')\n"
+            'django.setup()\n'
+            'import config.urls\n'
+            f'{code}\n'
+            f'print(" ".join(m for m in {self.HEAVY_MODULES!r} if m in sys.modules))\n'
+        )
+        result = subprocess.run(
+            [sys.executable, '-c', script], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+        )
+        return result.stdout.split()
+
+    def test_urlconf_does_not_import_heavy_modules(self):
+        self.assertEqual(self.loaded_modules('import django.contrib.admin'), [])
+
+    def test_warm_up_loads_reports_and_parsers(self):
+        loaded = self.loaded_modules('from achievements.warmup import warm_up; warm_up()')
+        self.assertIn('reportlab', loaded)
+        self.assertIn('openpyxl', loaded)
+
+
+@override_settings(
+    ACHIEVEMENTS_OFFLOAD_WORKERS=0, ACHIEVEMENTS_OFFLOAD_QUEUE=0, ACHIEVEMENTS_REPORT_CACHE_MAX_BYTES=0,
+    ACHIEVEMENTS_METRICS_DIR='',
+)
+class AsyncViewTests(TestCase):
+    """Асинхронные представления: 503 при занятом пуле вёрстки, потоковая выгрузка под ASGI"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = Student.objects.create(full_name='Иванов Иван', group='1 курс')
+        event = Event.objects.create(name='Субботник', level='course', start_date=date(2025, 10, 1), end_date=date(2025, 10, 1))
+        Participation.objects.create(student=cls.student, event=event, role='Участник', hours=2)
+        cls.staff = User.objects.create_user('staff', password='x', is_staff=True)
+
+    async def test_report_busy_when_pool_saturated(self):
+        await self.async_client.aforce_login(self.staff)
+        release = threading.Event()
+        # Единственное место пула (0 процессов — поток, очередь 0) занято задачей
+        blocker = asyncio.ensure_future(offload.run(release.wait))
+        await asyncio.sleep(0.05)
+        try:
+            with self.assertRaises(offload.Saturated):
+                await offload.run(int)
+            response = await self.async_client.post(
+                '/report/', {'student': self.student.pk, 'date_from': '2025-01-01', 'date_to': '2025-12-31'},
+            )
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response['Retry-After'], str(offload.RETRY_AFTER_SECONDS))
+        finally:
+            release.set()
+            await blocker
+
+        response = await self.async_client.post(
+            '/report/', {'student': self.student.pk, 'date_from': '2025-01-01', 'date_to': '2025-12-31'},
+        )
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+
+    def db_queries(self, view):
+        # [корзины..., сумма, число наблюдений] гистограммы SQL-запросов представления
+        return metrics.collect().get(('achievements_request_db_queries', (('view', view),)), [0, 0])[-2]
+
+    async def test_metrics_middleware_async(self):
+        async def get_response(request):
+            return HttpResponse('ok')
+
+        middleware = MetricsMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(middleware))
+        before = metrics.collect().get(('achievements_response_size_bytes', (('view', 'unresolved'),)), [0, 0])[-1]
+        response = await middleware(RequestFactory().get('/x/'))
+        self.assertEqual(response.content, b'ok')
+        after = metrics.collect()[('achievements_response_size_bytes', (('view', 'unresolved'),))]
+        self.assertEqual(after[-1] - before, 1)
+
+        self.assertFalse(iscoroutinefunction(MetricsMiddleware(lambda request: HttpResponse('ok'))))
+
+    def test_asgi_middleware_chain_is_async(self):
+        # Так MIDDLEWARE выглядит с ACHIEVEMENTS_ASGI=True: без синхронного WhiteNoise вся
+        # цепочка выполняется в цикле событий
+        asgi_middleware = [name for name in settings.MIDDLEWARE if 'whitenoise' not in name]
+        with override_settings(MIDDLEWARE=asgi_middleware):
+            self.assertTrue(iscoroutinefunction(ASGIHandler()._middleware_chain))
+
+    def test_asgi_settings_follow_env_var(self):
+        script = (
+            'import os\n'
+            'import config.asgi\n'
+            'from django.conf import settings\n'
+            "print(any('whitenoise' in name for name in settings.MIDDLEWARE), "
+            "settings.DATABASES['default']['CONN_MAX_AGE'], os.environ.get('ACHIEVEMENTS_ASGI'))\n"
+        )
+        env = {name: value for name, value in os.environ.items() if name != 'DATABASE_CONN_MAX_AGE'}
+        env.pop('DJANGO_SETTINGS_MODULE', None)
+        for asgi, expected in (('True', ['False', '0', 'True']), (None, ['True', '600', 'None'])):
+            if asgi is not None:
+                env['ACHIEVEMENTS_ASGI'] = asgi
+            else:
+                env.pop('ACHIEVEMENTS_ASGI', None)
+            with self.subTest(ACHIEVEMENTS_ASGI=asgi):
+                # Настройки задаёт только переменная окружения (web_asgi в Procfile);
+                # config.asgi окружение не меняет
+                result = subprocess.run(
+                    [sys.executable, '-c', script], cwd=settings.BASE_DIR, env=env,
+                    capture_output=True, text=True, check=True,
+                )
+                self.assertEqual(result.stdout.split(), expected)
+
+    async def test_csv_export_streams_asynchronously(self):
+        await self.async_client.aforce_login(self.staff)
+        before = self.db_queries('export')
+        response = await self.async_client.get('/export/', {'format': 'csv'})
+        self.assertTrue(response.is_async)
+        content = b''.join([chunk async for chunk in response.streaming_content]).decode()
+        # Запросы async ORM (в потоках sync_to_async) посчитаны в метриках запроса
+        self.assertGreater(self.db_queries('export') - before, 0)
+
+        expected = await sync_to_async(lambda: ''.join(csv_stream(export_queryset())))()
+        self.assertEqual(content, expected)
+        self.assertIn('Иванов Иван;1 курс;Субботник', content)
+
+
+def make_workbook(sheets):
+    """
+    .xlsx в памяти: sheets — {имя листа: (мероприятие, строки участников)}, где
+    мероприятие — значения «Название | Уровень | Даты | Впервые».
+    """
+    import openpyxl
+
+    workbook = openpyxl.Workbook()
+    workbook.remove(workbook.active)
+    for name, (event, rows) in sheets.items():
+        worksheet = workbook.create_sheet(name)
+        worksheet.append(['Название мероприятия', 'Уровень', 'Даты проведения', 'Организовано впервые'])
+        worksheet.append(list(event))
+        worksheet.append([])
+        worksheet.append(['ФИО', 'Группа', 'Роль', 'Часы'])
+        for row in rows:
+            worksheet.append(list(row))
+    out = io.BytesIO()
+    workbook.save(out)
+    out.seek(0)
+    return out
+
+
+SUBBOTNIK = ('Субботник', 'Курсовой', '01.10.2025 - 02.10.2025', 'да')
+
+
+@override_settings(ACHIEVEMENTS_METRICS_DIR='')
+class ImportWorkbookTests(TestCase):
+    """Загрузка файла: счётчики и итоги по листам"""
+
+    def test_reimport_counts_and_summary(self):
+        rows = [
+            ('Иванов Иван', '1 курс', 'Участник', 2),
+            ('Петров Пётр', '2 курс', 'Ведущий', '3 ч.'),
+            # Повтор студента на листе (другое написание) — обновление, а не новое участие
+            ('иванов  иван', '1 курс', 'Волонтёр', 4),
+        ]
+
+        result = import_workbook(make_workbook({'Лист1': (SUBBOTNIK, rows)}), workers=1)
+        self.assertIsNone(result.read_error)
+        self.assertEqual((result.total_sheets, result.success_sheets, result.error_sheets), (1, 1, []))
+        self.assertEqual(
+            (result.events_created, result.participations_created, result.participations_updated), (1, 2, 1),
+        )
+        self.assertEqual(result.sheet_results, ['Лист "Лист1": Субботник — добавлено 2, обновлено 1'])
+        self.assertEqual(
+            sorted(Participation.objects.values_list('student__full_name', 'role', 'hours')),
+            [('Иванов Иван', 'Волонтёр', 4), ('Петров Пётр', 'Ведущий', 3)],
+        )
+
+        result = import_workbook(make_workbook({'Лист1': (SUBBOTNIK, rows)}), workers=1, force=True)
+        self.assertEqual(
+            (result.events_created, result.participations_created, result.participations_updated), (0, 0, 3),
+        )
+        self.assertEqual(result.sheet_results, ['Лист "Лист1": Субботник — добавлено 0, обновлено 3'])
+        self.assertEqual((Student.objects.count(), Event.objects.count(), Participation.objects.count()), (2, 1, 2))
+
+    def test_unchanged_sheet_skipped_unless_forced(self):
+        rows = [('Иванов Иван', '1 курс', 'Участник', 2)]
+        import_workbook(make_workbook({'Лист1': (SUBBOTNIK, rows)}), workers=1)
+        hours = Participation.objects.get().hours
+
+        # Тот же лист без изменений — в базу ничего не пишется
+        with CaptureQueriesContext(connection) as queries:
+            result = import_workbook(make_workbook({'Лист1': (SUBBOTNIK, rows)}), workers=1)
+        self.assertFalse([q for q in queries if not q['sql'].startswith('SELECT')])
+        self.assertEqual((result.success_sheets, result.unchanged_sheets), (1, 1))
+        self.assertEqual(result.sheet_results, ['Лист "Лист1": Субботник — без изменений'])
+
+        # Лист изменился — загружается
+        changed = [('Иванов Иван', '1 курс', 'Участник', 6)]
+        result = import_workbook(make_workbook({'Лист1': (SUBBOTNIK, changed)}), workers=1)
+        self.assertEqual((result.unchanged_sheets, result.participations_updated), (0, 1))
+        self.assertNotEqual(Participation.objects.get().hours, hours)
+
+        # force загружает и неизменный лист (например, после ручной правки в админке)
+        Participation.objects.update(hours=1)
+        result = import_workbook(make_workbook({'Лист1': (SUBBOTNIK, changed)}), workers=1, force=True)
+        self.assertEqual((result.unchanged_sheets, result.participations_updated), (0, 1))
+        self.assertEqual(Participation.objects.get().hours, 6)
+
+    def test_save_sheet_twice(self):
+        event_fields = {
+            'name': 'Субботник', 'level': 'course', 'start_date': date(2025, 10, 1),
+            'end_date': date(2025, 10, 1), 'is_first_time': False,
+        }
+        participants = [('Иванов Иван', '1 курс', 'Участник', 2)]
+        event, created, created_count, updated_count = save_sheet(event_fields, participants)
+        self.assertEqual((created, created_count, updated_count), (True, 1, 0))
+
+        participants = [('Иванов Иван', '1 курс', 'Участник', 5), ('Петров Пётр', '', 'Участник', 1)]
+        again, created, created_count, updated_count = save_sheet(event_fields, participants)
+        self.assertEqual((again.pk, created, created_count, updated_count), (event.pk, False, 1, 1))
+        self.assertEqual(Participation.objects.get(student__full_name='Иванов Иван').hours, 5)
+
+
+@override_settings(ACHIEVEMENTS_METRICS_DIR='', ACHIEVEMENTS_IMPORT_STALE_SECONDS=600, ACHIEVEMENTS_IMPORT_MAX_ATTEMPTS=3)
+class ImportJobTests(TestCase):
+    """Очередь фоновых загрузок: постановка, статус, обработка воркером, брошенные задачи"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('staff', password='x', is_staff=True)
+
+    def upload(self, rows):
+        data = make_workbook({'Лист1': (SUBBOTNIK, rows)}).getvalue()
+        return SimpleUploadedFile('участия.xlsx', data)
+
+    def test_upload_status_and_worker(self):
+        self.client.force_login(self.staff)
+        response = self.client.post(
+            '/upload/', {'file': self.upload([('Иванов Иван', '1 курс', 'Участник', 2)])},
+            headers={'Accept': 'application/json'},
+        )
+        self.assertEqual(response.status_code, 202)
+        status_url = response.json()['status_url']
+        status = self.client.get(status_url).json()
+        self.assertEqual((status['status'], status['sheets_done']), (ImportJob.STATUS_PENDING, 0))
+
+        call_command('process_imports', once=True, workers=1, stdout=io.StringIO())
+        status = self.client.get(status_url).json()
+        self.assertEqual(status['status'], ImportJob.STATUS_DONE)
+        self.assertEqual(
+            (status['attempts'], status['sheets_total'], status['sheets_done'], status['participations_created']),
+            (1, 1, 1, 1),
+        )
+        self.assertEqual(status['sheet_results'], ['Лист "Лист1": Субботник — добавлено 1, обновлено 0'])
+        self.assertEqual(ImportJob.objects.get().data, b'')
+        self.assertEqual(Participation.objects.count(), 1)
+
+        self.client.logout()
+        self.assertEqual(self.client.get(status_url).status_code, 302)
+
+    def test_claim_takes_oldest_job_once(self):
+        first = create_job(self.upload([]))
+        second = create_job(self.upload([]))
+        self.assertEqual(claim_next_job().pk, first.pk)
+        self.assertEqual(claim_next_job().pk, second.pk)
+        self.assertIsNone(claim_next_job())
+
+    def test_job_taken_over_is_not_overwritten(self):
+        job = create_job(self.upload([('Иванов Иван', '1 курс', 'Участник', 2)]))
+        job = claim_next_job()
+        # Пока воркер стоял, задачу вернули в очередь и взял другой воркер
+        ImportJob.objects.filter(pk=job.pk).update(attempts=2)
+        with self.assertRaises(JobLost):
+            run_job(job, workers=1)
+        row = ImportJob.objects.get(pk=job.pk)
+        self.assertEqual((row.status, row.attempts, row.sheets_total), (ImportJob.STATUS_RUNNING, 2, 0))
+        self.assertNotEqual(bytes(row.data), b'')
+        self.assertFalse(Participation.objects.exists())
+
+    def test_job_taken_over_mid_file_stops(self):
+        rows = [('Иванов Иван', '1 курс', 'Участник', 2)]
+        concert = ('Концерт', 'Факультетский', '05.10.2025', 'нет')
+        data = make_workbook({'Лист1': (SUBBOTNIK, rows), 'Лист2': (concert, rows)}).getvalue()
+        create_job(SimpleUploadedFile('участия.xlsx', data))
+        job = claim_next_job()
+
+        def taken_over(*args, **kwargs):
+            # Задачу забрали после того, как воркер начал загрузку
+            ImportJob.objects.filter(pk=job.pk).update(attempts=F('attempts') + 1)
+            return real_import(*args, **kwargs)
+
+        real_import = jobs.import_workbook
+        with mock.patch.object(jobs, 'import_workbook', taken_over), self.assertRaises(JobLost):
+            run_job(job, workers=1)
+        # Первый лист записан до проверки, второй уже не загружался
+        self.assertEqual(list(Event.objects.values_list('name', flat=True)), ['Субботник'])
+        row = ImportJob.objects.get(pk=job.pk)
+        self.assertEqual((row.status, row.sheets_done), (ImportJob.STATUS_RUNNING, 0))
+
+    def test_stale_job_requeued_then_failed(self):
+        job = create_job(self.upload([('Иванов Иван', '1 курс', 'Участник', 2)]))
+        claim_next_job()
+        # Воркер жив — задачу не трогаем
+        self.assertEqual(recover_stale_jobs(), (0, 0))
+
+        # Воркер пропал посреди файла
+        long_ago = timezone.now() - timedelta(hours=1)
+        ImportJob.objects.filter(pk=job.pk).update(heartbeat_at=long_ago, sheets_done=1)
+        self.assertEqual(recover_stale_jobs(), (1, 0))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.sheets_done, job.attempts), (ImportJob.STATUS_PENDING, 0, 1))
+
+        # Повторная попытка завершается, как обычно
+        call_command('process_imports', once=True, workers=1, stdout=io.StringIO())
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (ImportJob.STATUS_DONE, 2))
+
+        # Задача, трижды брошенная воркером, помечается ошибкой
+        job = create_job(self.upload([]))
+        ImportJob.objects.filter(pk=job.pk).update(status=ImportJob.STATUS_RUNNING, started_at=long_ago, attempts=3)
+        self.assertEqual(recover_stale_jobs(), (0, 1))
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImportJob.STATUS_FAILED)
+        self.assertEqual(job.error, 'Воркер не завершил загрузку за 3 попыток')
+        self.assertEqual(job.data, b'')
+
+
+class ParseWorkbookTests(SimpleTestCase):
+    """Разбор книги в пуле процессов совпадает с разбором без пула"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        fd, cls.path = tempfile.mkstemp(suffix='.xlsx')
+        os.close(fd)
+        generate_workbook(cls.path, sheets=5, rows=10)
+
+    @classmethod
+    def tearDownClass(cls):
+        os.unlink(cls.path)
+        super().tearDownClass()
+
+    def test_parallel_matches_serial(self):
+        serial = list(parse_workbook(self.path, 'openpyxl'))
+        self.assertEqual([name for name, _, _ in serial], [f'Лист{i}' for i in range(1, 6)])
+        # 5 листов на 2 процесса: части из 3 и 2 листов
+        self.assertEqual(list(parse_workbook(self.path, 'openpyxl', workers=2)), serial)
+
+    @override_settings(ACHIEVEMENTS_EXCEL_READER='pandas')
+    def test_pandas_reader_matches_openpyxl(self):
+        streaming = list(parse_workbook(self.path, 'openpyxl'))
+        self.assertEqual([error for _, _, error in streaming], [None] * 5)
+        # reader=None — читатель из ACHIEVEMENTS_EXCEL_READER
+        self.assertEqual(list(parse_workbook(self.path, None)), streaming)
+
+
+class MergeDuplicateEventsMigrationTests(TransactionTestCase):
+    """0006 сливает дубли мероприятий, не теряя совпавших участий"""
+
+    before = [('achievements', '0005_importjob_dry_run')]
+    after = [('achievements', '0006_lookup_indexes')]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        self.migrate(executor.loader.graph.leaf_nodes())
+        super().tearDown()
+
+    def test_duplicates_merged(self):
+        apps = self.migrate(self.before)
+        Student = apps.get_model('achievements', 'Student')
+        Event = apps.get_model('achievements', 'Event')
+        Participation = apps.get_model('achievements', 'Participation')
+        first, second = Student.objects.create(full_name='Иванов Иван'), Student.objects.create(full_name='Петров Пётр')
+        fields = dict(name='Субботник', level='course', start_date=date(2025, 10, 1), end_date=date(2025, 10, 1))
+        keep, duplicate = Event.objects.create(**fields), Event.objects.create(**fields)
+        Participation.objects.create(student=first, event=keep, role='Участник', hours=2)
+        Participation.objects.create(student=first, event=duplicate, role='Ведущий', hours=5)
+        Participation.objects.create(student=second, event=duplicate, role='Участник', hours=3)
+
+        with self.assertLogs('achievements.migrations', 'WARNING'):
+            apps = self.migrate(self.after)
+        Event = apps.get_model('achievements', 'Event')
+        Participation = apps.get_model('achievements', 'Participation')
+        self.assertEqual(list(Event.objects.values_list('pk', flat=True)), [keep.pk])
+        self.assertEqual(
+            sorted(Participation.objects.values_list('student_id', 'event_id', 'role', 'hours')),
+            [(first.pk, keep.pk, 'Участник, Ведущий', 5), (second.pk, keep.pk, 'Участник', 3)],
+        )
+
+
+@override_settings(ACHIEVEMENTS_METRICS_DIR='')
+class ParseParticipantsTests(SimpleTestCase):
+    """Разбор таблицы участников и отчёт пробной загрузки"""
+
+    def test_hours_formats(self):
+        block = [
+            ('Иванов Иван', '1 курс', 'Участник', 5),
+            ('Петров Пётр', None, 'Ведущий', 5.9),
+            ('Сидоров Семён', '2 курс', None, '3+'),
+            ('  Попов Артём ', ' 3 курс ', 'Волонтёр', '12 ч.'),
+            (None, None, None, None),
+        ]
+        participants, issues = parse_participants(block, first_row=5)
+        self.assertEqual(participants, [
+            ('Иванов Иван', '1 курс', 'Участник', 5),
+            ('Петров Пётр', '', 'Ведущий', 5),
+            ('Сидоров Семён', '2 курс', '', 3),
+            ('Попов Артём', '3 курс', 'Волонтёр', 12),
+        ])
+        self.assertEqual(issues, [])
+        self.assertEqual(parse_participants([]), ([], []))
+
+    def test_row_issues(self):
+        block = [
+            (None, '1 курс', 'Участник', 2),
+            ('Иванов Иван', '1 курс', 'Участник', None),
+            ('Петров Пётр', '1 курс', 'Участник', 'много'),
+            ('Сидоров Семён', '1 курс', 'Участник', 0),
+            ('Попов Артём', '1 курс', 'Участник', '99999999999999999999'),
+            ('Кузнецов Михаил', '1 курс', 'Участник', 10 ** 30),
+            ('Смирнов Сергей', '1 курс', 'Участник', MAX_HOURS),
+        ]
+        participants, issues = parse_participants(block, first_row=5)
+        self.assertEqual(participants, [('Смирнов Сергей', '1 курс', 'Участник', MAX_HOURS)])
+        self.assertEqual(
+            [(issue['row'], issue['issue']) for issue in issues],
+            [(5, 'empty_name'), (6, 'bad_hours'), (7, 'bad_hours'), (8, 'bad_hours'),
+             (9, 'hours_overflow'), (10, 'hours_overflow')],
+        )
+        self.assertEqual(issues[1]['message'], 'Некорректные часы: «»')
+        self.assertEqual(
+            issues[4]['message'], f'Слишком большое число часов: «99999999999999999999» (не больше {MAX_HOURS})',
+        )
+
+    def test_dry_run_report(self):
+        rows = [('Иванов Иван', '1 курс', 'Участник', 2), ('Петров Пётр', '1 курс', 'Участник', '')]
+        broken = (None, 'Курсовой', 'вчера', 'нет')
+        result = validate_workbook(make_workbook({'Лист1': (SUBBOTNIK, rows), 'Лист2': (broken, rows)}), workers=1)
+        first, second = result.reports
+        self.assertEqual(first['sheet'], 'Лист1')
+        self.assertEqual(first['event']['start_date'], '2025-10-01')
+        self.assertEqual((first['errors'], first['participants']), ([], 1))
+        self.assertEqual(first['issues'], [{'row': 6, 'issue': 'bad_hours', 'message': 'Некорректные часы: «»'}])
+        self.assertIsNone(second['event'])
+        self.assertIn('Не найдено название мероприятия', second['errors'])
+        self.assertEqual(result.sheet_results, ['Лист "Лист1": Субботник — участников 1, замечаний 1'])
+        self.assertEqual(result.error_sheets, [f'Лист2: {second["errors"][0]}'])
+
+
+@override_settings(ACHIEVEMENTS_METRICS_DIR='')
+class StudentDedupeTests(TestCase):
+    """Один студент при разных написаниях ФИО: ключ name_key, загрузка и слияние дублей"""
+
+    def test_normalize_name(self):
+        key = normalize_name('Фёдоров Семён')
+        for variant in ('фёдоров семён', 'Федоров Семен', '  ФЁДОРОВ   Семён ', 'Фёдоров\tСемён'):
+            self.assertEqual(normalize_name(variant), key)
+        self.assertNotEqual(normalize_name('Фёдоров Семён Петрович'), key)
+        self.assertEqual(Student.objects.create(full_name='Фёдоров  Семён').name_key, key)
+
+    def test_import_reuses_students_by_name_key(self):
+        existing = Student.objects.create(full_name='Фёдоров Семён', group='1 курс')
+        sheets = {
+            'Лист1': (SUBBOTNIK, [('федоров семен', '2 курс', 'Участник', 2), ('Попов Артём', '', 'Участник', 1)]),
+            'Лист2': (
+                ('Концерт', 'Факультетский', '05.10.2025', 'нет'),
+                [('ФЁДОРОВ  СЕМЁН', '2 курс', 'Ведущий', 3), ('попов артём', '', 'Участник', 1)],
+            ),
+        }
+        result = import_workbook(make_workbook(sheets), workers=1)
+        self.assertEqual(result.participations_created, 4)
+        self.assertEqual(
+            sorted(Student.objects.values_list('full_name', 'group')),
+            # Существующий студент сохраняет написание, группа обновляется; новый
+            # записан так, как впервые встретился в файле
+            [('Попов Артём', ''), ('Фёдоров Семён', '2 курс')],
+        )
+        self.assertEqual(Participation.objects.filter(student=existing).count(), 2)
+
+    def test_index_loads_only_sheet_students(self):
+        Student.objects.bulk_create([
+            Student(full_name=f'Студент {i}', group='1 курс', name_key=normalize_name(f'Студент {i}'))
+            for i in range(50)
+        ])
+        index = StudentIndex()
+        with CaptureQueriesContext(connection) as queries:
+            found = index.resolve({
+                normalize_name('студент 3'): ('студент 3', '2 курс'),
+                normalize_name('Попов Артём'): ('Попов Артём', ''),
+            })
+        # Из базы дочитаны только студенты листа, а не вся таблица
+        self.assertIn('"name_key" IN', queries[0]['sql'])
+        self.assertEqual(sorted(index._students), sorted(found))
+        self.assertEqual(found[normalize_name('Студент 3')].full_name, 'Студент 3')
+        self.assertEqual(Student.objects.get(full_name='Студент 3').group, '2 курс')
+
+        # Ключи, уже искавшиеся в файле (и созданные студенты), в базе не ищутся снова
+        with self.assertNumQueries(0):
+            again = index.resolve({
+                normalize_name('Студент 3'): ('Студент 3', '2 курс'),
+                normalize_name('Попов Артём'): ('Попов Артём', ''),
+            })
+        self.assertEqual(again, found)
+
+    def create_duplicates(self):
+        # bulk_create не вызывает save(): ключи дублей, как у старых записей, не заполнены
+        keep, duplicate, other = Student.objects.bulk_create([
+            Student(full_name='Фёдоров Семён', group=''),
+            Student(full_name='федоров  семен', group='2 курс'),
+            Student(full_name='Попов Артём', group='1 курс'),
+        ])
+        events = [
+            Event.objects.create(name=name, level='course', start_date=date(2025, 10, day), end_date=date(2025, 10, day))
+            for day, name in ((1, 'Субботник'), (2, 'Концерт'))
+        ]
+        Participation.objects.create(student=keep, event=events[0], role='Участник', hours=2)
+        Participation.objects.create(student=duplicate, event=events[0], role='Участник', hours=5)
+        Participation.objects.create(student=duplicate, event=events[1], role='Ведущий', hours=3)
+        Participation.objects.create(student=other, event=events[1], role='Участник', hours=1)
+        return keep, duplicate, other
+
+    def test_merge_duplicate_students(self):
+        keep, duplicate, other = self.create_duplicates()
+
+        out = io.StringIO()
+        call_command('merge_duplicate_students', dry_run=True, stdout=out)
+        self.assertIn('участий к переносу: 1, совпадающих участий к удалению: 1', out.getvalue())
+        self.assertEqual(Student.objects.count(), 3)
+
+        call_command('merge_duplicate_students', stdout=io.StringIO())
+        self.assertEqual(list(Student.objects.order_by('pk').values_list('pk', flat=True)), [keep.pk, other.pk])
+        keep.refresh_from_db()
+        self.assertEqual((keep.group, keep.name_key), ('2 курс', normalize_name('Фёдоров Семён')))
+        self.assertEqual(
+            sorted(Participation.objects.filter(student=keep).values_list('event__name', 'hours')),
+            [('Концерт', 3), ('Субботник', 2)],
+        )
+        self.assertEqual(
+            HoursSummary.objects.filter(student=keep).values_list('hours', 'count').get(), (5, 2),
+        )
+
+        out = io.StringIO()
+        call_command('merge_duplicate_students', stdout=out)
+        self.assertIn('Дубликатов не найдено', out.getvalue())
+
+
+@override_settings(ACHIEVEMENTS_OFFLOAD_WORKERS=0, ACHIEVEMENTS_METRICS_DIR='')
+class ReportCacheTests(TestCase):
+    """Изменение студента, мероприятия или участия делает закэшированный отчёт недействительным"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = Student.objects.create(full_name='Иванов Иван', group='1 курс')
+        cls.event = Event.objects.create(
+            name='Субботник', level='course', start_date=date(2025, 10, 1), end_date=date(2025, 10, 1),
+        )
+        cls.participation = Participation.objects.create(student=cls.student, event=cls.event, role='Участник', hours=2)
+        cls.staff = User.objects.create_user('staff', password='x', is_staff=True)
+
+    def setUp(self):
+        directory = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(
+            ACHIEVEMENTS_REPORT_CACHE_DIR=directory, ACHIEVEMENTS_REPORT_CACHE_MAX_BYTES=10 * 1024 * 1024,
+        ))
+        self.client.force_login(self.staff)
+
+    def request_report(self):
+        """Запрашивает отчёт и возвращает, взят ли он из кэша."""
+        cache = get_report_cache()
+        hits = cache.hits
+        response = self.client.post(
+            '/report/', {'student': self.student.pk, 'date_from': '2025-01-01', 'date_to': '2025-12-31'},
+        )
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+        return cache.hits > hits
+
+    def test_edits_invalidate_cached_report(self):
+        self.assertFalse(self.request_report())
+        self.assertTrue(self.request_report())
+
+        edits = [
+            ('student', lambda: Student.objects.get(pk=self.student.pk).save(update_fields=['full_name'])),
+            ('event', lambda: Event.objects.filter(pk=self.event.pk).first().save()),
+            ('participation', lambda: Participation.objects.get(pk=self.participation.pk).save()),
+            ('new participation', lambda: Participation.objects.create(
+                student=self.student, role='Ведущий', hours=3,
+                event=Event.objects.create(name='Концерт', level='faculty', start_date=date(2025, 11, 1), end_date=date(2025, 11, 1)),
+            )),
+            ('deleted participation', lambda: Participation.objects.filter(pk=self.participation.pk).first().delete()),
+        ]
+        for name, edit in edits:
+            with self.subTest(name):
+                edit()
+                self.assertFalse(self.request_report())
+                self.assertTrue(self.request_report())
+
+
+@override_settings(ACHIEVEMENTS_METRICS_DIR='')
+class HoursSummaryTests(TestCase):
+    """Сводка часов, которую ведут приращения, совпадает с полным пересчётом"""
+
+    def assertMatchesRebuild(self, step):
+        def rows():
+            return sorted(HoursSummary.objects.values_list('student_id', 'level', 'academic_year', 'term', 'hours', 'count'))
+
+        incremental = rows()
+        rebuild_summary()
+        with self.subTest(step):
+            self.assertEqual(incremental, rows())
+
+    def test_incremental_matches_rebuild(self):
+        rows = [('Иванов Иван', '1 курс', 'Участник', 2), ('Петров Пётр', '1 курс', 'Ведущий', 3)]
+        concert = ('Концерт', 'Факультетский', '20.01.2026', 'нет')
+        import_workbook(make_workbook({'Лист1': (SUBBOTNIK, rows), 'Лист2': (concert, rows[:1])}), workers=1)
+        self.assertMatchesRebuild('загрузка')
+        self.assertEqual(HoursSummary.objects.count(), 3)
+
+        rows = [('Иванов Иван', '1 курс', 'Участник', 7), ('Сидоров Семён', '2 курс', 'Участник', 1)]
+        import_workbook(make_workbook({'Лист1': (SUBBOTNIK, rows)}), workers=1)
+        self.assertMatchesRebuild('повторная загрузка с новыми часами')
+
+        ivanov = Student.objects.get(full_name='Иванов Иван')
+        petrov = Student.objects.get(full_name='Петров Пётр')
+        subbotnik = Event.objects.get(name='Субботник')
+        concert = Event.objects.get(name='Концерт')
+
+        part = Participation.objects.create(student=petrov, event=concert, role='Участник', hours=4)
+        self.assertMatchesRebuild('новое участие')
+
+        part.hours = 9
+        part.save()
+        self.assertMatchesRebuild('изменены часы')
+
+        part.student = ivanov
+        part.event = subbotnik
+        Participation.objects.filter(student=ivanov, event=subbotnik).delete()
+        part.save()
+        self.assertMatchesRebuild('участие перенесено на другого студента и мероприятие')
+
+        subbotnik.level = 'university'
+        subbotnik.save()
+        self.assertMatchesRebuild('изменён уровень мероприятия')
+
+        # Январь — ещё осенний семестр, февраль — уже весенний
+        concert.start_date = concert.end_date = date(2026, 2, 1)
+        concert.save()
+        self.assertMatchesRebuild('мероприятие перенесено в другой семестр')
+
+        part.delete()
+        self.assertMatchesRebuild('участие удалено')
+
+        concert.delete()
+        self.assertMatchesRebuild('мероприятие удалено')
+
+        Student.objects.get(full_name='Сидоров Семён').delete()
+        self.assertMatchesRebuild('студент удалён')
+        self.assertTrue(HoursSummary.objects.exists())
+
+
+@override_settings(ACHIEVEMENTS_METRICS_DIR='')
+class RoleRuleTests(TestCase):
+    """Правила ролей: нормализация при записи участия и пересчёт командой normalize_roles"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = Student.objects.create(full_name='Иванов Иван')
+        cls.event = Event.objects.create(
+            name='Субботник', level='course', start_date=date(2025, 10, 1), end_date=date(2025, 10, 1),
+        )
+
+    def setUp(self):
+        # Нормализатор процесса мог остаться от другого теста (откат транзакции сигналов не шлёт)
+        RoleRule.clear_cached_normalizer()
+        self.addCleanup(RoleRule.clear_cached_normalizer)
+
+    def test_initial_rules(self):
+        normalize = RoleRule.normalizer()
+        self.assertEqual(normalize(' главныйорганизатор '), 'главный организатор')
+        self.assertEqual(normalize('организатор(отв.за регистрацию)'), 'организатор (отв. за регистрацию)')
+        self.assertEqual(normalize('ведущий.Концерт  и.т.п.'), 'ведущий. Концерт и т. п.')
+
+    def test_invalid_regex(self):
+        with self.assertRaises(ValidationError):
+            RoleRule(pattern='(', is_regex=True).full_clean()
+        RoleRule(pattern='(', is_regex=False).full_clean()
+
+    def rule_queries(self, create):
+        with CaptureQueriesContext(connection) as queries:
+            part = create()
+        return part, sum('achievements_rolerule' in query['sql'] for query in queries)
+
+    def test_save_uses_cached_rules_until_they_change(self):
+        part, loads = self.rule_queries(lambda: Participation.objects.create(
+            student=self.student, event=self.event, role='главныйорганизатор', hours=1,
+        ))
+        self.assertEqual((part.role_normalized, loads), ('главный организатор', 1))
+        part.role = 'отв.за регистрацию'
+        _, loads = self.rule_queries(part.save)
+        self.assertEqual((part.role_normalized, loads), ('отв. за регистрацию', 0))
+
+        rule = RoleRule.objects.create(order=1000, pattern='регистрацию', replacement='регистрацию участников')
+        _, loads = self.rule_queries(part.save)
+        self.assertEqual((part.role_normalized, loads), ('отв. за регистрацию участников', 1))
+
+        rule.delete()
+        part.save()
+        self.assertEqual(part.role_normalized, 'отв. за регистрацию')
+
+    def test_normalize_roles_command(self):
+        part = Participation.objects.create(student=self.student, event=self.event, role='Ведущий', hours=1)
+        version = Student.objects.get(pk=self.student.pk).data_version
+        # bulk_create — как правило, добавленное в другом процессе: роли участий не пересчитаны
+        RoleRule.objects.bulk_create([RoleRule(order=1000, pattern='Ведущий', replacement='Ведущий программы')])
+
+        out = io.StringIO()
+        call_command('normalize_roles', dry_run=True, stdout=out)
+        self.assertIn('Участий с изменившейся ролью: 1', out.getvalue())
+        part.refresh_from_db()
+        self.assertEqual(part.role_normalized, 'Ведущий')
+
+        call_command('normalize_roles', stdout=io.StringIO())
+        part.refresh_from_db()
+        self.assertEqual(part.role_normalized, 'Ведущий программы')
+        self.assertGreater(Student.objects.get(pk=self.student.pk).data_version, version)
+
+
+@override_settings(ACHIEVEMENTS_METRICS_DIR='')
+class ImportJobHeartbeatTests(TransactionTestCase):
+    """Долгая загрузка (разбор части листов в пуле) не считается брошенной"""
+
+    def test_long_running_job_not_requeued(self):
+        create_job(SimpleUploadedFile('участия.xlsx', make_workbook({'Лист1': (SUBBOTNIK, [])}).getvalue()))
+        job = claim_next_job()
+        long_ago = timezone.now() - timedelta(hours=1)
+        ImportJob.objects.filter(pk=job.pk).update(heartbeat_at=long_ago)
+
+        # Листы ещё разбираются, прогресса нет — отмечает поток Heartbeat
+        with Heartbeat(job, interval=0.05):
+            time.sleep(0.3)
+        self.assertEqual(recover_stale_jobs(timeout=60), (0, 0))
+        row = ImportJob.objects.get(pk=job.pk)
+        self.assertEqual(row.status, ImportJob.STATUS_RUNNING)
+        self.assertGreater(row.heartbeat_at, long_ago)
+
+
+@override_settings(ACHIEVEMENTS_METRICS_DIR='')
+class ReportLayoutTests(TestCase):
+    """Вёрстка PDF-отчёта: таблица на несколько страниц, заголовок, номера страниц и подытоги"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = Student.objects.create(full_name='Иванов Иван', group='1 курс')
+        events = Event.objects.bulk_create([
+            Event(
+                name=f'Мероприятие {i}', level='course' if i % 3 else 'faculty',
+                start_date=date(2025, 9, 1) + timedelta(days=i), end_date=date(2025, 9, 1) + timedelta(days=i),
+            )
+            for i in range(120)
+        ])
+        Participation.objects.bulk_create([
+            Participation(student=cls.student, event=event, role='Участник', role_normalized='Участник', hours=2)
+            for event in events
+        ])
+
+    def render(self, render):
+        """Рисует отчёт; возвращает PDF, номера страниц и строки таблиц по страницам."""
+        from reportlab.platypus import Table
+
+        from .reporting import pdf
+
+        page_numbers = []
+        tables = []
+
+        class RecordingCanvas(pdf._MeasuredCanvas):
+            def drawRightString(self, x, y, text, *args, **kwargs):
+                page_numbers.append(text)
+                return super().drawRightString(x, y, text, *args, **kwargs)
+
+        draw_on = Table.drawOn
+
+        def record_table(table, canvas, *args, **kwargs):
+            # Ячейка — абзац или (после wrap) кортеж абзацев
+            rows = [
+                [''.join(part.getPlainText() for part in (cell if isinstance(cell, (list, tuple)) else [cell])) for cell in row]
+                for row in table._cellvalues
+            ]
+            tables.append((canvas.getPageNumber(), rows))
+            return draw_on(table, canvas, *args, **kwargs)
+
+        out = io.BytesIO()
+        with mock.patch.object(pdf, '_MeasuredCanvas', RecordingCanvas), mock.patch.object(Table, 'drawOn', record_table):
+            render(pdf, out)
+        return out.getvalue(), page_numbers, tables
+
+    def pages(self, content):
+        return len(re.findall(rb'/Type /Page\b(?!s)', content))
+
+    def test_long_report_spans_pages(self):
+        from .reporting.styles import HEADER_TITLES, LEVEL_HEADER_TITLES
+
+        date_from, date_to = date(2025, 9, 1), date(2026, 8, 31)
+        data = report_data(self.student.pk, date_from, date_to)
+        content, page_numbers, tables = self.render(
+            lambda pdf, out: pdf.render_report(out, self.student.full_name, date_from, date_to, data),
+        )
+        pages = self.pages(content)
+        self.assertGreater(pages, 1)
+        self.assertEqual(page_numbers, [f'Стр. {page}' for page in range(1, pages + 1)])
+
+        participation_parts = [(page, rows) for page, rows in tables if rows[0] != LEVEL_HEADER_TITLES]
+        # Таблица участий разбита по страницам, и каждая часть начинается со строки заголовка
+        self.assertEqual([page for page, _ in participation_parts], list(range(1, len(participation_parts) + 1)))
+        self.assertGreater(len(participation_parts), 1)
+        for _, rows in participation_parts:
+            self.assertEqual(rows[0], HEADER_TITLES)
+        body = [row for _, rows in participation_parts for row in rows[1:]]
+        self.assertEqual(len(body), 121)
+        self.assertEqual(body[0][:3], ['01.09.2025', '01.09.2025', 'Мероприятие 0'])
+        self.assertEqual(body[-1][-2:], ['ИТОГО часов:', '240'])
+
+        levels = [rows for _, rows in tables if rows[0] == LEVEL_HEADER_TITLES]
+        self.assertEqual(len(levels), 1)
+        self.assertEqual(sorted(levels[0][1:]), [['Курсовой', '80', '160'], ['Факультетский', '40', '80']])
+
+
+def pdf_outline_titles(content):
+    """Заголовки закладок PDF (строки /Title в UTF-16 с экранированием, как их пишет reportlab)."""
+    titles = []
+    # Закладки — объекты с /Parent и /Title; /Title без /Parent — заголовок документа
+    for obj in re.findall(rb'\d+ 0 obj(.*?)endobj', content, re.DOTALL):
+        match = re.search(rb'/Title \(((?:\\.|[^\\)])*)\)', obj)
+        if match is None or b'/Parent' not in obj:
+            continue
+        raw = re.sub(
+            rb'\\([0-7]{1,3}|.)',
+            lambda m: bytes([int(m.group(1), 8)]) if m.group(1)[:1].isdigit() else m.group(1),
+            match.group(1),
+        )
+        if raw.startswith(b'\xfe\xff'):
+            titles.append(raw[2:].decode('utf-16-be'))
+    return titles
+
+
+@override_settings(ACHIEVEMENTS_OFFLOAD_WORKERS=0, ACHIEVEMENTS_METRICS_DIR='')
+class BatchReportTests(TestCase):
+    """Пакетные отчёты: страница /report/batch/ и команда batch_reports"""
+
+    date_from, date_to = date(2025, 9, 1), date(2026, 8, 31)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('staff', password='x', is_staff=True)
+        cls.students = Student.objects.bulk_create([
+            Student(full_name='Иванов Иван', group='1 курс'),
+            Student(full_name='Петров (Пётр)', group='1 курс'),
+            Student(full_name='Сидоров Сидор', group='2 курс'),
+        ])
+        event = Event.objects.create(
+            name='Субботник', level='course', start_date=date(2025, 10, 1), end_date=date(2025, 10, 1),
+        )
+        Participation.objects.bulk_create([
+            Participation(student=student, event=event, role='Участник', role_normalized='Участник', hours=2)
+            for student in cls.students
+        ])
+
+    def setUp(self):
+        self.client.force_login(self.staff)
+
+    def post(self, **data):
+        response = self.client.post('/report/batch/', {
+            'group': '', 'date_from': '01.09.2025', 'date_to': '31.08.2026', 'output_format': 'zip', **data,
+        })
+        self.assertEqual(response.status_code, 200)
+        return response, b''.join(response.streaming_content)
+
+    def file_names(self, students):
+        from .reporting.batch import report_file_name
+
+        return [report_file_name(s.pk, s.full_name, self.date_from, self.date_to) for s in students]
+
+    def assertZip(self, content, students):
+        import zipfile
+
+        with zipfile.ZipFile(io.BytesIO(content)) as archive:
+            self.assertEqual(archive.namelist(), self.file_names(students))
+            for name in archive.namelist():
+                self.assertTrue(archive.read(name).startswith(b'%PDF'), name)
+
+    def assertCombinedPdf(self, content, students):
+        self.assertTrue(content.startswith(b'%PDF'))
+        # Отчёт каждого студента начинается с новой страницы и отмечен закладкой с ФИО
+        self.assertGreaterEqual(len(re.findall(rb'/Type /Page\b(?!s)', content)), len(students))
+        self.assertEqual(pdf_outline_titles(content), [s.full_name for s in students])
+
+    def test_zip_for_group(self):
+        response, content = self.post(group='1 курс')
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        self.assertIn(quote('reports_1 курс_2025-09-01_2026-08-31.zip'), response['Content-Disposition'])
+        self.assertZip(content, self.students[:2])
+
+    def test_combined_pdf(self):
+        response, content = self.post(output_format='pdf')
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertCombinedPdf(content, sorted(self.students, key=lambda s: s.full_name))
+
+    def test_empty_period_shows_warning(self):
+        response = self.client.post('/report/batch/', {
+            'group': '', 'date_from': '01.09.2020', 'date_to': '31.08.2021', 'output_format': 'zip',
+        })
+        self.assertContains(response, 'За выбранный период участий не найдено')
+
+    def test_command(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            for output_format, check in (('zip', self.assertZip), ('pdf', self.assertCombinedPdf)):
+                path = os.path.join(tmp, f'reports.{output_format}')
+                out = io.StringIO()
+                call_command(
+                    'batch_reports', '--from', '2025-09-01', '--to', '2026-08-31', '--group', '2 курс',
+                    '--format', output_format, '--workers', '1', '-o', path, stdout=out,
+                )
+                self.assertIn(f'Отчётов: 1, файл: {path}', out.getvalue())
+                with open(path, 'rb') as f:
+                    check(f.read(), self.students[2:])
+
+
+@override_settings(ACHIEVEMENTS_METRICS_DIR='')
+class ExportTests(TestCase):
+    """Выгрузка участий: формат CSV и XLSX, фильтры, одинаковый вывод csv_stream и acsv_stream"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('staff', password='x', is_staff=True)
+        cls.ivanov = Student.objects.create(full_name='Иванов Иван', group='1 курс')
+        cls.petrov = Student.objects.create(full_name='Петров Пётр', group='2 курс')
+        cls.subbotnik = Event.objects.create(
+            name='Субботник', level='course', start_date=date(2025, 10, 1), end_date=date(2025, 10, 2),
+        )
+        cls.olympiad = Event.objects.create(
+            name='Олимпиада', level='faculty', start_date=date(2026, 3, 5), end_date=date(2026, 3, 5),
+        )
+        Participation.objects.bulk_create([
+            Participation(student=cls.ivanov, event=cls.subbotnik, role_normalized='Участник', hours=2),
+            Participation(student=cls.petrov, event=cls.subbotnik, role_normalized='Организатор', hours=4),
+            Participation(student=cls.ivanov, event=cls.olympiad, role_normalized='Участник', hours=3),
+        ])
+
+    def names(self, participations):
+        return [(p.student.full_name, p.event.name) for p in participations.select_related('student', 'event')]
+
+    def test_csv_format(self):
+        self.client.force_login(self.staff)
+        response = self.client.get('/export/', {'format': 'csv'})
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        content = b''.join(response.streaming_content).decode('utf-8')
+        # BOM, «;» и ДД.ММ.ГГГГ — чтобы файл без настройки открыл русский Excel
+        self.assertTrue(content.startswith('\ufeff'))
+        self.assertEqual(content[1:].splitlines(), [
+            ';'.join(COLUMNS),
+            'Иванов Иван;1 курс;Субботник;Курсовой;01.10.2025;02.10.2025;Участник;2',
+            'Петров Пётр;2 курс;Субботник;Курсовой;01.10.2025;02.10.2025;Организатор;4',
+            'Иванов Иван;1 курс;Олимпиада;Факультетский;05.03.2026;05.03.2026;Участник;3',
+        ])
+
+    def test_xlsx(self):
+        import openpyxl
+
+        self.client.force_login(self.staff)
+        response = self.client.get('/export/', {'format': 'xlsx', 'group': '1 курс'})
+        workbook = openpyxl.load_workbook(io.BytesIO(b''.join(response.streaming_content)), read_only=True)
+        rows = [
+            [value.date() if hasattr(value, 'date') else value for value in row]
+            for row in workbook['Участия'].iter_rows(values_only=True)
+        ]
+        self.assertEqual(rows, [
+            COLUMNS,
+            ['Иванов Иван', '1 курс', 'Субботник', 'Курсовой', date(2025, 10, 1), date(2025, 10, 2), 'Участник', 2],
+            ['Иванов Иван', '1 курс', 'Олимпиада', 'Факультетский', date(2026, 3, 5), date(2026, 3, 5), 'Участник', 3],
+        ])
+
+    def test_filters(self):
+        self.assertEqual(len(self.names(export_queryset())), 3)
+        cases = [
+            ({'date_from': date(2026, 1, 1)}, [('Иванов Иван', 'Олимпиада')]),
+            ({'date_to': date(2025, 12, 31)}, [('Иванов Иван', 'Субботник'), ('Петров Пётр', 'Субботник')]),
+            ({'level': 'faculty'}, [('Иванов Иван', 'Олимпиада')]),
+            ({'group': '2 курс'}, [('Петров Пётр', 'Субботник')]),
+            ({'event': self.subbotnik}, [('Иванов Иван', 'Субботник'), ('Петров Пётр', 'Субботник')]),
+            ({'date_from': date(2025, 1, 1), 'date_to': date(2025, 12, 31), 'group': '1 курс'},
+             [('Иванов Иван', 'Субботник')]),
+        ]
+        for filters, expected in cases:
+            with self.subTest(filters=filters):
+                self.assertEqual(self.names(export_queryset(**filters)), expected)
+
+    async def test_acsv_stream_matches_csv_stream(self):
+        # Больше 500 строк — вывод идёт несколькими порциями
+        students = await Student.objects.abulk_create([
+            Student(full_name=f'Студент {i:03}', group='3 курс') for i in range(600)
+        ])
+        await Participation.objects.abulk_create([
+            Participation(student=student, event=self.olympiad, role_normalized='Участник', hours=1)
+            for student in students
+        ])
+        chunks = [chunk async for chunk in acsv_stream(export_queryset())]
+        self.assertGreater(len(chunks), 2)
+        expected = await sync_to_async(lambda: ''.join(csv_stream(export_queryset())))()
+        self.assertEqual(''.join(chunks), expected)
+        self.assertEqual(len(expected.splitlines()), 604)
+
+
+class ParseEventFieldsTests(SimpleTestCase):
+    """Разбор дат, уровня и заголовков блока мероприятия"""
+
+    def test_date_range(self):
+        cases = [
+            ('01.03.2025', (date(2025, 3, 1), date(2025, 3, 1))),
+            ('1.3.2025', (date(2025, 3, 1), date(2025, 3, 1))),
+            ('01.03.2025 - 02.03.2025', (date(2025, 3, 1), date(2025, 3, 2))),
+            ('с 01.03.2025 по 05.03.2025', (date(2025, 3, 1), date(2025, 3, 5))),
+            ('30.12.2025 - 02.01.2026', (date(2025, 12, 30), date(2026, 1, 2))),
+            ('', (None, None)),
+            ('в течение года', (None, None)),
+        ]
+        for text, expected in cases:
+            with self.subTest(text=text):
+                self.assertEqual(parse_date_range(text), expected)
+
+    def test_invalid_date_range(self):
+        for text in ('31.02.2025', '01.03.2025 - 32.03.2025', 'весна - осень', '1 марта - 2 марта'):
+            with self.subTest(text=text), self.assertRaises(ValueError):
+                parse_date_range(text)
+
+    def test_date_range_cached(self):
+        parse_date_range.cache_clear()
+        first = parse_date_range('30.12.2025 - 02.01.2026')
+        second = parse_date_range('30.12.2025 - 02.01.2026')
+        self.assertEqual(parse_date_range.cache_info().hits, 1)
+        # Из кеша отдаётся неизменяемый кортеж: вызывающий не может испортить его для других
+        self.assertEqual(first, second)
+        self.assertIsInstance(second, tuple)
+        # Ошибка не кешируется — повторный вызов снова её выбрасывает
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                parse_date_range('31.02.2025')
+
+    def test_level(self):
+        cases = [
+            ('курсовой', 'course'),
+            ('факультетский (химфак)', 'faculty'),
+            ('всероссийский', 'all_russian'),
+            ('день химика', 'chemistry_day'),
+            ('', None),
+            ('международный', None),
+        ]
+        for text, expected in cases:
+            with self.subTest(text=text):
+                self.assertEqual(match_level(text), expected)
+                self.assertEqual(match_level(text), expected)
+
+    def test_header(self):
+        cases = [
+            ('название мероприятия', 'name'),
+            ('уровень мероприятия', 'level'),
+            ('даты проведения (дд.мм.гггг)', 'dates'),
+            ('проводится впервые', 'first_time'),
+            ('организовано впервые', 'first_time'),
+            ('фио', None),
+        ]
+        for text, expected in cases:
+            with self.subTest(text=text):
+                self.assertEqual(match_header(text), expected)
+                self.assertEqual(match_header(text), expected)
+
+
+class BenchmarkImportTests(SimpleTestCase):
+    """Команда benchmark_import на маленьком файле выдаёт все метрики"""
+
+    def test_json_output(self):
+        # Отдельный процесс: команда создаёт и удаляет свою временную базу
+        result = subprocess.run(
+            [sys.executable, 'manage.py', 'benchmark_import', '--sheets', '2', '--rows', '5', '--json'],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+        )
+        metrics = json.loads(result.stdout)
+        self.assertLessEqual({
+            'read_seconds', 'rows_read', 'read_parse_seconds', 'parse_seconds', 'cpus', 'sheets',
+            'sheet_errors', 'participants', 'write_seconds', 'queries', 'db_seconds', 'reupload_seconds',
+            'reupload_queries', 'total_seconds', 'rows_per_second', 'peak_rss_mb', 'peak_rss_children_mb',
+            'workers', 'reader',
+        }, metrics.keys())
+        self.assertEqual((metrics['sheets'], metrics['sheet_errors']), (2, 0))
+        self.assertGreater(metrics['participants'], 0)
+        self.assertEqual((metrics['workers'], metrics['reader']), (1, 'openpyxl'))
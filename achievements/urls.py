@@ -1,7 +1,17 @@
 from django.urls import path
-from . import views
+from .views import api, imports, reports, search
 
 urlpatterns = [
-    path('upload/', views.upload_participations, name='upload'),
-    path('report/', views.student_report, name='report'),
-]
\ No newline at end of file
+    path('upload/', imports.upload_participations, name='upload'),
+    path('upload/jobs/<int:pk>/', imports.import_job_status, name='import_job_status'),
+    path('report/', reports.student_report, name='report'),
+    path('students/search/', search.student_search, name='student_search'),
+    path('search/', search.full_text_search, name='search'),
+    path('report/batch/', reports.batch_report, name='batch_report'),
+    path('analytics/', reports.hours_analytics, name='analytics'),
+    path('export/', reports.export_participations, name='export'),
+    path('api/students/', api.api_list, {'resource': 'students'}, name='api_students'),
+    path('api/events/', api.api_list, {'resource': 'events'}, name='api_events'),
+    path('metrics', api.metrics_endpoint, name='metrics'),
+    path('api/participations/', api.api_list, {'resource': 'participations'}, name='api_participations'),
+]
@@ -0,0 +1,18 @@
+"""
+Представления приложения, по модулям:
+
+- imports — загрузка Excel (постановка в очередь и статус загрузки);
+- reports — PDF-отчёты, аналитика и выгрузка участий;
+- search — подсказки и полнотекстовый поиск;
+- api — JSON API и /metrics.
+
+Представления imports, reports и search асинхронные: под ASGI (config/asgi.py,
+web_asgi в Procfile) воркер, ожидая базу или вёрстку PDF (см. offload),
+обслуживает другие запросы. Представления api синхронные: condition() вызывает
+функции ETag синхронно, а сами запросы короткие.
+
+Тяжёлые библиотеки (reportlab, pandas, openpyxl) модули импортируют внутри
+представлений, при первом запросе: процесс, который загружает urls.py (воркер
+gunicorn, manage.py), стартует без них. С gunicorn --preload их заранее загружает
+warmup.warm_up() в мастер-процессе (см. gunicorn.conf.py).
+"""
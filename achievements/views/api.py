@@ -0,0 +1,30 @@
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_GET
+from django.views.decorators.vary import vary_on_headers
+
+from .. import api, metrics
+
+
+@api.api_auth
+@require_GET
+@vary_on_headers('Authorization')
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=api.etag, last_modified_func=api.last_modified)
+def api_list(request, resource):
+    """
+    Список студентов, мероприятий или участий (resource из urls.py): фильтры —
+    поля формы *ApiFilterForm, ?limit=N, ?cursor= из ссылки next предыдущей страницы.
+    Клиент, приславший If-None-Match с прежним ETag, получает 304 до выборки данных.
+    """
+    try:
+        page = api.list_page(request, resource)
+    except api.BadRequest as exc:
+        return api.error_response(str(exc))
+    return JsonResponse(page, json_dumps_params={'ensure_ascii': False})
+
+
+@api.token_or_staff_required('ACHIEVEMENTS_METRICS_TOKENS')
+def metrics_endpoint(request):
+    """Гистограммы metrics в текстовом формате Prometheus (для сборщика — по токену)."""
+    return HttpResponse(metrics.render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,47 @@
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
+from django.shortcuts import aget_object_or_404, redirect, render
+from django.urls import reverse
+
+from ..forms import UploadFileForm
+from ..jobs import create_job, job_status
+from ..models import ImportJob
+
+
+@staff_member_required
+async def upload_participations(request):
+    if request.method == 'POST':
+        form = UploadFileForm(request.POST, request.FILES)
+        if form.is_valid():
+            # Файл только ставится в очередь — разбор выполняет воркер (process_imports)
+            job = await sync_to_async(create_job)(
+                request.FILES['file'], await request.auser(),
+                force=form.cleaned_data['force'],
+                dry_run=form.cleaned_data['dry_run'],
+            )
+            if request.headers.get('Accept', '').startswith('application/json'):
+                return JsonResponse(
+                    {'job_id': job.pk, 'status_url': reverse('import_job_status', args=[job.pk])},
+                    status=202,
+                )
+            if job.dry_run:
+                messages.info(request, f'Файл «{job.file_name}» поставлен в очередь на проверку, загрузка #{job.pk}')
+            else:
+                messages.info(request, f'Файл «{job.file_name}» поставлен в очередь, загрузка #{job.pk}')
+            return redirect(f"{reverse('upload')}?job={job.pk}")
+    else:
+        form = UploadFileForm()
+
+    job = None
+    if request.GET.get('job', '').isdigit():
+        job = await ImportJob.objects.filter(pk=request.GET['job']).afirst()
+
+    return await sync_to_async(render)(request, 'achievements/upload.html', {'form': form, 'job': job})
+
+
+@staff_member_required
+async def import_job_status(request, pk):
+    job = await aget_object_or_404(ImportJob, pk=pk)
+    return JsonResponse(job_status(job))
@@ -0,0 +1,127 @@
+"""
+Отчёты, аналитика и выгрузка — асинхронные представления: под ASGI воркер,
+ожидая базу или вёрстку PDF, продолжает обслуживать другие запросы. Вёрстка
+выполняется в пуле процессов (offload), запросы к базе — через async ORM или,
+для общих с командами функций и проверки форм, через sync_to_async. Шаблоны
+рендерятся, а формы со списками из базы создаются через sync_to_async:
+контекстные процессоры и формы читают базу синхронно.
+"""
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, JsonResponse, StreamingHttpResponse
+from django.shortcuts import render
+from django.utils import timezone
+
+from .. import offload
+from ..export import acsv_stream, csv_stream, export_queryset, xlsx_file
+from ..forms import BatchReportForm, ExportForm, ReportForm
+from ..reporting.cache import get_report_cache, report_key
+from ..reporting.data import batch_report_data, report_data
+from ..summary import analytics
+
+
+@staff_member_required
+async def student_report(request):
+    if request.method == 'POST':
+        form = ReportForm(request.POST)
+        # Проверка формы выбирает студента из базы
+        if await sync_to_async(form.is_valid)():
+            student = form.cleaned_data['student']
+            date_from = form.cleaned_data['date_from']
+            date_to = form.cleaned_data['date_to']
+
+            # Версия прочитана вместе со студентом, до выборки участий: если данные
+            # изменятся между запросами, отчёт попадёт в кэш под уже устаревшим ключом
+            cache = get_report_cache()
+            key = report_key(student.pk, date_from, date_to, student.data_version)
+            # Чтение и запись файлов кэша — в потоке, не в цикле событий; базу кэш не
+            # трогает, поэтому общий поток синхронного кода (thread_sensitive) не нужен
+            pdf = await sync_to_async(cache.get, thread_sensitive=False)(key)
+            if pdf is None:
+                data = await sync_to_async(report_data)(student.pk, date_from, date_to)
+                try:
+                    # Файл отдаётся частями, большой отчёт не держится в памяти целиком
+                    pdf = await offload.render_to_file(
+                        'achievements.reporting.pdf.render_report', student.full_name, date_from, date_to, data,
+                    )
+                except offload.Saturated:
+                    return offload.busy_response()
+                await sync_to_async(cache.put, thread_sensitive=False)(key, pdf)
+            filename = f"report_{student.id}_{date_from}_{date_to}.pdf"
+            return FileResponse(pdf, as_attachment=True, filename=filename, content_type='application/pdf')
+    else:
+        form = ReportForm()
+
+    return await sync_to_async(render)(request, 'achievements/report_form.html', {'form': form})
+
+
+@staff_member_required
+async def batch_report(request):
+    if request.method == 'POST':
+        # Список групп формы выбирается из базы при создании
+        form = await sync_to_async(BatchReportForm)(request.POST)
+        if await sync_to_async(form.is_valid)():
+            group = form.cleaned_data['group'] or None
+            date_from = form.cleaned_data['date_from']
+            date_to = form.cleaned_data['date_to']
+            output_format = form.cleaned_data['output_format']
+
+            reports = await sync_to_async(batch_report_data)(date_from, date_to, group)
+            if not reports:
+                messages.warning(request, 'За выбранный период участий не найдено')
+            else:
+                title = f"Отчёты: {group or 'все студенты'}, {date_from.strftime('%d.%m.%Y')} - {date_to.strftime('%d.%m.%Y')}"
+                try:
+                    # workers=1: пакет рисуется последовательно в процессе пула offload —
+                    # вложенный пул процессов обошёл бы ограничение ACHIEVEMENTS_OFFLOAD_WORKERS
+                    data = await offload.render_to_file(
+                        'achievements.reporting.batch.write_batch', reports, date_from, date_to, output_format,
+                        1, title,
+                    )
+                except offload.Saturated:
+                    return offload.busy_response()
+                filename = f"reports_{group or 'all'}_{date_from}_{date_to}.{output_format}"
+                content_type = 'application/pdf' if output_format == 'pdf' else 'application/zip'
+                return FileResponse(data, as_attachment=True, filename=filename, content_type=content_type)
+    else:
+        form = await sync_to_async(BatchReportForm)()
+
+    return await sync_to_async(render)(request, 'achievements/batch_report_form.html', {'form': form})
+
+
+@staff_member_required
+async def hours_analytics(request):
+    """Сводка часов по уровням и лучшие студенты за учебный год/семестр (HTML или ?format=json)."""
+    params = request.GET
+    academic_year = int(params['year']) if params.get('year', '').isdigit() else None
+    term = int(params['term']) if params.get('term') in ('1', '2') else None
+    limit = min(int(params['limit']), 100) if params.get('limit', '').isdigit() and int(params['limit']) > 0 else 20
+
+    data = await sync_to_async(analytics)(academic_year, term, limit)
+    if params.get('format') == 'json':
+        return JsonResponse(data)
+    return await sync_to_async(render)(request, 'achievements/analytics.html', data)
+
+
+@staff_member_required
+async def export_participations(request):
+    """Выгрузка участий по фильтрам: ?format=csv — потоком, ?format=xlsx — файлом."""
+    output_format = request.GET.get('format')
+    form = await sync_to_async(ExportForm)(request.GET if output_format else None)
+    if output_format in ('csv', 'xlsx') and await sync_to_async(form.is_valid)():
+        participations = export_queryset(**form.cleaned_data)
+        filename = f"participations_{timezone.localdate():%Y-%m-%d}.{output_format}"
+        if output_format == 'csv':
+            # Синхронный генератор Django под ASGI сначала прочитал бы в память целиком
+            stream = acsv_stream(participations) if isinstance(request, ASGIRequest) else csv_stream(participations)
+            response = StreamingHttpResponse(stream, content_type='text/csv; charset=utf-8')
+            response['Content-Disposition'] = f'attachment; filename="{filename}"'
+            return response
+        return FileResponse(
+            await sync_to_async(xlsx_file)(participations), as_attachment=True, filename=filename,
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        )
+
+    return await sync_to_async(render)(request, 'achievements/export.html', {'form': form})
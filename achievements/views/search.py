@@ -0,0 +1,37 @@
+from asgiref.sync import sync_to_async
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
+
+from .. import search
+from ..autocomplete import DEFAULT_LIMIT, MAX_LIMIT, search_students
+
+
+@staff_member_required
+async def student_search(request):
+    """Подсказки для поля «Студент»: ?q=начало ФИО&limit=N."""
+    limit = request.GET.get('limit', '')
+    limit = int(limit) if limit.isdigit() and int(limit) > 0 else DEFAULT_LIMIT
+    students = search_students(request.GET.get('q', ''), limit)
+    return JsonResponse({'results': [{'id': student.pk, 'text': str(student)} async for student in students]})
+
+
+@staff_member_required
+async def full_text_search(request):
+    """
+    Поиск по студентам, мероприятиям и участиям: ?q=слова&kind=вид&limit=N.
+    Без kind — по всем видам. Результаты каждого вида — по релевантности.
+    """
+    limit = request.GET.get('limit', '')
+    limit = min(int(limit), MAX_LIMIT) if limit.isdigit() and int(limit) > 0 else DEFAULT_LIMIT
+    kinds = search.KINDS
+    if request.GET.get('kind'):
+        if request.GET['kind'] not in search.KINDS:
+            return JsonResponse({'error': f'kind: одно из {", ".join(search.KINDS)}'}, status=400)
+        kinds = (request.GET['kind'],)
+    query = request.GET.get('q', '')
+    results = {}
+    for kind in kinds:
+        # Поиск выполняет SQL индекса напрямую через курсор — вне async ORM
+        objects = await sync_to_async(search.search)(kind, query, limit)
+        results[kind] = [{'id': obj.pk, 'text': str(obj)} for obj in objects]
+    return JsonResponse(results)
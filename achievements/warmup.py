@@ -0,0 +1,44 @@
+"""
+Предварительная загрузка тяжёлых библиотек — для gunicorn --preload.
+
+Представления импортируют reportlab, openpyxl и pandas при первом запросе (см.
+views), поэтому без preload каждый воркер стартует быстро и загружает только то,
+что ему понадобилось. С preload warm_up() выполняется в мастер-процессе до
+создания воркеров (gunicorn.conf.py): модули, шрифт отчётов и стили загружаются
+один раз, и воркеры получают их страницы памяти общими (copy-on-write) —
+первый отчёт или загрузка в воркере не тратит время на импорт и разбор TTF.
+
+В базу warm_up() не обращается: соединение, открытое в мастере, унаследовали
+бы все воркеры.
+"""
+import importlib
+import time
+
+from django.conf import settings
+
+from .readers import READER_PANDAS
+
+
+def warm_up():
+    """Загружает модули отчётов и разбора Excel, регистрирует шрифт. Возвращает {этап: секунды}."""
+    timings = {}
+
+    started = time.perf_counter()
+    _import_modules(['achievements.reporting.pdf', 'achievements.reporting.batch'])
+    from .reporting.styles import get_styles
+
+    get_styles()
+    timings['reports'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    modules = ['openpyxl', 'openpyxl.reader.excel', 'openpyxl.worksheet._read_only', 'achievements.parsing']
+    if getattr(settings, 'ACHIEVEMENTS_EXCEL_READER', '') == READER_PANDAS:
+        modules.append('pandas')
+    _import_modules(modules)
+    timings['parsers'] = time.perf_counter() - started
+    return timings
+
+
+def _import_modules(modules):
+    for name in modules:
+        importlib.import_module(name)
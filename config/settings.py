@@ -63,6 +63,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Первым — чтобы время ответа включало все остальные middleware
+    'achievements.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # обязательно после SecurityMiddleware
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -73,6 +75,15 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Запуск под ASGI (config.asgi): ACHIEVEMENTS_ASGI=True задаёт строка web_asgi в Procfile.
+# WhiteNoise тогда не подключается: его middleware только синхронный, и Django
+# выполнял бы его и все middleware над ним (а значит, каждый запрос) в одном общем
+# потоке sync_to_async. Статику там отдаёт ASGIStaticFilesHandler Django (см.
+# config/asgi.py); за обратным прокси лучше отдавать STATIC_ROOT им самим
+ACHIEVEMENTS_ASGI = os.environ.get('ACHIEVEMENTS_ASGI', 'False') == 'True'
+if ACHIEVEMENTS_ASGI:
+    MIDDLEWARE.remove('whitenoise.middleware.WhiteNoiseMiddleware')
+
 ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
@@ -97,10 +108,12 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
+# Постоянные подключения (секунд). Под ASGI по умолчанию 0: подключение там
+# принадлежит потоку sync_to_async запроса и не переиспользуется следующими
 DATABASES = {
     'default': dj_database_url.config(
         default='sqlite:///' + str(BASE_DIR / 'db.sqlite3'),
-        conn_max_age=600
+        conn_max_age=int(os.environ.get('DATABASE_CONN_MAX_AGE', '0' if ACHIEVEMENTS_ASGI else '600'))
     )
 }
 
@@ -132,4 +145,45 @@ TIME_ZONE = 'Europe/Moscow'
 
 USE_I18N = True
 
-USE_TZ = True
\ No newline at end of file
+USE_TZ = True
+
+# Загрузка Excel с участиями
+# 'openpyxl' — потоковое чтение (read-only), 'pandas' — запасной вариант
+ACHIEVEMENTS_EXCEL_READER = os.environ.get('ACHIEVEMENTS_EXCEL_READER', 'openpyxl')
+
+# Число процессов для параллельного разбора листов (1 — без пула процессов)
+ACHIEVEMENTS_IMPORT_WORKERS = int(os.environ.get('ACHIEVEMENTS_IMPORT_WORKERS', '1'))
+
+# Загрузка, от воркера которой нет вестей дольше стольких секунд, возвращается в
+# очередь (воркер упал или был перезапущен посреди файла); после стольких попыток
+# вместо этого помечается ошибкой
+ACHIEVEMENTS_IMPORT_STALE_SECONDS = int(os.environ.get('ACHIEVEMENTS_IMPORT_STALE_SECONDS', '600'))
+ACHIEVEMENTS_IMPORT_MAX_ATTEMPTS = int(os.environ.get('ACHIEVEMENTS_IMPORT_MAX_ATTEMPTS', '3'))
+
+# Число процессов для пакетных отчётов в ZIP в команде batch_reports (1 — без пула
+# процессов). Веб-запрос рисует пакет последовательно в одном процессе пула offload
+ACHIEVEMENTS_REPORT_WORKERS = int(os.environ.get('ACHIEVEMENTS_REPORT_WORKERS', '1'))
+
+# Пул процессов для вёрстки PDF в веб-запросах (см. achievements/offload.py) в каждом
+# воркере веб-сервера: число процессов (0 — в потоке воркера) и сколько отчётов может
+# ждать в очереди сверх них; остальные запросы получают 503
+ACHIEVEMENTS_OFFLOAD_WORKERS = int(os.environ.get('ACHIEVEMENTS_OFFLOAD_WORKERS', '2'))
+ACHIEVEMENTS_OFFLOAD_QUEUE = int(os.environ.get('ACHIEVEMENTS_OFFLOAD_QUEUE', '8'))
+
+# Кэш готовых PDF-отчётов на диске (0 байт — кэш выключен)
+ACHIEVEMENTS_REPORT_CACHE_DIR = os.environ.get('ACHIEVEMENTS_REPORT_CACHE_DIR', BASE_DIR / 'report_cache')
+ACHIEVEMENTS_REPORT_CACHE_MAX_BYTES = int(os.environ.get('ACHIEVEMENTS_REPORT_CACHE_MAX_BYTES', str(200 * 1024 * 1024)))
+
+# Токены доступа к API только для чтения (/api/…) для внешних систем, через запятую.
+# Передаются в заголовке «Authorization: Bearer <токен>»; сотрудники могут
+# обращаться к API и без токена, войдя в админку
+ACHIEVEMENTS_API_TOKENS = [token.strip() for token in os.environ.get('ACHIEVEMENTS_API_TOKENS', '').split(',') if token.strip()]
+
+# Метрики производительности (/metrics, формат Prometheus). Каталог, через который
+# процессы (воркеры gunicorn, process_imports) складывают метрики; пусто — у каждого
+# процесса свои. Токены для сборщика метрик — через запятую, как ACHIEVEMENTS_API_TOKENS
+ACHIEVEMENTS_METRICS_DIR = os.environ.get('ACHIEVEMENTS_METRICS_DIR', BASE_DIR / 'metrics')
+ACHIEVEMENTS_METRICS_TOKENS = [token.strip() for token in os.environ.get('ACHIEVEMENTS_METRICS_TOKENS', '').split(',') if token.strip()]
+
+# Запросы дольше стольких секунд пишутся в лог предупреждением (0 — не писать)
+ACHIEVEMENTS_SLOW_REQUEST_SECONDS = float(os.environ.get('ACHIEVEMENTS_SLOW_REQUEST_SECONDS', '2'))
@@ -0,0 +1,36 @@
+"""
+Настройки gunicorn: файл читается автоматически при запуске из корня проекта.
+
+С --preload приложение загружается в мастер-процессе; when_ready() дополнительно
+загружает там reportlab, шрифт отчётов и читатели Excel (achievements.warmup) и
+замораживает сборщик мусора: объекты мастера переносятся в постоянное поколение,
+и сборка мусора в воркерах не трогает их заголовки — страницы памяти остаются
+общими (copy-on-write), а не копируются в каждый воркер.
+
+post_fork() создаёт в каждом воркере пул процессов для вёрстки PDF
+(achievements.offload) сразу после fork — пока у воркера нет потоков, и его
+процессы наследуют загруженный warm_up() reportlab.
+"""
+import gc
+
+
+def when_ready(server):
+    if not server.cfg.preload_app:
+        return
+
+    from achievements.warmup import warm_up
+
+    timings = warm_up()
+    gc.freeze()
+    server.log.info(
+        'Warm-up: %s', ', '.join(f'{stage} {seconds:.2f}s' for stage, seconds in timings.items())
+    )
+
+
+def post_fork(server, worker):
+    if not server.cfg.preload_app:
+        return
+
+    from achievements import offload
+
+    offload.start()